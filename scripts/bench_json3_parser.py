@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: legacy json.load json3 parser vs the streaming parser.
+
+Usage from project root:
+    python scripts/bench_json3_parser.py [--minutes 60] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.monitors.json3_parser import parse_json3_file
+
+WORDS = (
+    "so today we are going to build an n8n workflow that connects claude "
+    "to google sheets and then we will add a webhook trigger okay um you know "
+    "let me just show you how this agent actually works in make.com"
+).split()
+
+
+def legacy_parse(filepath):
+    with open(filepath, "r") as f:
+        data = json.load(f)
+
+    segments = []
+    for event in data.get("events", []):
+        for seg in event.get("segs", []):
+            text = seg.get("utf8", "").strip()
+            if text and text != "\n":
+                segments.append(text)
+
+    raw_text = " ".join(segments)
+    raw_text = re.sub(r"\[.*?\]", "", raw_text)
+    raw_text = re.sub(r"\s+", " ", raw_text).strip()
+    return raw_text
+
+
+def make_caption_file(path, minutes, seed=0):
+    """Write a json3 file shaped like YouTube auto-captions for `minutes` of video."""
+    rng = random.Random(seed)
+    events = []
+    t = 0
+    while t < minutes * 60 * 1000:
+        if rng.random() < 0.03:
+            events.append({"tStartMs": t, "dDurationMs": 1500,
+                           "segs": [{"utf8": rng.choice(["[Music]", "[Applause]", "[ __ ]"])}]})
+        segs = [{"utf8": (" " if i else "") + rng.choice(WORDS), "tOffsetMs": i * 240}
+                for i in range(rng.randint(3, 8))]
+        events.append({"tStartMs": t, "dDurationMs": 2800, "wWinId": 1, "segs": segs})
+        events.append({"tStartMs": t + 2800, "dDurationMs": 20, "wWinId": 1,
+                       "aAppend": 1, "segs": [{"utf8": "\n"}]})
+        t += 2800
+    doc = {
+        "wireMagic": "pb3",
+        "pens": [{}],
+        "wsWinStyles": [{}, {"mhModeHint": 2, "juJustifCode": 0, "sdScrollDir": 3}],
+        "wpWinPositions": [{}, {"apPoint": 6, "ahHorPos": 20, "avVerPos": 100}],
+        "events": events,
+    }
+    with open(path, "w") as f:
+        json.dump(doc, f)
+
+
+def measure(fn, path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    result = fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def check_equivalence(cases=300):
+    rng = random.Random(42)
+    alphabet = ["a", "b", " ", "[", "]", "\n", "\t", "x y", "[Music]"]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "case.json3")
+        for _ in range(cases):
+            events = [{"segs": [{"utf8": "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))}
+                                for _ in range(rng.randint(0, 4))]}
+                      for _ in range(rng.randint(0, 6))]
+            with open(path, "w") as f:
+                json.dump({"wireMagic": "pb3", "events": events}, f)
+            if legacy_parse(path) != parse_json3_file(path):
+                raise SystemExit("Parsers disagree on: %r" % events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark json3 transcript parsers")
+    parser.add_argument("--minutes", type=int, nargs="+", default=[10, 60, 180],
+                        help="Caption lengths to generate, in video minutes")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    check_equivalence()
+    print("Equivalence check passed.\n")
+    print("%8s %10s %12s %12s %12s %12s" % (
+        "minutes", "size", "legacy ms", "stream ms", "legacy peak", "stream peak"))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for minutes in args.minutes:
+            path = os.path.join(tmpdir, "captions-%d.json3" % minutes)
+            make_caption_file(path, minutes)
+            old, old_time, old_peak = measure(legacy_parse, path, args.repeat)
+            new, new_time, new_peak = measure(parse_json3_file, path, args.repeat)
+            if old != new:
+                raise SystemExit("Output mismatch at %d minutes" % minutes)
+            print("%8d %9.1fK %12.1f %12.1f %11.1fK %11.1fK" % (
+                minutes, os.path.getsize(path) / 1024.0,
+                old_time * 1000, new_time * 1000,
+                old_peak / 1024.0, new_peak / 1024.0))
+
+
+if __name__ == "__main__":
+    main()
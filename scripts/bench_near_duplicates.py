@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: near-duplicate lookups against a large fingerprint table.
+
+Fills a scratch database with random MinHash signatures and times
+find_near_duplicate for copies of stored signatures (hits) and unrelated
+ones (misses), with a connection per lookup and with one shared
+connection as DuplicateFilter uses.
+
+Usage from project root:
+    python scripts/bench_near_duplicates.py [--fingerprints 100000] [--lookups 1000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.processors.near_duplicates import (
+    NUM_PERM,
+    band_keys,
+    find_near_duplicate,
+    pack_signature,
+)
+from src.utils import database
+
+
+def random_signature(rng):
+    return tuple(rng.getrandbits(61) for _ in range(NUM_PERM))
+
+
+def near_copy(signature, rng, changed=6):
+    """A signature matching `signature` in all but `changed` values."""
+    values = list(signature)
+    for i in rng.sample(range(NUM_PERM), changed):
+        values[i] = rng.getrandbits(61)
+    return tuple(values)
+
+
+def populate(count, rng, chunk=5000):
+    stored = []
+    for start in range(0, count, chunk):
+        rows = []
+        for n in range(start, min(start + chunk, count)):
+            signature = random_signature(rng)
+            stored.append(signature)
+            rows.append(("vid%07d" % n, pack_signature(signature), band_keys(signature),
+                         None, None))
+        database.save_transcript_fingerprints(rows)
+    return stored
+
+
+def measure(queries, conn=None):
+    found = 0
+    start = time.perf_counter()
+    for signature in queries:
+        if find_near_duplicate(signature, 0.8, conn) is not None:
+            found += 1
+    return (time.perf_counter() - start) * 1000 / len(queries), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate lookups")
+    parser.add_argument("--fingerprints", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    print("%12s %8s %14s %14s %8s" % (
+        "fingerprints", "kind", "per-call ms", "shared ms", "found"))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for count in args.fingerprints:
+            rng = random.Random(count)
+            database.DB_PATH = Path(tmpdir) / ("fingerprints-%d.db" % count)
+            database.init_db()
+            stored = populate(count, rng)
+            cases = [
+                ("hit", [near_copy(rng.choice(stored), rng) for _ in range(args.lookups)]),
+                ("miss", [random_signature(rng) for _ in range(args.lookups)]),
+            ]
+            for kind, queries in cases:
+                per_call, found = measure(queries)
+                conn = database.get_connection()
+                try:
+                    shared, _ = measure(queries, conn)
+                finally:
+                    conn.close()
+                print("%12d %8s %14.3f %14.3f %8d" % (count, kind, per_call, shared, found))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,7 @@ sys.path.insert(0, str(project_root))
 
 from src.utils.config import DATA_DIR
 from src.utils.database import (
-    init_db, insert_workflow, add_processed_video_id,
+    init_db, insert_workflow, add_processed_video_ids,
     set_last_scan_time, DB_PATH,
 )
 
@@ -69,8 +69,7 @@ def migrate():
             processed = json.load(f)
 
         video_ids = processed.get("processed_video_ids", [])
-        for vid_id in video_ids:
-            add_processed_video_id(vid_id)
+        add_processed_video_ids(video_ids)
         print("Migrated %d processed video IDs." % len(video_ids))
 
         last_check = processed.get("last_check")
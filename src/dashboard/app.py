@@ -1,18 +1,19 @@
+import calendar
 import os
 import re
 import subprocess
-import urllib.request
-import xml.etree.ElementTree as ET
+import time
 from pathlib import Path
 
 import markdown
 import yaml
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, jsonify, request, render_template
 
 from ..utils.config import (
     DATA_DIR, OUTPUT_DIR, WORKFLOWS_DIR, DISCOVERIES_DIR,
     CURRICULUM_DIR, CONFIG_DIR, PROJECT_ROOT
 )
+from ..monitors.feed_reader import fetch_feed, resolve_channel_id
 from ..utils.config import load_sources, load_categories, load_tools_database, load_workflow_groups
 from ..utils.database import (
     init_db, get_all_workflows, get_workflow_by_slug,
@@ -22,8 +23,10 @@ from ..utils.database import (
     get_workflow_count, get_high_value_count,
     get_processed_video_count, get_last_scan_time,
     get_channel_stats, get_workflow_count_by_channel,
-    get_tool_pairs, get_scan_history,
+    get_tool_pairs, get_scan_history, get_last_scan, get_scan_stage_metrics,
+    get_llm_usage_by_scan, get_llm_usage_by_day,
 )
+from ..utils.scan_metrics import render_exposition
 
 app = Flask(__name__, template_folder=str(PROJECT_ROOT / "src" / "dashboard" / "templates"))
 
@@ -180,27 +183,17 @@ def api_add_source():
 
     # Resolve channel ID from handle
     try:
-        url = "https://www.youtube.com/%s" % handle
-        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            html = resp.read().decode("utf-8", errors="replace")
-        match = re.search(r'channel_id=([^"&]+)', html)
-        if not match:
+        channel_id = resolve_channel_id(handle, timeout=10)
+        if not channel_id:
             return jsonify({"error": "Could not resolve channel ID for %s" % handle}), 400
-        channel_id = match.group(1)
     except Exception as e:
         return jsonify({"error": "Failed to resolve handle: %s" % str(e)}), 400
 
-    # Get channel name from RSS feed
+    # Get channel name from RSS feed (parsing stops before the first entry)
     try:
         feed_url = "https://www.youtube.com/feeds/videos.xml?channel_id=%s" % channel_id
-        req = urllib.request.Request(feed_url, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            xml_data = resp.read().decode("utf-8")
-        root = ET.fromstring(xml_data)
-        ns = {"atom": "http://www.w3.org/2005/Atom"}
-        title_el = root.find("atom:title", ns)
-        channel_name = title_el.text if title_el is not None else handle.lstrip("@")
+        feed = fetch_feed(feed_url, timeout=10, max_entries=0)
+        channel_name = (feed.title if feed else "") or handle.lstrip("@")
     except Exception:
         channel_name = handle.lstrip("@")
 
@@ -420,9 +413,41 @@ def api_channel_stats():
 @app.route("/api/scan-history")
 def api_scan_history():
     history = get_scan_history(limit=10)
+    stages = get_scan_stage_metrics(h["scan_id"] for h in history)
+    for h in history:
+        h["stages"] = stages.get(h["scan_id"], [])
     return jsonify(history)
 
 
+@app.route("/metrics")
+def metrics():
+    scan = get_last_scan()
+    stages = []
+    if scan is not None:
+        stages = get_scan_stage_metrics([scan["scan_id"]]).get(scan["scan_id"], [])
+        try:
+            scan["completed_timestamp_seconds"] = calendar.timegm(
+                time.strptime(scan["completed_at"], "%Y-%m-%d %H:%M:%S"))
+        except (TypeError, ValueError):
+            pass
+    gauges = {
+        "ai_library_workflows": ("Workflows in the library.", get_workflow_count()),
+        "ai_library_processed_videos": ("Videos processed so far.", get_processed_video_count()),
+    }
+    return Response(render_exposition(scan, stages, gauges),
+                    mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/llm-usage")
+def api_llm_usage():
+    days = request.args.get("days", 30, type=int)
+    scans = request.args.get("scans", 10, type=int)
+    return jsonify({
+        "by_scan": get_llm_usage_by_scan(limit=scans),
+        "by_day": get_llm_usage_by_day(days=days),
+    })
+
+
 @app.route("/api/scan", methods=["POST"])
 def api_trigger_scan():
     script = str(PROJECT_ROOT / "scripts" / "run_daily_scan.sh")
@@ -1,11 +1,11 @@
 import re
 from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
-from ..utils.config import CURRICULUM_DIR, WORKFLOWS_DIR
-from ..utils.database import get_all_workflows
-from ..utils.file_manager import write_markdown
+from ..utils.config import CURRICULUM_DIR, DATA_DIR, WORKFLOWS_DIR
+from ..utils.database import get_curriculum_entries, get_curriculum_fingerprints
+from ..utils.file_manager import load_json, save_json, write_markdown_if_changed
 from ..utils.logger import setup_logger
 
 logger = setup_logger("curriculum_builder")
@@ -22,6 +22,10 @@ LEVEL_DIRS = {
     "advanced": "03-advanced",
 }
 
+# Section fingerprints and rendered text from the last build.
+STATE_FILE = DATA_DIR / "curriculum_state.json"
+STATE_VERSION = 2
+
 
 def _slugify(text):
     # type: (str) -> str
@@ -40,50 +44,87 @@ def _relative_path(workflow):
     return "../workflows/%s/%s.md" % (level_dir, slug)
 
 
-def build_index(workflows):
-    # type: (List[Dict[str, Any]]) -> str
-    by_level = defaultdict(list)
-    for wf in workflows:
-        level = wf.get("skill_level", "intermediate")
-        by_level[level].append(wf)
+def _index_section(level, wfs):
+    # type: (str, List[Dict[str, Any]]) -> str
+    label = LEVEL_LABELS.get(level, level.title())
+    lines = ["## %s (%d workflows)" % (label, len(wfs)), ""]
+
+    if not wfs:
+        lines.append("_(No workflows yet)_")
+        lines.append("")
+        return "\n".join(lines)
+
+    wfs = sorted(wfs, key=lambda w: w.get("value_score", 0), reverse=True)
+
+    lines.append("| Workflow | Use Case | Tools | Value |")
+    lines.append("|----------|----------|-------|-------|")
+
+    for wf in wfs:
+        title = wf.get("source_title", "Untitled")
+        link = _relative_path(wf)
+        use_case = wf.get("use_case", "general").replace("-", " ").title()
+        tools = ", ".join(wf.get("tools", [])[:3])
+        score = wf.get("value_score", 0)
+        lines.append("| [%s](%s) | %s | %s | %d/10 |" % (
+            title, link, use_case, tools, score
+        ))
 
-    lines = [
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _index_header(total):
+    # type: (int) -> List[str]
+    return [
         "# Automation Workflows Curriculum",
         "",
-        "**Total Workflows:** %d" % len(workflows),
+        "**Total Workflows:** %d" % total,
         "",
         "---",
         "",
     ]
 
-    for level in LEVEL_ORDER:
-        wfs = by_level.get(level, [])
-        label = LEVEL_LABELS.get(level, level.title())
-        lines.append("## %s (%d workflows)" % (label, len(wfs)))
-        lines.append("")
 
-        if not wfs:
-            lines.append("_(No workflows yet)_")
-            lines.append("")
-            continue
+def build_index(workflows):
+    # type: (List[Dict[str, Any]]) -> str
+    by_level = defaultdict(list)
+    for wf in workflows:
+        level = wf.get("skill_level", "intermediate")
+        by_level[level].append(wf)
 
-        wfs.sort(key=lambda w: w.get("value_score", 0), reverse=True)
+    sections = [_index_section(level, by_level.get(level, [])) for level in LEVEL_ORDER]
+    return "\n".join(_index_header(len(workflows)) + sections)
 
-        lines.append("| Workflow | Use Case | Tools | Value |")
-        lines.append("|----------|----------|-------|-------|")
 
-        for wf in wfs:
-            title = wf.get("source_title", "Untitled")
-            link = _relative_path(wf)
-            use_case = wf.get("use_case", "general").replace("-", " ").title()
-            tools = ", ".join(wf.get("tools", [])[:3])
-            score = wf.get("value_score", 0)
-            lines.append("| [%s](%s) | %s | %s | %d/10 |" % (
-                title, link, use_case, tools, score
-            ))
+PATHS_HEADER = [
+    "# Learning Paths",
+    "",
+    "Suggested sequences for learning automation workflows.",
+    "",
+    "---",
+    "",
+]
 
-        lines.append("")
+LEVEL_RANK = {"beginner": 0, "intermediate": 1, "advanced": 2}
 
+
+def _learning_path_section(use_case, wfs):
+    # type: (str, List[Dict[str, Any]]) -> str
+    uc_title = use_case.replace("-", " ").title()
+    lines = ["## %s" % uc_title, ""]
+
+    wfs = sorted(wfs, key=lambda w: (
+        LEVEL_RANK.get(w.get("skill_level", "intermediate"), 1),
+        -w.get("value_score", 0),
+    ))
+
+    for i, wf in enumerate(wfs, 1):
+        title = wf.get("source_title", "Untitled")
+        link = _relative_path(wf)
+        level = wf.get("skill_level", "intermediate").title()
+        lines.append("%d. [%s](%s) (%s)" % (i, title, link, level))
+
+    lines.append("")
     return "\n".join(lines)
 
 
@@ -94,47 +135,88 @@ def build_learning_paths(workflows):
         uc = wf.get("use_case", "general")
         by_use_case[uc].append(wf)
 
-    lines = [
-        "# Learning Paths",
-        "",
-        "Suggested sequences for learning automation workflows.",
-        "",
-        "---",
-        "",
+    sections = [_learning_path_section(uc, wfs) for uc, wfs in sorted(by_use_case.items())]
+    return "\n".join(PATHS_HEADER + sections)
+
+
+def _section_fingerprints(groups):
+    # type: (List[Dict[str, Any]]) -> Tuple[Dict[str, list], Dict[str, list]]
+    """Fingerprints of each index level and each learning path."""
+    index = defaultdict(list)  # type: Dict[str, list]
+    paths = defaultdict(list)  # type: Dict[str, list]
+    for g in groups:
+        summary = [g["count"], g["digest"]]
+        index[g["skill_level"]].append([g["use_case"]] + summary)
+        paths[g["use_case"]].append([g["skill_level"]] + summary)
+    return index, paths
+
+
+def rebuild_curriculum(force=False):
+    # type: (bool) -> None
+    """Bring INDEX.md and learning-paths.md up to date with the library.
+
+    Only sections whose workflows changed since the last build are
+    re-rendered, from a query of the columns they show; the rest come
+    from data/curriculum_state.json. force=True rebuilds every section.
+    """
+    index_path = CURRICULUM_DIR / "INDEX.md"
+    paths_path = CURRICULUM_DIR / "learning-paths.md"
+    groups = get_curriculum_fingerprints()
+    total = sum(g["count"] for g in groups)
+    index_fp, paths_fp = _section_fingerprints(groups)
+
+    state = load_json(STATE_FILE)
+    if (force or state.get("version") != STATE_VERSION
+            or not index_path.exists() or not paths_path.exists()):
+        state = {}
+    old_index = state.get("index", {})  # type: Dict[str, Dict[str, Any]]
+    old_paths = state.get("paths", {})  # type: Dict[str, Dict[str, Any]]
+
+    changed_levels = [
+        level for level in LEVEL_ORDER
+        if old_index.get(level, {}).get("fingerprint") != index_fp.get(level, [])
     ]
-
-    level_rank = {"beginner": 0, "intermediate": 1, "advanced": 2}
-
-    for use_case, wfs in sorted(by_use_case.items()):
-        uc_title = use_case.replace("-", " ").title()
-        lines.append("## %s" % uc_title)
-        lines.append("")
-
-        wfs.sort(key=lambda w: (
-            level_rank.get(w.get("skill_level", "intermediate"), 1),
-            -w.get("value_score", 0),
-        ))
-
-        for i, wf in enumerate(wfs, 1):
-            title = wf.get("source_title", "Untitled")
-            link = _relative_path(wf)
-            level = wf.get("skill_level", "intermediate").title()
-            lines.append("%d. [%s](%s) (%s)" % (i, title, link, level))
-
-        lines.append("")
-
-    return "\n".join(lines)
-
-
-def rebuild_curriculum():
-    # type: () -> None
-    workflows = get_all_workflows()
-    logger.info("Building curriculum from %d workflows", len(workflows))
-
-    index_content = build_index(workflows)
-    write_markdown(CURRICULUM_DIR / "INDEX.md", index_content)
-
-    paths_content = build_learning_paths(workflows)
-    write_markdown(CURRICULUM_DIR / "learning-paths.md", paths_content)
+    changed_use_cases = [
+        uc for uc in sorted(paths_fp)
+        if old_paths.get(uc, {}).get("fingerprint") != paths_fp[uc]
+    ]
+    removed = set(old_paths) - set(paths_fp)
+    if not changed_levels and not changed_use_cases and not removed:
+        logger.info("Curriculum unchanged (%d workflows)", total)
+        return
+
+    logger.info(
+        "Rebuilding curriculum for %d workflows (%d of %d levels, %d of %d learning paths changed)",
+        total, len(changed_levels), len(LEVEL_ORDER), len(changed_use_cases), len(paths_fp),
+    )
+    by_level = defaultdict(list)  # type: Dict[str, List[Dict[str, Any]]]
+    by_use_case = defaultdict(list)  # type: Dict[str, List[Dict[str, Any]]]
+    for entry in get_curriculum_entries(changed_levels, changed_use_cases):
+        by_level[entry["skill_level"]].append(entry)
+        by_use_case[entry["use_case"]].append(entry)
+
+    new_index = {}
+    for level in LEVEL_ORDER:
+        if level in changed_levels:
+            text = _index_section(level, by_level[level])
+        else:
+            text = old_index[level]["text"]
+        new_index[level] = {"fingerprint": index_fp.get(level, []), "text": text}
+
+    new_paths = {}
+    for uc in sorted(paths_fp):
+        if uc in changed_use_cases:
+            text = _learning_path_section(uc, by_use_case[uc])
+        else:
+            text = old_paths[uc]["text"]
+        new_paths[uc] = {"fingerprint": paths_fp[uc], "text": text}
+
+    write_markdown_if_changed(index_path, "\n".join(
+        _index_header(total) + [new_index[level]["text"] for level in LEVEL_ORDER]
+    ))
+    write_markdown_if_changed(paths_path, "\n".join(
+        PATHS_HEADER + [new_paths[uc]["text"] for uc in sorted(new_paths)]
+    ))
+    save_json(STATE_FILE, {"version": STATE_VERSION, "index": new_index, "paths": new_paths})
 
     logger.info("Curriculum rebuilt successfully")
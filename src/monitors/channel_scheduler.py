@@ -0,0 +1,97 @@
+"""
+Adaptive per-channel polling.
+
+Each successful poll records the channel's upload cadence (median gap
+between the uploads in its feed) and schedules the next poll a fraction
+of that cadence later, scaled by the channel's `priority`.
+"""
+
+from datetime import datetime, timedelta
+from statistics import median
+from typing import Any, Dict, List, Optional
+
+from ..utils.config import get_pipeline_setting
+from ..utils.database import get_channel_schedule, get_channel_schedules, save_channel_schedule
+from ..utils.logger import setup_logger
+
+logger = setup_logger("channel_scheduler")
+
+DEFAULT_CADENCE_HOURS = 168.0
+DEFAULT_PRIORITY_FACTORS = {"high": 0.5, "medium": 1.0, "low": 2.0}
+
+
+def _parse_time(value):
+    # type: (Optional[str]) -> Optional[datetime]
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def upload_cadence_hours(entries):
+    # type: (List[Dict[str, str]]) -> Optional[float]
+    published = sorted(
+        filter(None, (_parse_time(e.get("published")) for e in entries)), reverse=True
+    )
+    gaps = [
+        (newer - older).total_seconds() / 3600.0
+        for newer, older in zip(published, published[1:])
+    ]
+    gaps = [g for g in gaps if g > 0]
+    return median(gaps) if gaps else None
+
+
+def poll_interval_hours(cadence_hours, priority):
+    # type: (float, str) -> float
+    polls_per_upload = float(get_pipeline_setting("scheduler", "polls_per_upload", 4))
+    factors = get_pipeline_setting("scheduler", "priority_factors", DEFAULT_PRIORITY_FACTORS)
+    factor = float(factors.get(priority or "medium", 1.0))
+    lo = float(get_pipeline_setting("scheduler", "min_interval_hours", 1))
+    hi = float(get_pipeline_setting("scheduler", "max_interval_hours", 48))
+    interval = cadence_hours / max(polls_per_upload, 1.0)
+    return min(max(interval * factor, lo), hi)
+
+
+def select_due_channels(channels, now=None, force=False):
+    # type: (List[Dict[str, Any]], Optional[datetime], bool) -> List[Dict[str, Any]]
+    if force or not get_pipeline_setting("scheduler", "enabled", True):
+        return list(channels)
+
+    now = now or datetime.utcnow()
+    schedules = get_channel_schedules()
+    due = []
+    for channel in channels:
+        next_due = _parse_time((schedules.get(channel["channel_id"]) or {}).get("next_due_at"))
+        if next_due is None or next_due <= now:
+            due.append(channel)
+
+    logger.info("%d of %d channels due for polling", len(due), len(channels))
+    return due
+
+
+def record_channel_poll(channel, entries, found_new, now=None):
+    # type: (Dict[str, Any], List[Dict[str, str]], bool, Optional[datetime]) -> datetime
+    now = now or datetime.utcnow()
+    previous = get_channel_schedule(channel["channel_id"]) or {}
+
+    cadence = upload_cadence_hours(entries)
+    if cadence is None:
+        cadence = previous.get("upload_interval_hours") or DEFAULT_CADENCE_HOURS
+
+    newest = max(
+        filter(None, (_parse_time(e.get("published")) for e in entries)), default=None
+    )
+    last_new = newest.isoformat() if found_new and newest else previous.get("last_new_video_at")
+
+    interval = poll_interval_hours(cadence, channel.get("priority", "medium"))
+    next_due = now + timedelta(hours=interval)
+    save_channel_schedule(
+        channel_id=channel["channel_id"],
+        last_polled_at=now.isoformat(),
+        last_new_video_at=last_new,
+        upload_interval_hours=cadence,
+        next_due_at=next_due.isoformat(),
+    )
+    return next_due
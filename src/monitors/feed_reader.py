@@ -0,0 +1,171 @@
+"""
+Incremental readers for YouTube channel feeds and channel pages.
+
+Feed bodies are read to the end (up to MAX_FEED_BYTES) so the keep-alive
+connection goes back to the pool and the content hash covers the whole
+document; parsing then stops as soon as it has the entries it needs, and
+is skipped entirely when the hash matches the cached one. Channel pages
+are read only until the channel_id appears.
+"""
+
+import hashlib
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from ..utils import http_client, scan_metrics
+from ..utils.logger import setup_logger
+
+logger = setup_logger("feed_reader")
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_YT = "{http://www.youtube.com/xml/schemas/2015}"
+
+CHANNEL_ID_RE = re.compile(r'channel_id=([^"&]+)')
+# Bytes kept between chunks so a channel_id split across chunks still matches.
+_RESOLVE_OVERLAP = 256
+# Feeds hold ~15 entries (tens of KB); anything far larger is not a feed.
+MAX_FEED_BYTES = 4 * 1024 * 1024
+
+
+@dataclass
+class FeedData:
+    title: str = ""
+    entries: List[Dict[str, str]] = field(default_factory=list)
+    complete: bool = True
+    content_hash: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Body hash matched known_hash, so entries were not parsed.
+    unchanged: bool = False
+
+
+def _parse_published(value):
+    # type: (str) -> Optional[datetime]
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    except (ValueError, AttributeError):
+        return None
+
+
+def _entry_dict(elem):
+    # type: (ET.Element) -> Optional[Dict[str, str]]
+    vid_id = elem.find(_YT + "videoId")
+    title = elem.find(_ATOM + "title")
+    published = elem.find(_ATOM + "published")
+    if vid_id is None or title is None:
+        return None
+    return {
+        "video_id": vid_id.text,
+        "title": title.text,
+        "published": published.text if published is not None else "",
+        "url": "https://www.youtube.com/watch?v=%s" % vid_id.text,
+    }
+
+
+def read_feed(chunks, cutoff=None, min_entries=0, max_entries=None):
+    # type: (Iterable[bytes], Optional[datetime], int, Optional[int]) -> FeedData
+    """Parse Atom entries from byte chunks, newest first.
+
+    Parsing stops after the first entry published before `cutoff` once at
+    least `min_entries` have been read, or once `max_entries` have been
+    read. Stopping early saves parse time only; fetch_feed has already
+    downloaded the whole body.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    feed = FeedData()
+    depth = 0
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                depth += 1
+                if (elem.tag == _ATOM + "entry" and max_entries is not None
+                        and len(feed.entries) >= max_entries):
+                    feed.complete = False
+                    return feed
+                continue
+
+            depth -= 1
+            if elem.tag == _ATOM + "title" and depth == 1:
+                feed.title = elem.text or ""
+            elif elem.tag == _ATOM + "entry":
+                entry = _entry_dict(elem)
+                elem.clear()
+                if entry is None:
+                    continue
+                feed.entries.append(entry)
+                published = _parse_published(entry["published"])
+                if (cutoff is not None and published is not None and published < cutoff
+                        and len(feed.entries) >= min_entries):
+                    feed.complete = False
+                    return feed
+
+    parser.close()
+    return feed
+
+
+def _read_body(resp, max_bytes):
+    # type: (http_client.HttpResponse, int) -> bytes
+    chunks = []  # type: List[bytes]
+    size = 0
+    for chunk in scan_metrics.counted(scan_metrics.FEEDS, resp.iter_chunks()):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ValueError("feed body larger than %d bytes" % max_bytes)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def fetch_feed(url, headers=None, timeout=15, cutoff=None, min_entries=0, max_entries=None,
+               known_hash=None, max_bytes=MAX_FEED_BYTES):
+    # type: (str, Optional[Dict[str, str]], float, Optional[datetime], int, Optional[int], Optional[str], int) -> Optional[FeedData]
+    """GET a feed and parse its entries. Returns None on 304 Not Modified.
+
+    The whole body is always downloaded; `cutoff` and `max_entries` only
+    limit how much of it is parsed. When the body's sha256 equals
+    `known_hash` the result has unchanged=True and no entries.
+    """
+    with http_client.get(url, headers=headers, timeout=timeout) as resp:
+        if resp.status == 304:
+            resp.read()
+            return None
+        if resp.status != 200:
+            raise http_client.HttpError(resp.status, resp.reason, resp.read(4096))
+        body = _read_body(resp, max_bytes)
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+
+    content_hash = hashlib.sha256(body).hexdigest()
+    if known_hash is not None and known_hash == content_hash:
+        feed = FeedData(unchanged=True)
+    else:
+        size = http_client.CHUNK_SIZE
+        feed = read_feed((body[i:i + size] for i in range(0, len(body), size)), cutoff=cutoff,
+                         min_entries=min_entries, max_entries=max_entries)
+    feed.content_hash = content_hash
+    feed.etag = etag
+    feed.last_modified = last_modified
+    return feed
+
+
+def resolve_channel_id(handle, timeout=10):
+    # type: (str, float) -> Optional[str]
+    """Read a channel page only until its channel_id appears."""
+    url = "https://www.youtube.com/%s" % handle
+    with http_client.get(url, timeout=timeout) as resp:
+        if resp.status != 200:
+            raise http_client.HttpError(resp.status, resp.reason)
+        tail = ""
+        for chunk in resp.iter_chunks():
+            text = tail + chunk.decode("utf-8", errors="replace")
+            match = CHANNEL_ID_RE.search(text)
+            # A match touching the end of the buffer may continue in the next chunk.
+            if match and match.end() < len(text):
+                return match.group(1)
+            tail = text[-_RESOLVE_OVERLAP:]
+        match = CHANNEL_ID_RE.search(tail)
+        return match.group(1) if match else None
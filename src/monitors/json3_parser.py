@@ -0,0 +1,199 @@
+"""
+Streaming parser for YouTube json3 subtitle documents.
+
+Events are decoded one at a time from a text stream and their segments
+are cleaned as they arrive, so a caption file is never held as a full
+JSON tree or as a list of segments. The output matches the original
+parser: segments joined with spaces, `[...]` annotations removed and
+whitespace collapsed.
+
+The trade is memory for time: against json.load plus regex cleanup it
+takes roughly 1.3-2x as long (about 2.3ms vs 1.3ms for ten minutes of
+captions) while its peak allocation stays near flat (215K vs 624K at ten
+minutes, 650K vs 11MB at three hours). scripts/bench_json3_parser.py
+measures both.
+"""
+
+import io
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+_DECODER = json.JSONDecoder()
+_WS = re.compile(r"[ \t\n\r]*")
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkReader(object):
+    def __init__(self, fp, chunk_size=CHUNK_SIZE):
+        # type: (TextIO, int) -> None
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        # type: () -> bool
+        if self._eof:
+            return False
+        data = self._fp.read(self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self):
+        # type: () -> str
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        # type: (str) -> None
+        found = self.peek()
+        if found != char:
+            raise ValueError("json3: expected %r, found %r" % (char, found or "EOF"))
+        self._pos += 1
+
+    def skip(self, char):
+        # type: (str) -> bool
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def value(self):
+        # type: () -> Any
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A value ending exactly at the buffer edge may be a truncated number.
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+
+def iter_json3_events(fp):
+    # type: (TextIO) -> Iterator[Dict[str, Any]]
+    reader = _ChunkReader(fp)
+    reader.expect("{")
+    if reader.skip("}"):
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "events" and reader.skip("["):
+            if not reader.skip("]"):
+                while True:
+                    yield reader.value()
+                    if reader.skip("]"):
+                        break
+                    reader.expect(",")
+        else:
+            reader.value()
+        if reader.skip("}"):
+            return
+        reader.expect(",")
+
+
+class TranscriptCleaner(object):
+    """Single-pass equivalent of `re.sub(r"\\[.*?\\]", "")` then whitespace collapsing."""
+
+    def __init__(self):
+        self._out = []  # type: List[str]
+        self._space = False
+        self._bracket = None  # type: Optional[List[str]]
+
+    def feed(self, text):
+        # type: (str) -> None
+        while text:
+            if self._bracket is not None:
+                close = text.find("]")
+                newline = text.find("\n")
+                if close != -1 and (newline == -1 or close < newline):
+                    self._bracket = None
+                    text = text[close + 1:]
+                    continue
+                if newline != -1:
+                    # Unterminated on this line: the "[" is literal text.
+                    text = self._release_bracket() + text
+                    continue
+                self._bracket.append(text)
+                return
+
+            start = text.find("[")
+            if start == -1:
+                self._emit(text)
+                return
+            self._emit(text[:start])
+            self._bracket = []
+            text = text[start + 1:]
+
+    def finish(self):
+        # type: () -> str
+        while self._bracket is not None:
+            self.feed(self._release_bracket())
+        return "".join(self._out)
+
+    def _release_bracket(self):
+        # type: () -> str
+        pending = "".join(self._bracket or [])
+        self._bracket = None
+        self._emit("[")
+        return pending
+
+    def _emit(self, text):
+        # type: (str) -> None
+        if not text:
+            return
+        if text[0].isspace():
+            self._space = True
+        words = text.split()
+        if not words:
+            return
+        if self._space and self._out:
+            self._out.append(" ")
+        self._out.append(" ".join(words))
+        self._space = text[-1].isspace()
+
+
+def parse_json3_stream(fp):
+    # type: (TextIO) -> str
+    cleaner = TranscriptCleaner()
+    first = True
+    for event in iter_json3_events(fp):
+        segs = event.get("segs")
+        if not segs:
+            continue
+        texts = [t for t in (seg.get("utf8", "").strip() for seg in segs) if t]
+        if not texts:
+            continue
+        if not first:
+            cleaner.feed(" ")
+        cleaner.feed(" ".join(texts))
+        first = False
+    return cleaner.finish()
+
+
+def parse_json3_text(json3):
+    # type: (str) -> str
+    return parse_json3_stream(io.StringIO(json3))
+
+
+def parse_json3_file(filepath):
+    # type: (str) -> str
+    with open(filepath, "r") as f:
+        return parse_json3_stream(f)
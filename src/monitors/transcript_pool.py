@@ -0,0 +1,174 @@
+"""
+Bounded worker pool for transcript extraction.
+
+Jobs are queued and picked up by a fixed number of worker threads, so at
+most `workers` yt-dlp processes run at once no matter how many videos a
+scan turns up.
+"""
+
+import queue
+import subprocess
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger("transcript_pool")
+
+STATUS_PENDING = "pending"
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_NO_SUBS = "no_subs"
+STATUS_ERROR = "error"
+STATUS_CANCELLED = "cancelled"
+
+# fetch(video_id, timeout, on_process) -> (status, transcript)
+FetchFn = Callable[[str, float, Callable[[subprocess.Popen], None]], Tuple[str, Optional[str]]]
+
+_STOP = object()
+
+
+@dataclass
+class TranscriptJob:
+    video_id: str
+    status: str = STATUS_PENDING
+    transcript: Optional[str] = None
+    elapsed: float = 0.0
+    error: str = ""
+
+    def __post_init__(self):
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        # type: (Optional[float]) -> bool
+        return self._done.wait(timeout)
+
+    @property
+    def done(self):
+        # type: () -> bool
+        return self._done.is_set()
+
+
+class TranscriptPool(object):
+    def __init__(self, fetch, workers=4, timeout=60, queue_size=0):
+        # type: (FetchFn, int, float, int) -> None
+        self._fetch = fetch
+        self._workers = max(1, int(workers))
+        self._timeout = timeout
+        self._queue = queue.Queue(maxsize=queue_size)  # type: queue.Queue
+        self._jobs = []  # type: List[TranscriptJob]
+        self._threads = []  # type: List[threading.Thread]
+        self._running = {}  # type: Dict[int, subprocess.Popen]
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.cancel()
+        self.join()
+        return False
+
+    def start(self):
+        # type: () -> None
+        for i in range(self._workers):
+            t = threading.Thread(
+                target=self._worker, name="transcript-%d" % i, daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, video_id):
+        # type: (str) -> TranscriptJob
+        job = TranscriptJob(video_id=video_id)
+        with self._lock:
+            self._jobs.append(job)
+        if self._cancelled.is_set():
+            self._finish(job, STATUS_CANCELLED)
+        else:
+            self._queue.put(job)
+        return job
+
+    def cancel(self):
+        # type: () -> None
+        """Drop queued jobs and kill any yt-dlp process still running."""
+        self._cancelled.set()
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP:
+                self._finish(job, STATUS_CANCELLED)
+        with self._lock:
+            running = list(self._running.values())
+        for proc in running:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+    def join(self):
+        # type: () -> List[TranscriptJob]
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        return list(self._jobs)
+
+    def summary(self):
+        # type: () -> Dict[str, int]
+        with self._lock:
+            counts = Counter(job.status for job in self._jobs)
+        return {
+            "total": sum(counts.values()),
+            STATUS_OK: counts[STATUS_OK],
+            STATUS_TIMEOUT: counts[STATUS_TIMEOUT],
+            STATUS_NO_SUBS: counts[STATUS_NO_SUBS],
+            STATUS_ERROR: counts[STATUS_ERROR],
+            STATUS_CANCELLED: counts[STATUS_CANCELLED],
+        }
+
+    def _worker(self):
+        # type: () -> None
+        ident = threading.get_ident()
+
+        def on_process(proc):
+            with self._lock:
+                self._running[ident] = proc
+
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            if self._cancelled.is_set():
+                self._finish(job, STATUS_CANCELLED)
+                continue
+
+            start = time.monotonic()
+            try:
+                status, transcript = self._fetch(job.video_id, self._timeout, on_process)
+            except Exception as e:
+                status, transcript = STATUS_ERROR, None
+                job.error = str(e) or e.__class__.__name__
+            finally:
+                with self._lock:
+                    self._running.pop(ident, None)
+            job.elapsed = time.monotonic() - start
+
+            if self._cancelled.is_set() and status != STATUS_OK:
+                status = STATUS_CANCELLED
+            job.transcript = transcript
+            self._finish(job, status)
+
+    def _finish(self, job, status):
+        # type: (TranscriptJob, str) -> None
+        job.status = status
+        job._done.set()
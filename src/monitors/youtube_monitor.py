@@ -1,27 +1,46 @@
-import json
 import os
 import re
 import subprocess
 import tempfile
-import xml.etree.ElementTree as ET
-import urllib.request
-from dataclasses import dataclass, field, asdict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields, asdict
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
-
-from ..utils.config import load_sources, get_youtube_channels, get_filter_keywords, DATA_DIR
-from ..utils.database import get_processed_video_ids, add_processed_video_id, set_last_scan_time
+from typing import Any, Callable, List, Optional, Dict, Set, Tuple, Union
+
+from ..utils.config import (
+    load_sources, get_youtube_channels, get_filter_keywords,
+    get_exclude_keywords, get_pipeline_setting, DATA_DIR,
+)
+from ..utils.database import (
+    filter_processed_video_ids, add_processed_video_ids, set_last_scan_time,
+    get_feed_cache, save_feed_cache, touch_feed_cache,
+    get_cached_transcript, store_transcript, evict_transcripts,
+)
 from ..utils.logger import setup_logger
+from ..utils.scan_metrics import DB, FEEDS, TRANSCRIPTS, add_bytes, track
+from .channel_scheduler import select_due_channels, record_channel_poll
+from .feed_reader import fetch_feed
+from .json3_parser import parse_json3_file, parse_json3_text
+from .ytdlp_service import get_ytdlp_service
+from .transcript_pool import (
+    TranscriptPool, STATUS_OK, STATUS_TIMEOUT, STATUS_NO_SUBS,
+    STATUS_ERROR, STATUS_CANCELLED,
+)
 
 logger = setup_logger("youtube_monitor")
 
-YTDLP_PATH = "/opt/homebrew/bin/yt-dlp"
-RSS_TEMPLATE = "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
-ATOM_NS = {
-    "atom": "http://www.w3.org/2005/Atom",
-    "yt": "http://www.youtube.com/xml/schemas/2015",
-    "media": "http://search.yahoo.com/mrss/",
-}
+YTDLP_PATH = os.environ.get("AI_YTDLP_PATH") or "/opt/homebrew/bin/yt-dlp"
+RELEVANCE_TRANSCRIPT = "transcript"
+RELEVANCE_TITLE_FIRST = "title_first"
+RELEVANCE_TITLE_ONLY = "title_only"
+
+RSS_TEMPLATE = (
+    os.environ.get("AI_RSS_TEMPLATE")
+    or "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+)
+# Entries always read from a feed, even past the cutoff, for cadence estimates.
+FEED_MIN_ENTRIES = 5
 
 
 @dataclass
@@ -36,39 +55,196 @@ class VideoInfo:
     is_relevant: bool = False
 
 
-def fetch_channel_feed(channel_id):
-    # type: (str) -> List[Dict[str, str]]
-    feed_url = RSS_TEMPLATE.format(channel_id=channel_id)
-    req = urllib.request.Request(feed_url, headers={"User-Agent": "Mozilla/5.0"})
+_VIDEO_FIELDS = set(f.name for f in fields(VideoInfo))
+
+
+def video_record(video):
+    # type: (VideoInfo) -> Dict[str, Any]
+    """VideoInfo as a JSON-safe dict, without the transcript."""
+    record = asdict(video)
+    record.pop("transcript", None)
+    return record
+
+
+def video_from_record(record):
+    # type: (Dict[str, Any]) -> VideoInfo
+    return VideoInfo(**dict((k, v) for k, v in record.items() if k in _VIDEO_FIELDS))
+
+
+@dataclass
+class FeedResult:
+    channel_name: str
+    channel_id: str
+    entries: List[Dict[str, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: str = ""
+    cache_status: str = ""
+
 
+def fetch_channel_feed(channel_id, timeout=15, use_cache=True, cutoff=None):
+    # type: (str, float, bool, Optional[datetime]) -> List[Dict[str, str]]
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            xml_data = resp.read().decode("utf-8")
+        entries, _ = _download_feed(channel_id, timeout, use_cache, cutoff)
+        return entries
     except Exception as e:
         logger.error("Failed to fetch feed for %s: %s", channel_id, e)
         return []
 
-    root = ET.fromstring(xml_data)
-    entries = []
 
-    for entry in root.findall("atom:entry", ATOM_NS):
-        vid_id = entry.find("yt:videoId", ATOM_NS)
-        title = entry.find("atom:title", ATOM_NS)
-        published = entry.find("atom:published", ATOM_NS)
+def _download_feed(channel_id, timeout, use_cache=True, cutoff=None):
+    # type: (str, float, bool, Optional[datetime]) -> Tuple[List[Dict[str, str]], str]
+    """Return (entries, cache_status); status is "miss", "not-modified" or "unchanged".
 
-        if vid_id is not None and title is not None:
-            entries.append({
-                "video_id": vid_id.text,
-                "title": title.text,
-                "published": published.text if published is not None else "",
-                "url": "https://www.youtube.com/watch?v=%s" % vid_id.text,
-            })
-
-    return entries
+    With a cutoff, parsing stops at the first entry older than it once
+    FEED_MIN_ENTRIES have been read (enough for the upload cadence). The
+    cached entries are only reused when they were cut no later than this
+    cutoff, so a wider days_back refetches and reparses the feed.
+    """
+    feed_url = RSS_TEMPLATE.format(channel_id=channel_id)
+    headers = {}
+
+    cached = get_feed_cache(channel_id) if use_cache else None
+    if cached and not _cache_covers(cached, cutoff):
+        cached = None
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    feed = fetch_feed(feed_url, headers=headers, timeout=timeout,
+                      cutoff=cutoff, min_entries=FEED_MIN_ENTRIES,
+                      known_hash=cached.get("content_hash") if cached else None)
+    if feed is None:
+        if not cached:
+            raise RuntimeError("304 Not Modified without a cached feed")
+        touch_feed_cache(channel_id)
+        return cached["entries"], "not-modified"
+
+    if feed.unchanged:
+        touch_feed_cache(channel_id, feed.etag, feed.last_modified)
+        return cached["entries"], "unchanged"
+
+    if use_cache:
+        entries_cutoff = None if feed.complete or cutoff is None else cutoff.isoformat()
+        save_feed_cache(channel_id, feed.etag, feed.last_modified,
+                        feed.content_hash, feed.entries, entries_cutoff)
+    return feed.entries, "miss"
+
+
+def _cache_covers(cached, cutoff):
+    # type: (Dict[str, Any], Optional[datetime]) -> bool
+    """Whether cached entries include everything published after `cutoff`."""
+    if not cached.get("entries_cutoff"):
+        return True
+    if cutoff is None:
+        return False
+    return datetime.fromisoformat(cached["entries_cutoff"]) <= cutoff
+
+
+def _fetch_one_feed(channel, timeout, cutoff=None):
+    # type: (Dict[str, Any], float, Optional[datetime]) -> FeedResult
+    result = FeedResult(channel_name=channel["name"], channel_id=channel["channel_id"])
+    start = time.monotonic()
+    with track(FEEDS) as op:
+        try:
+            result.entries, result.cache_status = _download_feed(
+                result.channel_id, timeout, cutoff=cutoff
+            )
+        except Exception as e:
+            result.error = str(e) or e.__class__.__name__
+            op.failed = True
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def fetch_channel_feeds(channels, concurrency=None, timeout=None, cutoff=None):
+    # type: (List[Dict[str, Any]], Optional[int], Optional[float], Optional[datetime]) -> List[FeedResult]
+    """Fetch every channel feed, up to `concurrency` at a time, preserving channel order."""
+    if concurrency is None:
+        concurrency = get_pipeline_setting("monitor", "feed_concurrency", 8)
+    if timeout is None:
+        timeout = get_pipeline_setting("monitor", "feed_timeout", 15)
+    concurrency = max(1, min(int(concurrency), len(channels) or 1))
+
+    start = time.monotonic()
+    if concurrency == 1:
+        results = [_fetch_one_feed(ch, timeout, cutoff) for ch in channels]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency,
+                                thread_name_prefix="feed") as pool:
+            results = list(pool.map(lambda ch: _fetch_one_feed(ch, timeout, cutoff), channels))
+
+    for r in results:
+        if r.error:
+            logger.error("Failed to fetch feed for %s (%s) after %.2fs: %s",
+                         r.channel_name, r.channel_id, r.elapsed, r.error)
+        else:
+            logger.info("Fetched feed for %s: %d entries in %.2fs (%s)",
+                        r.channel_name, len(r.entries), r.elapsed, r.cache_status)
+
+    failed = sum(1 for r in results if r.error)
+    cached = sum(1 for r in results if r.cache_status in ("not-modified", "unchanged"))
+    slowest = max(results, key=lambda r: r.elapsed) if results else None
+    logger.info(
+        "Fetched %d feeds in %.2fs (concurrency=%d, %d unchanged, %d failed, slowest: %s %.2fs)",
+        len(results), time.monotonic() - start, concurrency, cached, failed,
+        slowest.channel_name if slowest else "-",
+        slowest.elapsed if slowest else 0.0,
+    )
+    return results
 
 
 def extract_transcript(video_id):
     # type: (str) -> Optional[str]
+    _, transcript = fetch_transcript(video_id)
+    return transcript
+
+
+def fetch_transcript(video_id, timeout=60, on_process=None):
+    # type: (str, float, Optional[Callable[[subprocess.Popen], None]]) -> Tuple[str, Optional[str]]
+    """Fetch one video's transcript and return (status, transcript).
+
+    Reads the transcript store first, then uses the warm yt-dlp service
+    when available and falls back to a one-shot yt-dlp process otherwise.
+    """
+    use_store = get_pipeline_setting("transcripts", "cache", True)
+    if use_store:
+        cached = get_cached_transcript(video_id)
+        if cached is not None:
+            return STATUS_OK, cached
+
+    with track(TRANSCRIPTS) as op:
+        status, transcript = _download_transcript(video_id, timeout, on_process)
+        op.failed = status in (STATUS_TIMEOUT, STATUS_ERROR)
+    if use_store and status == STATUS_OK and transcript:
+        store_transcript(video_id, transcript)
+    return status, transcript
+
+
+def _download_transcript(video_id, timeout, on_process=None):
+    # type: (str, float, Optional[Callable[[subprocess.Popen], None]]) -> Tuple[str, Optional[str]]
+    service = get_ytdlp_service()
+    if service is not None:
+        try:
+            status, json3 = service.fetch(video_id, timeout, on_process)
+        except RuntimeError as e:
+            logger.warning("Warm yt-dlp service unavailable, using CLI: %s", e)
+        else:
+            if status == STATUS_NO_SUBS:
+                logger.warning("No transcript for %s (no English subs?)", video_id)
+            elif status == STATUS_TIMEOUT:
+                logger.warning("Transcript extraction timed out for %s", video_id)
+            if status != STATUS_OK or json3 is None:
+                return status, None
+            add_bytes(TRANSCRIPTS, len(json3))
+            return STATUS_OK, parse_json3_text(json3)
+
+    return _fetch_transcript_cli(video_id, timeout, on_process)
+
+
+def _fetch_transcript_cli(video_id, timeout, on_process=None):
+    # type: (str, float, Optional[Callable[[subprocess.Popen], None]]) -> Tuple[str, Optional[str]]
     with tempfile.TemporaryDirectory() as tmpdir:
         output_template = os.path.join(tmpdir, "transcript")
         cmd = [
@@ -83,114 +259,251 @@ def extract_transcript(video_id):
         ]
 
         try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=60
+            proc = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
             )
+        except OSError as e:
+            logger.error("Could not start yt-dlp for %s: %s", video_id, e)
+            return STATUS_ERROR, None
+
+        if on_process is not None:
+            on_process(proc)
+
+        try:
+            proc.communicate(timeout=timeout)
         except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
             logger.warning("Transcript extraction timed out for %s", video_id)
-            return None
+            return STATUS_TIMEOUT, None
 
         # Find the output file
         json3_path = os.path.join(tmpdir, "transcript.en.json3")
         if not os.path.exists(json3_path):
             logger.warning("No transcript file for %s (no English subs?)", video_id)
-            return None
+            return STATUS_NO_SUBS, None
 
-        return _parse_json3_transcript(json3_path)
+        add_bytes(TRANSCRIPTS, os.path.getsize(json3_path))
+        return STATUS_OK, _parse_json3_transcript(json3_path)
 
 
 def _parse_json3_transcript(filepath):
     # type: (str) -> str
-    with open(filepath, "r") as f:
-        data = json.load(f)
+    return parse_json3_file(filepath)
+
+
+class KeywordMatcher(object):
+    """Case-insensitive substring match against many keywords with one compiled regex."""
+
+    def __init__(self, keywords):
+        # type: (List[str]) -> None
+        lowered = sorted({kw.lower() for kw in keywords if kw}, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(kw) for kw in lowered)) if lowered else None
 
-    segments = []
-    for event in data.get("events", []):
-        for seg in event.get("segs", []):
-            text = seg.get("utf8", "").strip()
-            if text and text != "\n":
-                segments.append(text)
+    def __bool__(self):
+        # type: () -> bool
+        return self._pattern is not None
 
-    raw_text = " ".join(segments)
-    raw_text = re.sub(r"\[.*?\]", "", raw_text)
-    raw_text = re.sub(r"\s+", " ", raw_text).strip()
-    return raw_text
+    def search(self, text):
+        # type: (str) -> bool
+        """Match against text that is already lowercased."""
+        return self._pattern is not None and self._pattern.search(text) is not None
+
+    def matches(self, text):
+        # type: (str) -> bool
+        return self.search(text.lower())
 
 
 def is_relevant(title, transcript, keywords):
-    # type: (str, str, List[str]) -> bool
+    # type: (str, str, Union[List[str], KeywordMatcher]) -> bool
+    matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
     title_lower = title.lower()
     transcript_prefix = transcript[:500].lower() if transcript else ""
-    combined = title_lower + " " + transcript_prefix
+    return matcher.search(title_lower + " " + transcript_prefix)
 
-    for kw in keywords:
-        if kw.lower() in combined:
-            return True
-    return False
 
+def classify_title(title, matcher, exclude_matcher=None, mode=RELEVANCE_TRANSCRIPT):
+    # type: (str, KeywordMatcher, Optional[KeywordMatcher], str) -> Optional[bool]
+    """Decide relevance from the title alone, or None when the transcript is needed."""
+    if mode == RELEVANCE_TRANSCRIPT:
+        return None
+    if exclude_matcher and exclude_matcher.matches(title):
+        return False
+    if matcher.matches(title):
+        return True
+    return False if mode == RELEVANCE_TITLE_ONLY else None
+
+
+class RelevanceFilter(object):
+    """Keyword relevance from the title where relevance_mode allows, else the transcript."""
+
+    def __init__(self, mode=None):
+        # type: (Optional[str]) -> None
+        self.matcher = KeywordMatcher(get_filter_keywords())
+        self.exclude_matcher = KeywordMatcher(get_exclude_keywords())
+        self.mode = mode or get_pipeline_setting("monitor", "relevance_mode", RELEVANCE_TRANSCRIPT)
+
+    def from_title(self, video):
+        # type: (VideoInfo) -> Optional[bool]
+        return classify_title(video.title, self.matcher, self.exclude_matcher, self.mode)
+
+    def from_transcript(self, video):
+        # type: (VideoInfo) -> bool
+        return is_relevant(video.title, video.transcript, self.matcher)
 
-def check_for_new_videos(days_back=7, max_per_channel=3):
-    # type: (int, int) -> List[VideoInfo]
-    channels = get_youtube_channels()
-    keywords = get_filter_keywords()
-    processed_ids = get_processed_video_ids()
-    cutoff = datetime.utcnow() - timedelta(days=days_back)
 
-    new_videos = []
+def new_videos_from_feed(feed, processed_ids, cutoff, max_per_channel, channel=None):
+    # type: (FeedResult, Set[str], datetime, int, Optional[Dict[str, Any]]) -> List[VideoInfo]
+    """Unprocessed videos in a feed, newest first; adds their IDs to processed_ids.
 
-    for channel in channels:
-        ch_name = channel["name"]
-        ch_id = channel["channel_id"]
-        logger.info("Checking channel: %s (%s)", ch_name, ch_id)
+    With `channel`, a successful poll is also recorded for the scheduler.
+    """
+    logger.info("Checking channel: %s (%s)", feed.channel_name, feed.channel_id)
+    videos = []  # type: List[VideoInfo]
 
-        entries = fetch_channel_feed(ch_id)
-        count = 0
+    for entry in feed.entries:
+        vid_id = entry["video_id"]
 
-        for entry in entries:
-            vid_id = entry["video_id"]
+        if vid_id in processed_ids:
+            continue
 
-            if vid_id in processed_ids:
+        # Skip if too old
+        try:
+            pub_str = entry["published"].replace("Z", "+00:00")
+            pub_date = datetime.fromisoformat(pub_str).replace(tzinfo=None)
+            if pub_date < cutoff:
                 continue
+        except (ValueError, AttributeError):
+            pass
+
+        if len(videos) >= max_per_channel:
+            break
+
+        videos.append(VideoInfo(
+            video_id=vid_id,
+            title=entry["title"],
+            channel_name=feed.channel_name,
+            channel_id=feed.channel_id,
+            published=entry["published"],
+            url=entry["url"],
+        ))
+        processed_ids.add(vid_id)
+
+    if channel is not None and not feed.error:
+        record_channel_poll(channel, feed.entries, found_new=bool(videos))
+    return videos
+
+
+def poll_channel(channel, cutoff, max_per_channel, timeout=None):
+    # type: (Dict[str, Any], datetime, int, Optional[float]) -> List[VideoInfo]
+    """Fetch one channel's feed and return its new videos."""
+    if timeout is None:
+        timeout = get_pipeline_setting("monitor", "feed_timeout", 15)
+    feed = _fetch_one_feed(channel, timeout, cutoff)
+    if feed.error:
+        logger.error("Failed to fetch feed for %s (%s) after %.2fs: %s",
+                     feed.channel_name, feed.channel_id, feed.elapsed, feed.error)
+    else:
+        logger.info("Fetched feed for %s: %d entries in %.2fs (%s)",
+                    feed.channel_name, len(feed.entries), feed.elapsed, feed.cache_status)
+    with track(DB):
+        processed_ids = filter_processed_video_ids(e["video_id"] for e in feed.entries)
+    return new_videos_from_feed(feed, processed_ids, cutoff, max_per_channel, channel)
+
+
+def check_for_new_videos(days_back=7, max_per_channel=3, feed_concurrency=None,
+                         transcript_workers=None, all_channels=False):
+    # type: (int, int, Optional[int], Optional[int], bool) -> List[VideoInfo]
+    configured = get_youtube_channels()
+    channels = select_due_channels(configured, force=all_channels)
+    relevance = RelevanceFilter()
+    cutoff = datetime.utcnow() - timedelta(days=days_back)
 
-            # Skip if too old
-            try:
-                pub_str = entry["published"].replace("Z", "+00:00")
-                pub_date = datetime.fromisoformat(pub_str).replace(tzinfo=None)
-                if pub_date < cutoff:
-                    continue
-            except (ValueError, AttributeError):
-                pass
-
-            if count >= max_per_channel:
-                break
-
-            logger.info("  Extracting transcript: %s", entry["title"])
-            transcript = extract_transcript(vid_id) or ""
-
-            relevant = is_relevant(entry["title"], transcript, keywords)
-
-            video = VideoInfo(
-                video_id=vid_id,
-                title=entry["title"],
-                channel_name=ch_name,
-                channel_id=ch_id,
-                published=entry["published"],
-                url=entry["url"],
-                transcript=transcript,
-                is_relevant=relevant,
-            )
+    feeds = fetch_channel_feeds(channels, concurrency=feed_concurrency, cutoff=cutoff)
+    processed_ids = filter_processed_video_ids(
+        entry["video_id"] for feed in feeds for entry in feed.entries
+    )
+
+    channels_by_id = {ch["channel_id"]: ch for ch in channels}
+    new_videos = []  # type: List[VideoInfo]
+    for feed in feeds:
+        new_videos.extend(new_videos_from_feed(
+            feed, processed_ids, cutoff, max_per_channel, channels_by_id[feed.channel_id]
+        ))
+
+    # Titles that settle relevance go first; undecided videos follow and
+    # title-rejected ones never reach yt-dlp.
+    decided = {}  # type: Dict[str, Optional[bool]]
+    for video in new_videos:
+        decided[video.video_id] = relevance.from_title(video)
+    to_fetch = (
+        [v for v in new_videos if decided[v.video_id] is True]
+        + [v for v in new_videos if decided[v.video_id] is None]
+    )
+    skipped = len(new_videos) - len(to_fetch)
+    if skipped:
+        logger.info("Skipping transcripts for %d videos rejected by title", skipped)
 
-            new_videos.append(video)
-            add_processed_video_id(vid_id)
-            processed_ids.add(vid_id)
-            count += 1
+    extract_transcripts(to_fetch, workers=transcript_workers)
+
+    for video in new_videos:
+        verdict = decided[video.video_id]
+        if verdict is None:
+            verdict = relevance.from_transcript(video)
+        video.is_relevant = verdict
+
+    # Videos headed for analysis are marked by the pipeline once their
+    # analysis finishes (or is recorded in a batch), so failures are retried.
+    add_processed_video_ids(v.video_id for v in new_videos
+                            if not (v.is_relevant and v.transcript))
 
     set_last_scan_time(datetime.utcnow().isoformat())
 
     relevant_count = sum(1 for v in new_videos if v.is_relevant)
     logger.info(
-        "Found %d new videos (%d relevant) across %d channels",
-        len(new_videos), relevant_count, len(channels)
+        "Found %d new videos (%d relevant) across %d of %d channels",
+        len(new_videos), relevant_count, len(channels), len(configured)
     )
 
     return new_videos
+
+
+def evict_transcript_store():
+    # type: () -> None
+    if get_pipeline_setting("transcripts", "cache", True):
+        evict_transcripts(int(get_pipeline_setting("transcripts", "cache_max_mb", 512)) * 1024 * 1024)
+
+
+def extract_transcripts(videos, workers=None, timeout=None):
+    # type: (List[VideoInfo], Optional[int], Optional[float]) -> Dict[str, int]
+    """Fill in `transcript` for each video using a bounded pool of yt-dlp workers."""
+    if not videos:
+        return {}
+    if workers is None:
+        workers = get_pipeline_setting("transcripts", "workers", 4)
+    if timeout is None:
+        timeout = get_pipeline_setting("transcripts", "timeout", 60)
+
+    start = time.monotonic()
+    with TranscriptPool(fetch_transcript, workers=min(workers, len(videos)),
+                        timeout=timeout) as pool:
+        jobs = []
+        for video in videos:
+            logger.info("  Extracting transcript: %s", video.title)
+            jobs.append((video, pool.submit(video.video_id)))
+
+        for video, job in jobs:
+            job.wait()
+            video.transcript = job.transcript or ""
+
+    evict_transcript_store()
+
+    summary = pool.summary()
+    logger.info(
+        "Transcripts: %d ok, %d timed out, %d without subtitles, %d failed, "
+        "%d cancelled in %.2fs (workers=%d)",
+        summary[STATUS_OK], summary[STATUS_TIMEOUT], summary[STATUS_NO_SUBS],
+        summary[STATUS_ERROR], summary[STATUS_CANCELLED],
+        time.monotonic() - start, workers,
+    )
+    return summary
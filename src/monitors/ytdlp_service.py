@@ -0,0 +1,234 @@
+"""
+Long-lived yt-dlp extraction workers.
+
+Each worker is a Python process that imports yt_dlp once and then serves
+subtitle requests over stdin/stdout as JSON lines, returning the json3
+document in memory instead of writing it to a temp directory.
+
+Run directly (`python -m src.monitors.ytdlp_service`) to start a worker.
+"""
+
+import atexit
+import json
+import os
+import selectors
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from ..utils.config import get_pipeline_setting
+from ..utils.logger import setup_logger
+from .transcript_pool import STATUS_OK, STATUS_TIMEOUT, STATUS_NO_SUBS, STATUS_ERROR
+
+logger = setup_logger("ytdlp_service")
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+STARTUP_TIMEOUT = 30
+
+YDL_OPTIONS = {
+    "skip_download": True,
+    "writeautomaticsub": True,
+    "subtitleslangs": ["en"],
+    "subtitlesformat": "json3",
+    "quiet": True,
+    "no_warnings": True,
+    "noprogress": True,
+}
+
+
+# ─── Worker side ──────────────────────────────────────────────────
+
+def _fetch_json3(ydl, video_id):
+    # type: (object, str) -> Tuple[str, Optional[str]]
+    info = ydl.extract_info(
+        "https://www.youtube.com/watch?v=%s" % video_id, download=False
+    )
+    tracks = (info.get("automatic_captions") or {}).get("en") or []
+    for track in tracks:
+        if track.get("ext") == "json3" and track.get("url"):
+            with ydl.urlopen(track["url"]) as resp:
+                return STATUS_OK, resp.read().decode("utf-8")
+    return STATUS_NO_SUBS, None
+
+
+def _write(message):
+    # type: (dict) -> None
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def worker_main():
+    # type: () -> None
+    try:
+        import yt_dlp
+    except ImportError as e:
+        _write({"ready": False, "error": str(e)})
+        return
+
+    ydl = yt_dlp.YoutubeDL(dict(YDL_OPTIONS))
+    _write({"ready": True, "version": yt_dlp.version.__version__})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        video_id = json.loads(line).get("video_id", "")
+        try:
+            status, json3 = _fetch_json3(ydl, video_id)
+            _write({"video_id": video_id, "status": status, "json3": json3})
+        except Exception as e:
+            _write({"video_id": video_id, "status": STATUS_ERROR, "error": str(e)})
+
+
+# ─── Parent side ──────────────────────────────────────────────────
+
+class _Worker(object):
+    def __init__(self, python):
+        # type: (str) -> None
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            p for p in (str(PACKAGE_ROOT), env.get("PYTHONPATH", "")) if p
+        )
+        self.proc = subprocess.Popen(
+            [python, "-m", "src.monitors.ytdlp_service"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            cwd=str(PACKAGE_ROOT),
+        )
+        self._buffer = b""
+        hello = self.read_message(STARTUP_TIMEOUT)
+        if not hello or not hello.get("ready"):
+            self.close()
+            raise RuntimeError(
+                "yt-dlp worker failed to start: %s"
+                % ((hello or {}).get("error") or "no handshake")
+            )
+
+    @property
+    def alive(self):
+        # type: () -> bool
+        return self.proc.poll() is None
+
+    def read_message(self, timeout):
+        # type: (float) -> Optional[dict]
+        deadline = time.monotonic() + timeout
+        fd = self.proc.stdout.fileno()
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            while b"\n" not in self._buffer:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not sel.select(remaining):
+                    return None
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    return None
+                self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line.decode("utf-8"))
+
+    def request(self, video_id, timeout):
+        # type: (str, float) -> Tuple[str, Optional[str]]
+        self.proc.stdin.write((json.dumps({"video_id": video_id}) + "\n").encode("utf-8"))
+        self.proc.stdin.flush()
+        reply = self.read_message(timeout)
+        if reply is None:
+            status = STATUS_TIMEOUT if self.alive else STATUS_ERROR
+            self.close()
+            return status, None
+        return reply.get("status", STATUS_ERROR), reply.get("json3")
+
+    def close(self):
+        # type: () -> None
+        if self.alive:
+            self.proc.kill()
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class YtdlpService(object):
+    """Pool of warm yt-dlp workers, grown on demand and reused across videos."""
+
+    def __init__(self, python=None):
+        # type: (Optional[str]) -> None
+        self._python = python or sys.executable
+        self._idle = []  # type: List[_Worker]
+        self._all = []  # type: List[_Worker]
+        self._lock = threading.Lock()
+        self.available = True
+
+    def fetch(self, video_id, timeout=60, on_process=None):
+        # type: (str, float, Optional[Callable[[subprocess.Popen], None]]) -> Tuple[str, Optional[str]]
+        """Return (status, json3_text) for one video."""
+        worker = self._checkout()
+        if on_process is not None:
+            on_process(worker.proc)
+        try:
+            status, json3 = worker.request(video_id, timeout)
+        except (OSError, ValueError) as e:
+            logger.warning("yt-dlp worker failed on %s: %s", video_id, e)
+            worker.close()
+            status, json3 = STATUS_ERROR, None
+        self._checkin(worker)
+        return status, json3
+
+    def shutdown(self):
+        # type: () -> None
+        with self._lock:
+            workers, self._all, self._idle = self._all, [], []
+        for worker in workers:
+            worker.close()
+
+    def _checkout(self):
+        # type: () -> _Worker
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive:
+                    return worker
+                self._all.remove(worker)
+        try:
+            worker = _Worker(self._python)
+        except (OSError, RuntimeError) as e:
+            self.available = False
+            raise RuntimeError(str(e))
+        with self._lock:
+            self._all.append(worker)
+        return worker
+
+    def _checkin(self, worker):
+        # type: (_Worker) -> None
+        with self._lock:
+            if worker.alive:
+                self._idle.append(worker)
+            elif worker in self._all:
+                self._all.remove(worker)
+
+
+_service = None  # type: Optional[YtdlpService]
+_service_lock = threading.Lock()
+
+
+def get_ytdlp_service():
+    # type: () -> Optional[YtdlpService]
+    """Shared service, or None when disabled in config or yt_dlp is unavailable."""
+    global _service
+    if not get_pipeline_setting("transcripts", "warm_service", True):
+        return None
+    with _service_lock:
+        if _service is None:
+            _service = YtdlpService(get_pipeline_setting("transcripts", "service_python"))
+            atexit.register(_service.shutdown)
+        return _service if _service.available else None
+
+
+if __name__ == "__main__":
+    worker_main()
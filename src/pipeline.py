@@ -1,107 +1,490 @@
+import os
 import sys
-from datetime import datetime
-from typing import List, Dict, Any
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 
-from .monitors.youtube_monitor import check_for_new_videos, VideoInfo
-from .processors.workflow_analyzer import analyze_transcript, build_workflow
+from .monitors.channel_scheduler import select_due_channels
+from .monitors.transcript_pool import STATUS_ERROR, STATUS_TIMEOUT
+from .monitors.youtube_monitor import (
+    RelevanceFilter,
+    VideoInfo,
+    check_for_new_videos,
+    evict_transcript_store,
+    fetch_transcript,
+    poll_channel,
+    video_from_record,
+)
+from .processors import work_items
+from .processors.analysis_executor import analyze_video, analyze_videos
+from .processors.batch_analyzer import (
+    iter_completed_batches,
+    mark_batch_completed,
+    submit_analysis_batch,
+)
+from .processors.near_duplicates import DuplicateFilter
+from .processors.work_items import WorkItem
+from .processors.workflow_analyzer import (
+    ExtractedWorkflow,
+    build_workflow,
+    reset_triage_stats,
+    triage_stats,
+)
 from .generators.workflow_doc_generator import generate_workflow_doc
 from .generators.curriculum_builder import rebuild_curriculum
-from .utils.database import insert_workflow, record_scan_result
+from .utils.config import get_pipeline_setting, get_youtube_channels
+from .utils.database import (
+    get_analysis_batch_items,
+    get_prompt_cache_usage,
+    init_db,
+    insert_workflow,
+    record_scan_result,
+    record_scan_stage_metrics,
+    set_last_scan_time,
+    workflow_exists,
+)
 from .utils.file_manager import append_discovery, today_str
+from .utils.llm_client import get_client
 from .utils.logger import setup_logger
+from .utils.scan_metrics import (
+    CURRICULUM,
+    DB,
+    DOCS,
+    add_bytes,
+    begin_scan,
+    current_scan,
+    end_scan,
+    track,
+)
+from .utils.stages import Stage, run_stages
 
 logger = setup_logger("pipeline")
 
 
-def run_daily_scan(days_back=7, max_per_channel=3):
-    # type: (int, int) -> Dict[str, Any]
-    logger.info("=== Starting daily scan (%s) ===", today_str())
+def new_scan_id():
+    # type: () -> str
+    return datetime.utcnow().strftime("%Y%m%d-%H%M%S")
 
-    # Step 1: Monitor
-    logger.info("Step 1: Checking YouTube channels for new videos...")
-    new_videos = check_for_new_videos(
-        days_back=days_back,
-        max_per_channel=max_per_channel,
-    )
 
-    relevant_videos = [v for v in new_videos if v.is_relevant]
-    logger.info(
-        "Found %d relevant videos out of %d new",
-        len(relevant_videos), len(new_videos)
+def _build_workflow(video, analysis):
+    # type: (VideoInfo, Dict[str, Any]) -> ExtractedWorkflow
+    return build_workflow(
+        video_url=video.url,
+        video_title=video.title,
+        channel_name=video.channel_name,
+        published=video.published,
+        analysis=analysis,
     )
 
-    if not relevant_videos:
-        logger.info("No relevant videos found. Updating curriculum anyway.")
-        rebuild_curriculum()
-        return {
-            "date": today_str(),
-            "videos_checked": len(new_videos),
-            "relevant_found": 0,
-            "workflows_generated": 0,
-            "high_value": [],
-        }
 
-    # Step 2: Analyze
-    logger.info("Step 2: Analyzing transcripts...")
-    workflows_generated = []
+def _document_workflow(wf):
+    # type: (ExtractedWorkflow) -> str
+    # Step 3: Generate documentation
+    logger.info("  Generating doc for: %s", wf.source_title)
+    with track(DOCS):
+        doc_path = str(generate_workflow_doc(wf))
+    add_bytes(DOCS, os.path.getsize(doc_path))
+    return doc_path
 
-    for video in relevant_videos:
-        if not video.transcript:
-            logger.warning("Skipping %s (no transcript)", video.title)
-            continue
 
-        logger.info("  Analyzing: %s", video.title)
-        analysis = analyze_transcript(
-            title=video.title,
-            channel=video.channel_name,
-            url=video.url,
-            transcript=video.transcript,
-        )
+def _save_workflow(video, wf, doc_path):
+    # type: (VideoInfo, ExtractedWorkflow, str) -> Dict[str, Any]
+    wf_dict = wf.to_dict()
+    wf_dict["doc_path"] = doc_path
+    wf_dict["processed_at"] = datetime.utcnow().isoformat()
+    with track(DB):
+        wf_dict["id"] = insert_workflow(wf_dict)
+    wf_dict["video_id"] = video.video_id
 
+    # Log discovery
+    discovery_entry = (
+        "### %s\n"
+        "- **Source:** [%s](%s)\n"
+        "- **Use Case:** %s\n"
+        "- **Skill Level:** %s\n"
+        "- **Value Score:** %d/10\n"
+        "- **Tools:** %s\n"
+        "- **Doc:** %s\n"
+    ) % (
+        wf.source_title,
+        wf.channel_name, wf.source_url,
+        wf.use_case,
+        wf.skill_level,
+        wf.value_score,
+        ", ".join(wf.tools),
+        doc_path,
+    )
+    append_discovery(today_str(), discovery_entry)
+    return wf_dict
+
+
+def _store_workflows(results):
+    # type: (Iterable[Tuple[VideoInfo, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]
+    """Build, document and insert a workflow for every successful analysis."""
+    stored = []
+    for video, analysis in results:
         if analysis is None:
             continue
+        wf = _build_workflow(video, analysis)
+        stored.append(_save_workflow(video, wf, _document_workflow(wf)))
+    return stored
+
+
+def _checkpoint_transcripts(videos, scan_id):
+    # type: (List[VideoInfo], str) -> None
+    """Queue videos whose transcript is already fetched as work items."""
+    for item in work_items.discover(videos, scan_id):
+        item.advance(work_items.TRANSCRIPT_FETCHED, transcript=item.video.transcript)
+
+
+def _finish_items(videos, results, workflows, error):
+    # type: (Iterable[VideoInfo], List[Tuple[VideoInfo, Optional[Dict[str, Any]]]], List[Dict[str, Any]], str) -> None
+    """Close the work items of videos analyzed outside the staged pipeline.
+
+    A video without a result counts as a failed attempt and is retried when
+    the next scan resumes unfinished items.
+    """
+    analyzed = set(video.video_id for video, _ in results)
+    stored = dict((wf["video_id"], wf["id"]) for wf in workflows)
+    for video in videos:
+        item = WorkItem(video=video, state=work_items.TRANSCRIPT_FETCHED)
+        if video.video_id in stored:
+            item.finish(work_items.STORED, workflow_id=stored[video.video_id])
+        elif video.video_id in analyzed:
+            item.finish(work_items.SKIPPED)
+        else:
+            item.fail(error)
+
+
+def _finish_duplicates(dedupe):
+    # type: (DuplicateFilter) -> None
+    """Near-duplicates get no analysis of their own; close their work items."""
+    for video in dedupe.duplicates:
+        WorkItem(video=video, state=work_items.TRANSCRIPT_FETCHED).finish(work_items.SKIPPED)
+
+
+def _collect_batches(wait=True):
+    # type: (bool) -> Tuple[List[Dict[str, Any]], int]
+    """Store the results of every ended analysis batch; returns (workflows, batches)."""
+    workflows = []  # type: List[Dict[str, Any]]
+    batches = 0
+    for batch_id, results in iter_completed_batches(wait=wait):
+        stored = _store_workflows(results)
+        workflows.extend(stored)
+        submitted = [video_from_record(r) for r in get_analysis_batch_items(batch_id).values()]
+        _finish_items(submitted, results, stored, "no batch result")
+        mark_batch_completed(batch_id)
+        batches += 1
+    return workflows, batches
+
+
+def _resume_unfinished(scan_id, dedupe, transcript_workers=None, analysis_workers=None):
+    # type: (str, Optional[DuplicateFilter], Optional[int], Optional[int]) -> Tuple[Dict[str, int], List[Dict[str, Any]], Optional[List[Dict[str, Any]]]]
+    """Continue work items earlier scans left open; returns (by_state, workflows, stage stats)."""
+    pending = work_items.load_unfinished()
+    if not pending:
+        return {}, [], None
+
+    by_state = {}  # type: Dict[str, int]
+    for item in pending:
+        by_state[item.state] = by_state.get(item.state, 0) + 1
+    logger.info("Resuming %d work items: %s", len(pending), by_state)
+
+    _, workflows, stage_stats = _run_staged_scan(
+        scan_id, dedupe,
+        transcript_workers=transcript_workers,
+        analysis_workers=analysis_workers,
+        resume_items=pending,
+    )
+    return by_state, workflows, stage_stats
+
+
+def _run_staged_scan(scan_id, dedupe, days_back=7, max_per_channel=3, feed_concurrency=None,
+                     transcript_workers=None, analysis_workers=None, all_channels=False,
+                     resume_items=None):
+    # type: (str, Optional[DuplicateFilter], int, int, Optional[int], Optional[int], Optional[int], bool, Optional[List[WorkItem]]) -> Tuple[Dict[str, int], List[Dict[str, Any]], List[Dict[str, Any]]]
+    """Monitor -> transcript -> analysis -> docs -> persist, each on its own workers.
+
+    Every video is checkpointed as a work item after each stage. With
+    `resume_items` the monitor stage is skipped and each item re-enters at
+    the stage after its checkpoint. Returns (counts, workflows, stage
+    stats). The persist stage has a single worker so every SQLite write and
+    discoveries append comes from one thread.
+    """
+    relevance = RelevanceFilter()
+    cutoff = datetime.utcnow() - timedelta(days=days_back)
+    transcript_timeout = get_pipeline_setting("transcripts", "timeout", 60)
+    counts = {"videos_checked": 0, "relevant_found": 0}
+    workflows = []  # type: List[Dict[str, Any]]
+    lock = threading.Lock()
+
+    def monitor(channel, emit):
+        videos = poll_channel(channel, cutoff, max_per_channel)
+        with lock:
+            counts["videos_checked"] += len(videos)
+        for item in work_items.discover(videos, scan_id):
+            if relevance.from_title(item.video) is False:
+                item.finish(work_items.SKIPPED, "rejected by title")
+                continue
+            emit(item)
 
-        wf = build_workflow(
-            video_url=video.url,
-            video_title=video.title,
-            channel_name=video.channel_name,
-            published=video.published,
-            analysis=analysis,
+    def transcripts(item, emit):
+        video = item.video
+        if item.state == work_items.DISCOVERED:
+            logger.info("  Extracting transcript: %s", video.title)
+            status, transcript = fetch_transcript(video.video_id, transcript_timeout)
+            if status in (STATUS_TIMEOUT, STATUS_ERROR):
+                item.fail("transcript %s" % status)
+                return
+            video.transcript = transcript or ""
+            verdict = relevance.from_title(video)
+            if verdict is None:
+                verdict = relevance.from_transcript(video)
+            if not verdict:
+                item.finish(work_items.SKIPPED)
+                return
+            with lock:
+                counts["relevant_found"] += 1
+            if not video.transcript:
+                item.finish(work_items.SKIPPED, "no transcript")
+                return
+            item.advance(work_items.TRANSCRIPT_FETCHED, transcript=video.transcript)
+            if dedupe is not None and dedupe.is_duplicate(video):
+                # A copy of a video in this scan stays open until its
+                # original is stored; see settle_duplicates().
+                if not dedupe.original_in_scan(video):
+                    item.finish(work_items.SKIPPED)
+                return
+        video.is_relevant = True
+        emit(item)
+
+    def analysis(item, emit):
+        if item.state == work_items.TRANSCRIPT_FETCHED:
+            try:
+                result = analyze_video(item.video)
+            except RuntimeError as e:
+                item.fail(str(e))
+                return
+            if result is None:
+                item.finish(work_items.SKIPPED)
+                return
+            item.analysis = result
+            item.advance(work_items.ANALYZED, analysis=result)
+        emit(item)
+
+    def docs(item, emit):
+        wf = _build_workflow(item.video, item.analysis)
+        if item.state == work_items.ANALYZED:
+            item.doc_path = _document_workflow(wf)
+            item.advance(work_items.DOCUMENTED, analysis=item.analysis, doc_path=item.doc_path)
+        emit((item, wf))
+
+    def persist(pair, emit):
+        item, wf = pair
+        # A crash between the insert and its checkpoint leaves the workflow stored.
+        with track(DB):
+            exists = workflow_exists(item.video.url)
+        if exists:
+            item.finish(work_items.STORED, "already in the library")
+            return
+        wf_dict = _save_workflow(item.video, wf, item.doc_path)
+        item.finish(work_items.STORED, workflow_id=wf_dict["id"])
+        workflows.append(wf_dict)
+        emit(item)
+
+    def settle_duplicates():
+        linked, orphaned = dedupe.resolve_scan_duplicates(
+            set(wf["video_id"] for wf in workflows)
         )
+        for video in linked:
+            WorkItem(video=video, state=work_items.TRANSCRIPT_FETCHED).finish(work_items.SKIPPED)
+        if orphaned:
+            logger.info("Analyzing %d near-duplicates whose original stored no workflow",
+                        len(orphaned))
+            for video in orphaned:
+                video.is_relevant = True
+            run_stages(stages[2:], [WorkItem(video=v, state=work_items.TRANSCRIPT_FETCHED)
+                                    for v in orphaned], queue_size=queue_size)
 
-        # Step 3: Generate documentation
-        logger.info("  Generating doc for: %s", wf.source_title)
-        doc_path = generate_workflow_doc(wf)
-
-        wf_dict = wf.to_dict()
-        wf_dict["doc_path"] = str(doc_path)
-        wf_dict["processed_at"] = datetime.utcnow().isoformat()
-        insert_workflow(wf_dict)
-        workflows_generated.append(wf_dict)
-
-        # Log discovery
-        discovery_entry = (
-            "### %s\n"
-            "- **Source:** [%s](%s)\n"
-            "- **Use Case:** %s\n"
-            "- **Skill Level:** %s\n"
-            "- **Value Score:** %d/10\n"
-            "- **Tools:** %s\n"
-            "- **Doc:** %s\n"
-        ) % (
-            wf.source_title,
-            wf.channel_name, wf.source_url,
-            wf.use_case,
-            wf.skill_level,
-            wf.value_score,
-            ", ".join(wf.tools),
-            doc_path,
+    stages = [
+        Stage("monitor", monitor, feed_concurrency
+              or get_pipeline_setting("monitor", "feed_concurrency", 8)),
+        Stage("transcript", transcripts, transcript_workers
+              or get_pipeline_setting("transcripts", "workers", 4)),
+        Stage("analysis", analysis, analysis_workers
+              or get_pipeline_setting("analysis", "workers", 4)),
+        Stage("docs", docs, get_pipeline_setting("pipeline", "doc_workers", 2)),
+        Stage("persist", persist, 1),
+    ]
+    queue_size = int(get_pipeline_setting("pipeline", "queue_size", 16))
+
+    if resume_items is not None:
+        stats = run_stages(stages[1:], resume_items, queue_size=queue_size)
+        if dedupe is not None:
+            settle_duplicates()
+        evict_transcript_store()
+    else:
+        configured = get_youtube_channels()
+        channels = select_due_channels(configured, force=all_channels)
+        stats = run_stages(stages, channels, queue_size=queue_size)
+        if dedupe is not None:
+            settle_duplicates()
+        evict_transcript_store()
+        set_last_scan_time(datetime.utcnow().isoformat())
+        logger.info(
+            "Found %d new videos (%d relevant) across %d of %d channels",
+            counts["videos_checked"], counts["relevant_found"], len(channels), len(configured)
         )
-        append_discovery(today_str(), discovery_entry)
+    return counts, workflows, [s.to_dict() for s in stats]
+
+
+@contextmanager
+def _start_scan(use_llm_cache=True):
+    # type: (bool) -> Iterator[Tuple[str, Any, Optional[DuplicateFilter]]]
+    """Set up one scan; its process-wide state (LLM client, metrics) is undone afterwards."""
+    init_db()
+    llm = get_client()
+    saved = (llm.scan_id, llm.cache_enabled)
+    dedupe = None  # type: Optional[DuplicateFilter]
+    begin_scan()
+    try:
+        reset_triage_stats()
+        scan_id = new_scan_id()
+        llm.scan_id = scan_id
+        if not use_llm_cache:
+            llm.cache_enabled = False
+        # Re-uploads and clips of already analyzed videos are linked, not re-analyzed.
+        dedupe = DuplicateFilter() if get_pipeline_setting("dedupe", "enabled", True) else None
+        yield scan_id, llm, dedupe
+    finally:
+        if dedupe is not None:
+            dedupe.close()
+        llm.scan_id, llm.cache_enabled = saved
+        end_scan()
+
+
+def run_daily_scan(days_back=7, max_per_channel=3, feed_concurrency=None,
+                   transcript_workers=None, all_channels=False, use_llm_cache=True,
+                   analysis_workers=None, batch=False):
+    # type: (int, int, Optional[int], Optional[int], bool, bool, Optional[int], bool) -> Dict[str, Any]
+    logger.info("=== Starting daily scan (%s) ===", today_str())
+    with _start_scan(use_llm_cache) as (scan_id, llm, dedupe):
+        stage_stats = None  # type: Optional[List[Dict[str, Any]]]
+        # Videos a crash or a failed call left behind go first.
+        resumed, resumed_workflows, _ = _resume_unfinished(
+            scan_id, dedupe, transcript_workers, analysis_workers)
+
+        if not batch and get_pipeline_setting("pipeline", "staged", True):
+            logger.info("Scanning with pipelined stages...")
+            counts, workflows_generated, stage_stats = _run_staged_scan(
+                scan_id, dedupe,
+                days_back=days_back,
+                max_per_channel=max_per_channel,
+                feed_concurrency=feed_concurrency,
+                transcript_workers=transcript_workers,
+                analysis_workers=analysis_workers,
+                all_channels=all_channels,
+            )
+            videos_checked = counts["videos_checked"]
+            relevant_found = counts["relevant_found"]
+        else:
+            # Step 1: Monitor
+            logger.info("Step 1: Checking YouTube channels for new videos...")
+            new_videos = check_for_new_videos(
+                days_back=days_back,
+                max_per_channel=max_per_channel,
+                feed_concurrency=feed_concurrency,
+                transcript_workers=transcript_workers,
+                all_channels=all_channels,
+            )
+
+            relevant_videos = [v for v in new_videos if v.is_relevant]
+            logger.info(
+                "Found %d relevant videos out of %d new",
+                len(relevant_videos), len(new_videos)
+            )
+            videos_checked = len(new_videos)
+            relevant_found = len(relevant_videos)
+            workflows_generated = []
+            if relevant_videos:
+                # Step 2: Analyze
+                logger.info("Step 2: Analyzing transcripts...")
+                to_analyze = []
+                for video in relevant_videos:
+                    if not video.transcript:
+                        logger.warning("Skipping %s (no transcript)", video.title)
+                        continue
+                    to_analyze.append(video)
+
+                _checkpoint_transcripts(to_analyze, scan_id)
+                fetched = list(to_analyze)
+                if dedupe is not None:
+                    to_analyze = dedupe.split(to_analyze)
+
+                if batch:
+                    if dedupe is not None:
+                        # Batch results arrive later, so copies of this scan's
+                        # videos are analyzed rather than waiting on their original.
+                        to_analyze.extend(dedupe.resolve_scan_duplicates(set())[1])
+                        _finish_duplicates(dedupe)
+                    submit_analysis_batch(to_analyze)
+                else:
+                    results = analyze_videos(to_analyze, workers=analysis_workers)
+                    if dedupe is not None:
+                        _, orphaned = dedupe.resolve_scan_duplicates(
+                            set(video.video_id for video, analysis in results if analysis)
+                        )
+                        results.extend(analyze_videos(orphaned, workers=analysis_workers))
+                    workflows_generated = _store_workflows(results)
+                    if dedupe is not None:
+                        _finish_duplicates(dedupe)
+                        duplicate_ids = set(v.video_id for v in dedupe.duplicates)
+                        fetched = [v for v in fetched if v.video_id not in duplicate_ids]
+                    _finish_items(fetched, results, workflows_generated, "analysis failed")
+            if batch:
+                # Also collects batches earlier scans left running.
+                workflows_generated, _ = _collect_batches()
+
+        if not relevant_found:
+            logger.info("No relevant videos found. Updating curriculum anyway.")
+        summary = _finish_scan(scan_id, llm, dedupe, videos_checked, relevant_found,
+                               resumed_workflows + workflows_generated, stage_stats)
+        if resumed:
+            summary["resumed"] = resumed
+        return summary
+
+
+def resume_scan(use_llm_cache=True, transcript_workers=None, analysis_workers=None):
+    # type: (bool, Optional[int], Optional[int]) -> Dict[str, Any]
+    """Continue videos that earlier scans left unfinished, from their last checkpoint."""
+    logger.info("=== Resuming unfinished scan work (%s) ===", today_str())
+    with _start_scan(use_llm_cache) as (scan_id, llm, dedupe):
+        by_state, workflows_generated, stage_stats = _resume_unfinished(
+            scan_id, dedupe, transcript_workers, analysis_workers)
+        if not by_state:
+            logger.info("No unfinished work items.")
+            return {"date": today_str(), "resumed": 0, "workflows_generated": 0, "high_value": []}
+
+        summary = _finish_scan(scan_id, llm, dedupe, 0, 0, workflows_generated, stage_stats)
+        summary["resumed"] = by_state
+        return summary
+
+
+def _finish_scan(scan_id, llm, dedupe, videos_checked, relevant_found, workflows_generated,
+                 stage_stats=None):
+    # type: (str, Any, Optional[DuplicateFilter], int, int, List[Dict[str, Any]], Optional[List[Dict[str, Any]]]) -> Dict[str, Any]
+    duplicates_linked = 0
+    if dedupe is not None:
+        with track(DB):
+            duplicates_linked = dedupe.record(
+                {wf["video_id"]: wf["id"] for wf in workflows_generated}
+            )
 
     # Step 4: Rebuild curriculum
     logger.info("Step 4: Rebuilding curriculum...")
-    rebuild_curriculum()
+    with track(CURRICULUM):
+        rebuild_curriculum()
 
     high_value = [
         wf for wf in workflows_generated
@@ -110,8 +493,8 @@ def run_daily_scan(days_back=7, max_per_channel=3):
 
     summary = {
         "date": today_str(),
-        "videos_checked": len(new_videos),
-        "relevant_found": len(relevant_videos),
+        "videos_checked": videos_checked,
+        "relevant_found": relevant_found,
         "workflows_generated": len(workflows_generated),
         "high_value": [
             {
@@ -122,13 +505,48 @@ def run_daily_scan(days_back=7, max_per_channel=3):
             for w in high_value
         ],
     }
+    if stage_stats is not None:
+        summary["stages"] = stage_stats
+    if dedupe is not None and dedupe.duplicates:
+        summary["near_duplicates"] = {
+            "skipped": len(dedupe.duplicates),
+            "linked": duplicates_linked,
+        }
+
+    if llm.cache_enabled:
+        llm.prune_cache()
+        summary["llm_cache"] = llm.cache_stats()
+    summary["llm_usage"] = llm.usage_stats()
+    if llm.streamed:
+        summary["llm_stream"] = llm.stream_stats()
+    prompt_cache = get_prompt_cache_usage(scan_id, "analysis")
+    if prompt_cache["calls"] > 1:
+        summary["prompt_cache"] = prompt_cache
+        if not prompt_cache["cache_read_input_tokens"]:
+            logger.warning(
+                "None of %d analysis calls read the cached system prompt; "
+                "it may be below the minimum cacheable length", prompt_cache["calls"],
+            )
+    triage = triage_stats()
+    if triage["positive"] or triage["rejected"] or triage["uncertain"]:
+        summary["triage"] = triage
+        logger.info(
+            "Triage: %d rejected, %d uncertain, %d positive (precision %s)",
+            triage["rejected"], triage["uncertain"], triage["positive"], triage["precision"],
+        )
+
+    metrics = current_scan()
+    if metrics is not None:
+        summary["metrics"] = metrics.to_list()
+        record_scan_stage_metrics(scan_id, summary["metrics"])
 
     # Record scan history
     record_scan_result(
         scan_date=today_str(),
-        videos_checked=len(new_videos),
-        relevant_found=len(relevant_videos),
+        videos_checked=videos_checked,
+        relevant_found=relevant_found,
         workflows_generated=len(workflows_generated),
+        scan_id=scan_id,
     )
 
     logger.info(
@@ -137,3 +555,14 @@ def run_daily_scan(days_back=7, max_per_channel=3):
     )
 
     return summary
+
+
+def resume_analysis_batches(wait=True, use_llm_cache=True):
+    # type: (bool, bool) -> Dict[str, Any]
+    """Store results of batches submitted by earlier runs."""
+    logger.info("=== Collecting analysis batches (%s) ===", today_str())
+    with _start_scan(use_llm_cache) as (scan_id, llm, dedupe):
+        workflows_generated, batches = _collect_batches(wait=wait)
+        summary = _finish_scan(scan_id, llm, dedupe, 0, 0, workflows_generated)
+        summary["batches_completed"] = batches
+        return summary
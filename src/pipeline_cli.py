@@ -15,6 +15,46 @@ def main():
         "--max-per-channel", type=int, default=3,
         help="Max videos to process per channel (default: 3)"
     )
+    parser.add_argument(
+        "--feed-concurrency", type=int, default=None,
+        help="Channel feeds fetched in parallel (default: config/pipeline.yaml)"
+    )
+    parser.add_argument(
+        "--transcript-workers", type=int, default=None,
+        help="Concurrent yt-dlp transcript downloads (default: config/pipeline.yaml)"
+    )
+    parser.add_argument(
+        "--all-channels", action="store_true",
+        help="Poll every channel, ignoring the adaptive schedule"
+    )
+    parser.add_argument(
+        "--no-llm-cache", action="store_true",
+        help="Always call the API instead of reusing cached LLM responses"
+    )
+    parser.add_argument(
+        "--analysis-workers", type=int, default=None,
+        help="Transcripts analyzed concurrently (default: config/pipeline.yaml)"
+    )
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="Analyze through the Message Batches API and wait for the batch to finish"
+    )
+    parser.add_argument(
+        "--resume-batches", action="store_true",
+        help="Skip monitoring, collect results of batches submitted by earlier runs"
+    )
+    parser.add_argument(
+        "--no-wait", action="store_true",
+        help="With --resume-batches, only collect batches that have already ended"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Skip monitoring, finish videos left unfinished by earlier scans"
+    )
+    parser.add_argument(
+        "--summary-json", metavar="PATH",
+        help="Also write the scan summary to PATH as JSON"
+    )
     parser.add_argument(
         "--rebuild-curriculum-only", action="store_true",
         help="Skip monitoring, just rebuild curriculum from existing library"
@@ -24,17 +64,45 @@ def main():
 
     if args.rebuild_curriculum_only:
         from .generators.curriculum_builder import rebuild_curriculum
-        rebuild_curriculum()
+        rebuild_curriculum(force=True)
         print("Curriculum rebuilt.")
         return
 
+    if args.resume_batches:
+        from .pipeline import resume_analysis_batches
+        summary = resume_analysis_batches(
+            wait=not args.no_wait, use_llm_cache=not args.no_llm_cache
+        )
+        print(json.dumps(summary, indent=2))
+        return
+
+    if args.resume:
+        from .pipeline import resume_scan
+        summary = resume_scan(
+            use_llm_cache=not args.no_llm_cache,
+            transcript_workers=args.transcript_workers,
+            analysis_workers=args.analysis_workers,
+        )
+        print(json.dumps(summary, indent=2))
+        return
+
     from .pipeline import run_daily_scan
 
     summary = run_daily_scan(
         days_back=args.days_back,
         max_per_channel=args.max_per_channel,
+        feed_concurrency=args.feed_concurrency,
+        transcript_workers=args.transcript_workers,
+        all_channels=args.all_channels,
+        use_llm_cache=not args.no_llm_cache,
+        analysis_workers=args.analysis_workers,
+        batch=args.batch,
     )
 
+    if args.summary_json:
+        with open(args.summary_json, "w") as f:
+            json.dump(summary, f, indent=2)
+
     print("\n=== DAILY SCAN SUMMARY ===")
     print(json.dumps(summary, indent=2))
 
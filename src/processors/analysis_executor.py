@@ -0,0 +1,67 @@
+"""
+Concurrent transcript analysis.
+
+Runs analyze_transcript for many videos on a thread pool. Request and
+token rate limits and retries live in the shared LLM client, so workers
+only bound how many calls are in flight at once.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.config import get_pipeline_setting
+from ..utils.logger import setup_logger
+from .workflow_analyzer import analyze_transcript
+
+logger = setup_logger("analysis_executor")
+
+
+def analyze_video(video):
+    # type: (Any) -> Optional[Dict[str, Any]]
+    """Raises RuntimeError when the LLM call fails (see analyze_transcript)."""
+    logger.info("  Analyzing: %s", video.title)
+    return analyze_transcript(
+        title=video.title,
+        channel=video.channel_name,
+        url=video.url,
+        transcript=video.transcript,
+        video_id=video.video_id,
+    )
+
+
+def _analyze_one(video):
+    # type: (Any) -> Tuple[bool, Optional[Dict[str, Any]]]
+    """(finished, analysis); finished is False when the call failed after its retries."""
+    try:
+        return True, analyze_video(video)
+    except Exception as e:
+        logger.error("Analysis failed for %s: %s", video.title, e)
+        return False, None
+
+
+def analyze_videos(videos, workers=None):
+    # type: (List[Any], Optional[int]) -> List[Tuple[Any, Optional[Dict[str, Any]]]]
+    """Analyze VideoInfo objects concurrently; results keep the input order.
+
+    Videos whose analysis failed are left out of the results, so callers
+    only mark finished videos as processed and the rest are retried.
+    """
+    if not videos:
+        return []
+    if workers is None:
+        workers = get_pipeline_setting("analysis", "workers", 4)
+    workers = max(1, min(int(workers), len(videos)))
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis") as pool:
+        outcomes = list(pool.map(_analyze_one, videos))
+
+    results = [(video, analysis) for video, (finished, analysis) in zip(videos, outcomes)
+               if finished]
+    found = sum(1 for _, a in results if a is not None)
+    logger.info(
+        "Analyzed %d transcripts in %.2fs (workers=%d, %d with workflows, %d failed)",
+        len(videos), time.monotonic() - start, workers, found, len(videos) - len(results),
+    )
+    return results
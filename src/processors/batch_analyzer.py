@@ -0,0 +1,225 @@
+"""
+Asynchronous transcript analysis through the Message Batches API.
+
+Analysis prompts are submitted as one batch and the batch ID is stored in
+SQLite along with the video behind each request, so a restarted process
+can pick up results for batches submitted by an earlier run. The HTTP
+side sits behind BatchTransport so it can be pointed at a stand-in server.
+"""
+
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..monitors.youtube_monitor import VideoInfo, video_from_record, video_record
+from ..utils.config import get_pipeline_setting
+from ..utils.database import (
+    get_analysis_batch_items,
+    get_pending_analysis_batches,
+    save_analysis_batch,
+    set_analysis_batch_status,
+)
+from ..utils.llm_client import (
+    BATCH_DISCOUNT,
+    DEFAULT_MODEL,
+    AnthropicClient,
+    build_message_body,
+    get_client,
+    message_text,
+)
+from ..utils.logger import setup_logger
+from .workflow_analyzer import build_analysis_request, parse_analysis_response
+
+logger = setup_logger("batch_analyzer")
+
+# Values of a batch's processing_status
+BATCH_IN_PROGRESS = "in_progress"
+BATCH_CANCELING = "canceling"
+BATCH_ENDED = "ended"
+
+
+class BatchTransport(ABC):
+    """Submits message batches and reads back their results."""
+
+    @abstractmethod
+    def submit(self, requests):
+        # type: (List[Dict[str, Any]]) -> str
+        """Submit [{"custom_id", "params"}, ...]; returns the batch ID."""
+
+    @abstractmethod
+    def status(self, batch_id):
+        # type: (str) -> Dict[str, Any]
+        """The batch object; its "processing_status" is one of BATCH_*."""
+
+    @abstractmethod
+    def results(self, batch_id):
+        # type: (str) -> Iterator[Dict[str, Any]]
+        """Yield {"custom_id", "result"} for every request in an ended batch."""
+
+
+class AnthropicBatchTransport(BatchTransport):
+    def __init__(self, client=None, batches_url=None):
+        # type: (Optional[AnthropicClient], Optional[str]) -> None
+        self.client = client or get_client()
+        self.batches_url = (
+            batches_url
+            or get_pipeline_setting("llm", "batches_url")
+            or self.client.api_url.rstrip("/") + "/batches"
+        )
+
+    def _json(self, method, url, body=None):
+        # type: (str, str, Optional[Dict[str, Any]]) -> Dict[str, Any]
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        return json.loads(self.client.request(method, url, data).decode("utf-8"))
+
+    def submit(self, requests):
+        # type: (List[Dict[str, Any]]) -> str
+        return self._json("POST", self.batches_url, {"requests": requests})["id"]
+
+    def status(self, batch_id):
+        # type: (str) -> Dict[str, Any]
+        return self._json("GET", "%s/%s" % (self.batches_url, batch_id))
+
+    def results(self, batch_id):
+        # type: (str) -> Iterator[Dict[str, Any]]
+        url = self.status(batch_id).get("results_url") or (
+            "%s/%s/results" % (self.batches_url, batch_id)
+        )
+        for line in self.client.request("GET", url).splitlines():
+            if line.strip():
+                yield json.loads(line.decode("utf-8"))
+
+
+def submit_analysis_batch(videos, transport=None):
+    # type: (List[VideoInfo], Optional[BatchTransport]) -> Optional[str]
+    """Submit one analysis request per video; returns the stored batch ID.
+
+    Videos in a batch that has not been collected are not rediscovered by
+    later scans; they are marked processed once their result is stored.
+    """
+    requests = []
+    items = {}
+    for video in videos:
+        if video.video_id in items:
+            continue
+        request = build_analysis_request(
+            title=video.title,
+            channel=video.channel_name,
+            url=video.url,
+            transcript=video.transcript,
+        )
+        # YouTube video IDs already satisfy the custom_id charset and length.
+        requests.append({"custom_id": video.video_id, "params": build_message_body(**request)})
+        items[video.video_id] = video_record(video)
+
+    if not requests:
+        return None
+
+    transport = transport or AnthropicBatchTransport()
+    batch_id = transport.submit(requests)
+    # Only now can a restarted process find these videos again.
+    save_analysis_batch(batch_id, items)
+    logger.info("Submitted analysis batch %s (%d requests)", batch_id, len(requests))
+    return batch_id
+
+
+def collect_batch_results(batch_id, transport):
+    # type: (str, BatchTransport) -> List[Tuple[VideoInfo, Optional[Dict[str, Any]]]]
+    """(video, analysis) for every request that succeeded; analysis is None
+    when the video has no workflow.
+
+    Errored, expired and missing requests are left out, so once the batch
+    is completed their videos are picked up again by the next scan.
+    """
+    items = get_analysis_batch_items(batch_id)
+    client = get_client()
+    results = []
+    errors = 0
+    for entry in transport.results(batch_id):
+        record = items.pop(entry.get("custom_id"), None)
+        if record is None:
+            continue
+        video = video_from_record(record)
+        result = entry.get("result") or {}
+        message = result.get("message") or {}
+        client.record_call(
+            message.get("model") or DEFAULT_MODEL, "analysis_batch", video.video_id,
+            "ok" if result.get("type") == "succeeded" else "error",
+            usage=message.get("usage"), discount=BATCH_DISCOUNT,
+        )
+        if result.get("type") != "succeeded":
+            errors += 1
+            logger.warning(
+                "Batch request for %s %s: %s",
+                video.title, result.get("type", "missing"), result.get("error"),
+            )
+            continue
+        text = message_text(message)
+        results.append((video, parse_analysis_response(text, video.title)))
+
+    for record in items.values():
+        errors += 1
+        logger.warning("Batch %s returned no result for %s", batch_id, record.get("title"))
+
+    logger.info(
+        "Batch %s: %d results, %d with workflows, %d left for a later scan",
+        batch_id, len(results), sum(1 for _, a in results if a is not None), errors,
+    )
+    return results
+
+
+def iter_completed_batches(transport=None, wait=True, poll_interval=None, max_wait=None):
+    # type: (Optional[BatchTransport], bool, Optional[float], Optional[float]) -> Iterator[Tuple[str, List[Tuple[VideoInfo, Optional[Dict[str, Any]]]]]]
+    """Yield (batch_id, results) for each stored batch as it ends.
+
+    The caller persists the results, marks their videos processed and then
+    calls mark_batch_completed, so a crash in between leaves the batch to be collected again. With
+    wait=False only batches that have already ended are returned.
+    """
+    pending = get_pending_analysis_batches()
+    if not pending:
+        return
+    transport = transport or AnthropicBatchTransport()
+    if poll_interval is None:
+        poll_interval = float(get_pipeline_setting("analysis", "batch_poll_seconds", 60))
+    if max_wait is None:
+        max_wait = float(get_pipeline_setting("analysis", "batch_max_wait_hours", 24)) * 3600
+    deadline = time.monotonic() + max_wait
+    waiting = [b["batch_id"] for b in pending]
+
+    while waiting:
+        still_waiting = []
+        for batch_id in waiting:
+            try:
+                info = transport.status(batch_id)
+            except Exception as e:
+                logger.error("Failed to poll batch %s: %s", batch_id, e)
+                still_waiting.append(batch_id)
+                continue
+
+            if info.get("processing_status") != BATCH_ENDED:
+                logger.info(
+                    "Batch %s %s: %s", batch_id,
+                    info.get("processing_status"), info.get("request_counts"),
+                )
+                still_waiting.append(batch_id)
+                continue
+
+            yield batch_id, collect_batch_results(batch_id, transport)
+
+        waiting = still_waiting
+        if not waiting or not wait:
+            break
+        if time.monotonic() + poll_interval > deadline:
+            logger.warning(
+                "%d batches still running; collect them later with --resume-batches",
+                len(waiting),
+            )
+            break
+        time.sleep(poll_interval)
+
+
+def mark_batch_completed(batch_id):
+    # type: (str) -> None
+    set_analysis_batch_status(batch_id, "completed")
@@ -0,0 +1,88 @@
+"""
+Incremental lookup of one top-level key in a JSON object being streamed.
+
+Text is fed as it arrives; the probe tracks only nesting depth and
+string state, so it can report a scalar value such as
+`"has_workflow": false` long before the object is complete. Anything
+before the first `{` (e.g. a markdown fence) is skipped.
+"""
+
+from typing import Any, List, Optional
+
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class JsonKeyProbe(object):
+    def __init__(self, key):
+        # type: (str) -> None
+        self.key = key
+        self.resolved = False
+        self.value = None  # type: Any
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_chars = None  # type: Optional[List[str]]
+        self._last_key = None  # type: Optional[str]
+        self._literal = None  # type: Optional[List[str]]
+
+    def feed(self, text):
+        # type: (str) -> bool
+        """Consume more text; returns True once the key's value is known."""
+        if self.resolved:
+            return True
+        for char in text:
+            if self._literal is not None:
+                if char.isalpha():
+                    self._literal.append(char)
+                    continue
+                if self._literal or not char.isspace():
+                    return self._resolve("".join(self._literal))
+                continue
+
+            if self._depth == 0 and char != "{":
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key_chars is not None:
+                        self._last_key = "".join(self._key_chars)
+                        self._key_chars = None
+                        self._expect_key = False
+                    continue
+                if self._key_chars is not None:
+                    self._key_chars.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_chars = []
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = True
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    # Object closed without the key.
+                    self.resolved = True
+                    return True
+            elif self._depth == 1:
+                if char == ",":
+                    self._expect_key = True
+                elif char == ":" and self._last_key == self.key:
+                    self._literal = []
+        return False
+
+    def _resolve(self, literal):
+        # type: (str) -> bool
+        # Only true/false/null are decoded; any other value leaves `value` None.
+        self.resolved = True
+        self.value = _LITERALS.get(literal)
+        return True
@@ -0,0 +1,244 @@
+"""
+Near-duplicate transcript detection with MinHash and banded LSH.
+
+Each transcript gets a 64-value MinHash signature over its 3-word
+shingles. The signature is cut into 16 bands of 4 values and each band is
+hashed to one key in an indexed SQLite table, so a lookup is a single
+IN query over 16 keys followed by a signature comparison on the few
+candidates it returns. Re-uploads, clips and cross-posts of a video that
+already produced a workflow are linked to it instead of being sent to
+the LLM again.
+"""
+
+import hashlib
+import random
+import re
+import sqlite3
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from ..utils.config import get_pipeline_setting
+from ..utils.database import (
+    get_connection,
+    get_fingerprint_candidates,
+    get_transcript_fingerprint,
+    save_transcript_fingerprints,
+)
+from ..utils.logger import setup_logger
+from .transcript_condenser import dedupe_rolling
+
+logger = setup_logger("near_duplicates")
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+
+_PRIME = (1 << 61) - 1
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_SIG_FORMAT = "<%dQ" % NUM_PERM
+# Fixed seed: signatures stored by earlier runs must stay comparable.
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)
+]
+
+
+def _hash64(text):
+    # type: (str) -> int
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(text, min_words=0):
+    # type: (str, int) -> Optional[Tuple[int, ...]]
+    """MinHash signature of the text's word shingles, or None for short texts."""
+    words = dedupe_rolling(_WORD_RE.findall(text.lower()))
+    if len(words) < max(min_words, SHINGLE_WORDS):
+        return None
+    hashes = {
+        _hash64(" ".join(words[i:i + SHINGLE_WORDS]))
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(a, b):
+    # type: (Sequence[int], Sequence[int]) -> float
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / float(NUM_PERM)
+
+
+def band_keys(signature):
+    # type: (Sequence[int]) -> List[int]
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            struct.pack("<B%dQ" % ROWS_PER_BAND, band, *rows), digest_size=8
+        ).digest()
+        # SQLite integers are signed 64-bit.
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def pack_signature(signature):
+    # type: (Sequence[int]) -> bytes
+    return struct.pack(_SIG_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    # type: (bytes) -> Tuple[int, ...]
+    return struct.unpack(_SIG_FORMAT, data)
+
+
+def find_near_duplicate(signature, min_similarity=0.8, conn=None):
+    # type: (Sequence[int], float, Optional[sqlite3.Connection]) -> Optional[Dict[str, Any]]
+    """Most similar stored fingerprint at or above min_similarity."""
+    best = None
+    best_score = min_similarity
+    for row in get_fingerprint_candidates(band_keys(signature), conn):
+        score = similarity(signature, unpack_signature(row["signature"]))
+        if score >= best_score:
+            best, best_score = row, score
+    if best is not None:
+        best["similarity"] = best_score
+    return best
+
+
+class DuplicateFilter(object):
+    """Split a scan's videos into new transcripts and near-duplicates.
+
+    Videos are matched against stored fingerprints and against earlier
+    videos of the same scan. Only videos that produced a workflow are
+    fingerprinted, so a failed or empty analysis never hides later copies.
+    A copy of a video from the same scan is only settled by
+    resolve_scan_duplicates() once that original is known to be stored.
+    Lookups share one connection, opened on first use; call close() when
+    the scan is done.
+    """
+
+    def __init__(self, min_similarity=None, min_words=None):
+        # type: (Optional[float], Optional[int]) -> None
+        if min_similarity is None:
+            min_similarity = get_pipeline_setting("dedupe", "min_similarity", 0.8)
+        if min_words is None:
+            min_words = get_pipeline_setting("dedupe", "min_words", 100)
+        self.min_similarity = float(min_similarity)
+        self.min_words = int(min_words)
+        self.signatures = {}  # type: Dict[str, Tuple[int, ...]]
+        self.original_of = {}  # type: Dict[str, str]
+        self.duplicates = []  # type: List[Any]
+        self._lock = threading.Lock()
+        self._conn = None  # type: Optional[sqlite3.Connection]
+
+    def _connection(self):
+        # type: () -> sqlite3.Connection
+        # Only used under self._lock, so one connection serves every worker.
+        if self._conn is None:
+            self._conn = get_connection(check_same_thread=False)
+        return self._conn
+
+    def close(self):
+        # type: () -> None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def split(self, videos):
+        # type: (List[Any]) -> List[Any]
+        """Return the videos that need analysis; the rest go to self.duplicates."""
+        return [video for video in videos if not self.is_duplicate(video)]
+
+    def is_duplicate(self, video):
+        # type: (Any) -> bool
+        """Fingerprint one video; safe to call from several threads."""
+        signature = minhash(video.transcript or "", self.min_words)
+        if signature is None:
+            return False
+        # Held across the lookup so two copies arriving together are still matched.
+        with self._lock:
+            original = self._match(signature)
+            self.signatures[video.video_id] = signature
+            if original is None:
+                return False
+            self.original_of[video.video_id] = original
+            self.duplicates.append(video)
+        logger.info("Near-duplicate of %s, skipping analysis: %s", original, video.title)
+        return True
+
+    def original_in_scan(self, video):
+        # type: (Any) -> bool
+        """Whether a duplicate's original is a video of this scan, not a stored one."""
+        with self._lock:
+            return self.original_of.get(video.video_id) in self.signatures
+
+    def resolve_scan_duplicates(self, stored_ids):
+        # type: (Set[str]) -> Tuple[List[Any], List[Any]]
+        """Settle copies of this scan's videos once the originals are done.
+
+        Returns (linked, orphaned): linked copies have an original in
+        `stored_ids` and stay duplicates; orphaned ones, whose original
+        failed or had no workflow, are dropped from self.duplicates and
+        need an analysis of their own.
+        """
+        linked = []  # type: List[Any]
+        orphaned = []  # type: List[Any]
+        with self._lock:
+            for video in list(self.duplicates):
+                original = self.original_of[video.video_id]
+                if original not in self.signatures:
+                    continue
+                if original in stored_ids:
+                    linked.append(video)
+                else:
+                    orphaned.append(video)
+                    self.duplicates.remove(video)
+                    del self.original_of[video.video_id]
+        return linked, orphaned
+
+    def _match(self, signature):
+        # type: (Tuple[int, ...]) -> Optional[str]
+        for video_id, other in self.signatures.items():
+            if similarity(signature, other) >= self.min_similarity:
+                return self.original_of.get(video_id, video_id)
+        row = find_near_duplicate(signature, self.min_similarity, self._connection())
+        if row is None:
+            return None
+        return row["duplicate_of"] or row["video_id"]
+
+    def record(self, workflow_ids):
+        # type: (Dict[str, int]) -> int
+        """Fingerprint videos that produced workflows and link their duplicates.
+
+        workflow_ids maps video_id to the workflow created from it in this
+        scan. Returns the number of duplicates linked to a workflow.
+        """
+        rows = [
+            self._row(video_id, workflow_id, None)
+            for video_id, workflow_id in workflow_ids.items()
+            if video_id in self.signatures
+        ]
+
+        linked = 0
+        with self._lock:
+            for video in self.duplicates:
+                original = self.original_of[video.video_id]
+                workflow_id = workflow_ids.get(original)
+                if workflow_id is None:
+                    stored = get_transcript_fingerprint(original, self._connection())
+                    workflow_id = stored["workflow_id"] if stored else None
+                if workflow_id is None:
+                    continue
+                rows.append(self._row(video.video_id, workflow_id, original))
+                linked += 1
+
+        save_transcript_fingerprints(rows)
+        return linked
+
+    def _row(self, video_id, workflow_id, duplicate_of):
+        # type: (str, Optional[int], Optional[str]) -> Tuple[str, bytes, List[int], Optional[int], Optional[str]]
+        signature = self.signatures[video_id]
+        return (video_id, pack_signature(signature), band_keys(signature),
+                workflow_id, duplicate_of)
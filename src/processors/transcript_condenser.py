@@ -0,0 +1,138 @@
+"""
+Deterministic transcript condensation ahead of the analysis prompt.
+
+Auto-captions repeat rolling fragments, carry filler words and often open
+with a sponsor read, so the first N characters are a poor sample. This
+removes repeats and filler and, only when the text is over budget, drops
+sponsor and duplicate chunks. If it is still over budget it keeps the
+opening chunk plus the chunks that mention the most known tools and
+workflow terms, in their original order. A non-empty transcript never
+condenses to nothing; the original text is the fallback.
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Optional, Pattern, Sequence, Tuple
+
+from ..utils.config import load_tools_database
+
+CHUNK_WORDS = 60
+MAX_REPEAT_WORDS = 8
+GAP_MARKER = " ... "
+
+FILLER_RE = re.compile(r"\b(?:u+m+|u+h+|erm|hmm+|you know|i mean)\b,?\s*", re.IGNORECASE)
+SPONSOR_RE = re.compile(
+    r"\b(?:sponsor(?:ed)?|today's sponsor|use (?:my |our )?code|promo code|discount code"
+    r"|link in the description|(?:like and )?subscribe to (?:the|my|our) channel)\b",
+    re.IGNORECASE,
+)
+WORKFLOW_RE = re.compile(
+    r"\b(?:workflow|automat\w*|trigger\w*|webhook\w*|api|node\w*|step|integrat\w*"
+    r"|agent\w*|prompt\w*|connect\w*|schedul\w*|pipeline\w*)\b",
+    re.IGNORECASE,
+)
+_DOMAIN_SUFFIX = re.compile(r"\.(?:com|ai|io|so|dev|app)$")
+_WORD_KEY = re.compile(r"[^\w']+")
+
+
+def _tool_terms(name):
+    # type: (str) -> List[str]
+    """Spoken forms of a tool name, e.g. "Make.com" -> make.com, make."""
+    lowered = name.lower().strip()
+    terms = {lowered, _DOMAIN_SUFFIX.sub("", lowered)}
+    if lowered.endswith(" api"):
+        terms.add(lowered[:-4])
+    return [t for t in terms if len(t) > 1]
+
+
+@lru_cache(maxsize=4)
+def _tool_pattern(names):
+    # type: (Tuple[str, ...]) -> Optional[Pattern[str]]
+    terms = sorted({t for name in names for t in _tool_terms(name)}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile(r"\b(?:%s)\b" % "|".join(re.escape(t) for t in terms), re.IGNORECASE)
+
+
+@lru_cache(maxsize=1)
+def _known_tool_names():
+    # type: () -> Tuple[str, ...]
+    # Read once per process rather than re-parsing the YAML for every video.
+    return tuple(t["name"] for t in load_tools_database().get("tools", []) if t.get("name"))
+
+
+def dedupe_rolling(words):
+    # type: (Sequence[str]) -> List[str]
+    """Drop a run of up to MAX_REPEAT_WORDS words that repeats the run just before it."""
+    all_keys = [_WORD_KEY.sub("", w.lower()) for w in words]
+    out = []  # type: List[str]
+    keys = []  # type: List[str]
+    i = 0
+    n = len(words)
+    while i < n:
+        for k in range(min(MAX_REPEAT_WORDS, len(out), n - i), 0, -1):
+            if keys[-k:] == all_keys[i:i + k]:
+                i += k
+                break
+        else:
+            out.append(words[i])
+            keys.append(all_keys[i])
+            i += 1
+    return out
+
+
+def _score(chunk, tools):
+    # type: (str, Optional[Pattern[str]]) -> int
+    tool_hits = len(tools.findall(chunk)) if tools is not None else 0
+    return tool_hits * 3 + len(WORKFLOW_RE.findall(chunk))
+
+
+def condense_transcript(transcript, budget, tool_names=None):
+    # type: (str, int, Optional[Sequence[str]]) -> str
+    """Condense `transcript` to at most `budget` characters."""
+    if not transcript:
+        return ""
+    words = dedupe_rolling(FILLER_RE.sub("", transcript).split())
+    chunks = [
+        " ".join(words[i:i + CHUNK_WORDS]) for i in range(0, len(words), CHUNK_WORDS)
+    ]
+    text = " ".join(chunks)
+    if not text:
+        return transcript[:budget]
+    if len(text) <= budget:
+        return text
+
+    seen = set()
+    kept = []
+    for chunk in chunks:
+        key = chunk.lower()
+        if key in seen or SPONSOR_RE.search(chunk):
+            continue
+        seen.add(key)
+        kept.append(chunk)
+    if not kept:
+        return text[:budget]
+    chunks = kept
+    text = " ".join(chunks)
+    if len(text) <= budget:
+        return text
+
+    tools = _tool_pattern(tuple(tool_names) if tool_names is not None else _known_tool_names())
+    # The opening chunk says what the video is about; the rest compete on score.
+    order = [0] + sorted(range(1, len(chunks)), key=lambda i: (-_score(chunks[i], tools), i))
+    chosen = []  # type: List[int]
+    used = 0
+    for i in order:
+        cost = len(chunks[i]) + len(GAP_MARKER)
+        if used + cost <= budget:
+            chosen.append(i)
+            used += cost
+    if not chosen:
+        return text[:budget]
+
+    chosen.sort()
+    parts = [chunks[chosen[0]]]
+    for prev, cur in zip(chosen, chosen[1:]):
+        parts.append(" " if cur == prev + 1 else GAP_MARKER)
+        parts.append(chunks[cur])
+    return "".join(parts)[:budget]
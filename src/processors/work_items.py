@@ -0,0 +1,106 @@
+"""
+Per-video checkpoints for crash-safe scans.
+
+Every discovered video becomes a work item that records the last stage it
+finished along with what that stage produced: the transcript, then the
+analysis, then the doc path. A video only lands in processed_videos once
+its item reaches a final state, so a crash or a failed LLM call leaves it
+to be picked up from the stage where it stopped, at the start of the next
+scan or by `--resume`.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from ..monitors.youtube_monitor import VideoInfo, video_from_record, video_record
+from ..utils.config import get_pipeline_setting
+from ..utils.database import (
+    add_work_items,
+    finish_work_item,
+    get_pending_batch_video_ids,
+    get_work_items,
+    record_work_item_error,
+    update_work_item,
+)
+from ..utils.logger import setup_logger
+from ..utils.scan_metrics import DB, track
+
+logger = setup_logger("work_items")
+
+DISCOVERED = "discovered"
+TRANSCRIPT_FETCHED = "transcript_fetched"
+ANALYZED = "analyzed"
+DOCUMENTED = "documented"
+# Final states
+STORED = "stored"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+OPEN_STATES = (DISCOVERED, TRANSCRIPT_FETCHED, ANALYZED, DOCUMENTED)
+
+
+@dataclass
+class WorkItem:
+    video: VideoInfo
+    state: str = DISCOVERED
+    analysis: Optional[Dict[str, Any]] = None
+    doc_path: str = ""
+
+    def advance(self, state, **payload):
+        # type: (str, **Any) -> None
+        """Checkpoint the item after a stage; payload is what later stages need."""
+        self.state = state
+        with track(DB):
+            update_work_item(self.video.video_id, state, payload)
+
+    def finish(self, state, reason="", workflow_id=None):
+        # type: (str, str, Optional[int]) -> None
+        self.state = state
+        if reason:
+            logger.info("  %s (%s): %s", state.capitalize(), reason, self.video.title)
+        with track(DB):
+            finish_work_item(self.video.video_id, state, workflow_id)
+
+    def fail(self, error):
+        # type: (str) -> None
+        """Record a failed attempt; gives up once pipeline.max_attempts is reached."""
+        with track(DB):
+            attempts = record_work_item_error(self.video.video_id, error)
+        max_attempts = int(get_pipeline_setting("pipeline", "max_attempts", 3))
+        if attempts >= max_attempts:
+            logger.warning("Giving up on %s after %d attempts: %s",
+                           self.video.title, attempts, error)
+            self.finish(FAILED)
+        else:
+            logger.warning("Left at %s for the next scan (attempt %d): %s",
+                           self.state, attempts, self.video.title)
+
+
+def discover(videos, scan_id=None):
+    # type: (List[VideoInfo], Optional[str]) -> List[WorkItem]
+    with track(DB):
+        add_work_items({v.video_id: video_record(v) for v in videos}, scan_id)
+    return [WorkItem(video=v) for v in videos]
+
+
+def load_unfinished():
+    # type: () -> List[WorkItem]
+    """Items left in an intermediate state by earlier scans, oldest first.
+
+    Videos waiting in an analysis batch are left for its collection.
+    """
+    batched = get_pending_batch_video_ids()
+    items = []
+    for row in get_work_items(OPEN_STATES):
+        if row["video_id"] in batched:
+            continue
+        payload = row["payload"]
+        video = video_from_record(row["video"])
+        video.transcript = payload.get("transcript", "")
+        items.append(WorkItem(
+            video=video,
+            state=row["state"],
+            analysis=payload.get("analysis"),
+            doc_path=payload.get("doc_path", ""),
+        ))
+    return items
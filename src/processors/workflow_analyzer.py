@@ -1,10 +1,13 @@
 import json
+import threading
 from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
-from ..utils.llm_client import call_claude
-from ..utils.config import load_tools_database
+from ..utils.llm_client import call_claude, cached_system, DEFAULT_MODEL
+from ..utils.config import get_pipeline_setting, load_tools_database
 from ..utils.logger import setup_logger
+from .json_probe import JsonKeyProbe
+from .transcript_condenser import condense_transcript
 
 logger = setup_logger("workflow_analyzer")
 
@@ -41,6 +44,8 @@ class ExtractedWorkflow:
         return asdict(self)
 
 
+# Everything that is the same for every video lives in the system prompt,
+# which is sent as a cached prefix; the user message carries only the video.
 ANALYSIS_SYSTEM_PROMPT = """You are an AI automation workflow analyst. Your job is to analyze video transcripts about AI tools and automation, then extract structured workflow information.
 
 You must respond with ONLY valid JSON (no markdown fences, no explanation outside the JSON).
@@ -49,17 +54,7 @@ Known tools in the ecosystem: {tools_list}
 
 Use case categories: content-pipeline, sales-automation, data-ops, customer-support, development-ops, research-analysis, personal-productivity, general
 
-Skill levels: beginner (no-code), intermediate (some API/scripting), advanced (custom code/agents)"""
-
-
-ANALYSIS_USER_PROMPT = """Analyze this video transcript and extract any automation workflows described.
-
-Video title: {title}
-Channel: {channel}
-URL: {url}
-
-Transcript (first 8000 chars):
-{transcript}
+Skill levels: beginner (no-code), intermediate (some API/scripting), advanced (custom code/agents)
 
 Respond with a JSON object containing:
 {{
@@ -85,40 +80,168 @@ For "pattern_tags", provide 2-4 short tags describing the core pattern (e.g., "m
 If the video does NOT describe a concrete automation workflow (e.g., it's just news or opinion), set "has_workflow": false and leave other fields empty/default."""
 
 
-def analyze_transcript(title, channel, url, transcript):
-    # type: (str, str, str, str) -> Optional[Dict[str, Any]]
+ANALYSIS_USER_PROMPT = """Analyze this video transcript and extract any automation workflows described.
+
+Video title: {title}
+Channel: {channel}
+URL: {url}
+
+Transcript (condensed):
+{transcript}"""
+
+
+# What an extraction aborted on "has_workflow": false amounts to.
+NO_WORKFLOW_RESPONSE = json.dumps({"has_workflow": False})
+
+TRIAGE_MODEL = "claude-haiku-4-5-20251001"
+
+TRIAGE_SYSTEM_PROMPT = """You screen video transcripts for an automation workflow library. Respond with ONLY a JSON object: {"has_workflow": true/false, "confidence": 0.0-1.0}
+
+has_workflow is true only if the video walks through a concrete, reproducible automation workflow (tools connected into steps). News, opinion, reviews and general tips are false."""
+
+TRIAGE_USER_PROMPT = """Video title: {title}
+Channel: {channel}
+
+Transcript excerpt:
+{transcript}"""
+
+
+class TriageStats(object):
+    """Triage verdicts, and how full extraction judged the triage positives.
+
+    Positives whose extraction call failed are counted apart and left out
+    of the precision, which they would otherwise drag down.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.uncertain = 0
+        self.positive = 0
+        self.confirmed = 0
+        self.extraction_failed = 0
+        self.failed = 0
+
+    def record(self, has_workflow, confidence, min_confidence):
+        # type: (bool, float, float) -> None
+        with self._lock:
+            if has_workflow:
+                self.positive += 1
+            elif confidence >= min_confidence:
+                self.rejected += 1
+            else:
+                self.uncertain += 1
+
+    def record_extraction(self, found):
+        # type: (bool) -> None
+        with self._lock:
+            self.confirmed += int(found)
+
+    def record_extraction_failure(self):
+        # type: () -> None
+        with self._lock:
+            self.extraction_failed += 1
+
+    def record_failure(self):
+        # type: () -> None
+        with self._lock:
+            self.failed += 1
+
+    def as_dict(self):
+        # type: () -> Dict[str, Any]
+        with self._lock:
+            judged = self.positive - self.extraction_failed
+            return {
+                "rejected": self.rejected,
+                "uncertain": self.uncertain,
+                "positive": self.positive,
+                "confirmed": self.confirmed,
+                "extraction_failed": self.extraction_failed,
+                "failed": self.failed,
+                "precision": round(float(self.confirmed) / judged, 3) if judged else None,
+            }
+
+
+_triage_stats = TriageStats()
+
+
+def triage_stats():
+    # type: () -> Dict[str, Any]
+    return _triage_stats.as_dict()
+
+
+def reset_triage_stats():
+    # type: () -> None
+    """Start counting afresh; called at the start of every scan."""
+    global _triage_stats
+    _triage_stats = TriageStats()
+
+
+def _load_json_response(response_text):
+    # type: (str) -> Dict[str, Any]
+    text = response_text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1]
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
+    return json.loads(text)
+
+
+def triage_transcript(title, channel, transcript, video_id=None):
+    # type: (str, str, str, Optional[str]) -> Optional[Tuple[bool, float]]
+    """Cheap has_workflow check; returns (has_workflow, confidence) or None on failure."""
+    excerpt_chars = int(get_pipeline_setting("analysis", "triage_chars", 3000))
+    try:
+        response_text = call_claude(
+            prompt=TRIAGE_USER_PROMPT.format(
+                title=title, channel=channel,
+                transcript=condense_transcript(transcript, excerpt_chars),
+            ),
+            system=TRIAGE_SYSTEM_PROMPT,
+            model=get_pipeline_setting("analysis", "triage_model", TRIAGE_MODEL),
+            max_tokens=64,
+            temperature=0.0,
+            kind="triage",
+            video_id=video_id,
+        )
+        verdict = _load_json_response(response_text)
+        return bool(verdict["has_workflow"]), float(verdict.get("confidence", 0.0))
+    except (RuntimeError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Triage failed for %s: %s", title, e)
+        _triage_stats.record_failure()
+        return None
+
+
+def build_analysis_request(title, channel, url, transcript):
+    # type: (str, str, str, str) -> Dict[str, Any]
+    """Keyword arguments for call_claude / a batch request's params."""
     tools_db = load_tools_database()
-    tools_list = ", ".join(t["name"] for t in tools_db.get("tools", []))
+    tool_names = [t["name"] for t in tools_db.get("tools", [])]
+    tools_list = ", ".join(tool_names)
+    budget = int(get_pipeline_setting("analysis", "transcript_budget", 8000))
 
-    system = ANALYSIS_SYSTEM_PROMPT.format(tools_list=tools_list)
+    # Identical for every video in a scan, so it is sent as a cached prefix.
+    system = cached_system(ANALYSIS_SYSTEM_PROMPT.format(tools_list=tools_list))
     user_msg = ANALYSIS_USER_PROMPT.format(
         title=title,
         channel=channel,
         url=url,
-        transcript=transcript[:8000],
+        transcript=condense_transcript(transcript, budget, tool_names),
     )
+    return {
+        "prompt": user_msg,
+        "system": system,
+        "model": DEFAULT_MODEL,
+        "temperature": 0.2,
+        "max_tokens": 2048,
+    }
 
-    try:
-        response_text = call_claude(
-            prompt=user_msg,
-            system=system,
-            temperature=0.2,
-            max_tokens=2048,
-        )
-    except RuntimeError as e:
-        logger.error("LLM call failed: %s", e)
-        return None
 
-    # Parse JSON response
+def parse_analysis_response(response_text, title):
+    # type: (str, str) -> Optional[Dict[str, Any]]
     try:
-        text = response_text.strip()
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
-
-        result = json.loads(text)
+        result = _load_json_response(response_text)
     except json.JSONDecodeError as e:
         logger.error("Failed to parse LLM response as JSON: %s", e)
         logger.debug("Raw response: %s", response_text[:500])
@@ -131,6 +254,64 @@ def analyze_transcript(title, channel, url, transcript):
     return result
 
 
+def analyze_transcript(title, channel, url, transcript, video_id=None):
+    # type: (str, str, str, str, Optional[str]) -> Optional[Dict[str, Any]]
+    """The extracted workflow, or None when the video has none.
+
+    Raises RuntimeError when the extraction call fails, so the caller can
+    retry instead of recording the video as having no workflow.
+    """
+    positive = False
+    if get_pipeline_setting("analysis", "triage", True):
+        verdict = triage_transcript(title, channel, transcript, video_id)
+        if verdict is not None:
+            has_workflow, confidence = verdict
+            # Negatives below this confidence still get a full extraction.
+            min_confidence = float(get_pipeline_setting("analysis", "triage_min_confidence", 0.7))
+            _triage_stats.record(has_workflow, confidence, min_confidence)
+            if not has_workflow and confidence >= min_confidence:
+                logger.info("Triage: no workflow in %s (confidence %.2f)", title, confidence)
+                return None
+            positive = has_workflow
+
+    try:
+        result = _extract_workflow(title, channel, url, transcript, video_id)
+    except RuntimeError:
+        if positive:
+            _triage_stats.record_extraction_failure()
+        raise
+    if positive:
+        _triage_stats.record_extraction(result is not None)
+    return result
+
+
+def _extract_workflow(title, channel, url, transcript, video_id=None):
+    # type: (str, str, str, str, Optional[str]) -> Optional[Dict[str, Any]]
+    request = build_analysis_request(title, channel, url, transcript)
+    request.update(kind="analysis", video_id=video_id)
+
+    # Streaming lets us hang up as soon as the reply starts with "has_workflow": false.
+    probe = None  # type: Optional[JsonKeyProbe]
+    if get_pipeline_setting("analysis", "stream", True):
+        probe = JsonKeyProbe("has_workflow")
+        request["stream"] = True
+        request["should_abort"] = lambda text: probe.feed(text) and probe.value is False
+        # Cached in place of the cut-off reply so a rerun skips the call too.
+        request["aborted_text"] = NO_WORKFLOW_RESPONSE
+
+    try:
+        response_text = call_claude(**request)
+    except RuntimeError as e:
+        logger.error("LLM call failed: %s", e)
+        raise
+
+    if probe is not None and probe.resolved and probe.value is False:
+        logger.info("No workflow found in: %s", title)
+        return None
+
+    return parse_analysis_response(response_text, title)
+
+
 def build_workflow(video_url, video_title, channel_name, published, analysis):
     # type: (str, str, str, str, Dict[str, Any]) -> ExtractedWorkflow
     steps = [
@@ -0,0 +1,8 @@
+"""
+Record/replay harness: run full scans offline against recorded or
+generated feeds, captions and LLM responses, and benchmark them.
+
+    python -m src.replay generate fixtures/ --channels 20 --videos 10
+    python -m src.replay bench fixtures/ --runs 3
+    python -m src.replay record fixtures/
+"""
@@ -0,0 +1,150 @@
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from .bench import (
+    format_report,
+    parse_setting,
+    prepare_sandbox,
+    run_bench,
+    run_scan,
+    scan_env,
+)
+from .fixtures import generate_fixtures, load_manifest, save_manifest
+from .server import ReplayServer
+
+
+def _add_latency_args(parser):
+    parser.add_argument("--feed-latency", type=float, default=0.0,
+                        help="Seconds added to every feed request")
+    parser.add_argument("--llm-ttft", type=float, default=0.0,
+                        help="Seconds before the first byte of every LLM response")
+    parser.add_argument("--llm-tps", type=float, default=0.0,
+                        help="Output tokens per second of simulated generation (0: instant)")
+
+
+def cmd_generate(args):
+    manifest = generate_fixtures(
+        args.fixtures, channels=args.channels, videos=args.videos, seed=args.seed,
+        workflow_ratio=args.workflow_ratio, off_topic_ratio=args.off_topic_ratio,
+        duplicate_ratio=args.duplicate_ratio, minutes=args.minutes,
+    )
+    print("Generated %d channels x %d videos in %s"
+          % (len(manifest["channels"]), args.videos, args.fixtures))
+
+
+def cmd_serve(args):
+    server = ReplayServer(args.fixtures, port=args.port, feed_latency=args.feed_latency,
+                          llm_ttft=args.llm_ttft, llm_tokens_per_second=args.llm_tps)
+    print("Serving %s at %s" % (args.fixtures, server.base_url))
+    print("  export AI_RSS_TEMPLATE='%s'" % server.rss_template)
+    print("  export AI_API_URL=%s" % server.api_url)
+    print("  export AI_REPLAY_FIXTURES=%s" % Path(args.fixtures).resolve())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+def cmd_bench(args):
+    report = run_bench(
+        args.fixtures, runs=args.runs, overrides=[parse_setting(s) for s in args.set],
+        batch=args.batch, feed_latency=args.feed_latency, llm_ttft=args.llm_ttft,
+        llm_tokens_per_second=args.llm_tps, ytdlp_latency=args.ytdlp_latency,
+        workdir=args.workdir, keep=args.keep,
+    )
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+def cmd_record(args):
+    from ..utils.config import get_youtube_channels
+
+    ytdlp = args.ytdlp or shutil.which("yt-dlp")
+    if not ytdlp:
+        sys.exit("yt-dlp not found; pass --ytdlp")
+    fixtures = Path(args.fixtures)
+    fixtures.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(fixtures)
+    manifest["scan"] = {
+        "at": datetime.utcnow().replace(microsecond=0).isoformat(),
+        "days_back": args.days_back,
+        "max_per_channel": args.max_per_channel,
+    }
+    manifest["channels"] = [
+        {"name": c["name"], "channel_id": c["channel_id"], "priority": c.get("priority", "medium")}
+        for c in get_youtube_channels()
+    ]
+    save_manifest(fixtures, manifest)
+
+    server = ReplayServer(fixtures, record=True).start()
+    root = Path(tempfile.mkdtemp(prefix="ai-record-"))
+    try:
+        prepare_sandbox(root, manifest)
+        # Keep whatever API key this shell has; requests are forwarded upstream.
+        env = scan_env(root, server, fixtures, api_key=None)
+        env["AI_REPLAY_RECORD_YTDLP"] = ytdlp
+        summary = run_scan(root, env, args.days_back, args.max_per_channel)
+    finally:
+        server.stop()
+        shutil.rmtree(str(root), ignore_errors=True)
+    print("Recorded %d videos (%d workflows) into %s"
+          % (summary.get("videos_checked", 0), summary.get("workflows_generated", 0), fixtures))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Record, replay and benchmark scans offline"
+    )
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    p = sub.add_parser("generate", help="Write synthetic fixtures for N channels by M videos")
+    p.add_argument("fixtures", help="Fixtures directory")
+    p.add_argument("--channels", type=int, default=10)
+    p.add_argument("--videos", type=int, default=10, help="Videos per channel")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workflow-ratio", type=float, default=0.6)
+    p.add_argument("--off-topic-ratio", type=float, default=0.15)
+    p.add_argument("--duplicate-ratio", type=float, default=0.05)
+    p.add_argument("--minutes", type=int, default=10, help="Transcript length per video")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("serve", help="Serve fixtures for manual runs")
+    p.add_argument("fixtures")
+    p.add_argument("--port", type=int, default=8765)
+    _add_latency_args(p)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("bench", help="Replay full scans and report per-stage numbers")
+    p.add_argument("fixtures")
+    p.add_argument("--runs", type=int, default=1)
+    p.add_argument("--set", action="append", default=[], metavar="SECTION.KEY=VALUE",
+                   help="Override a config/pipeline.yaml setting, e.g. analysis.workers=8")
+    p.add_argument("--batch", action="store_true", help="Analyze through the Batches API")
+    p.add_argument("--ytdlp-latency", type=float, default=0.0,
+                   help="Seconds added to every transcript download")
+    p.add_argument("--workdir", help="Keep sandboxes here instead of a temp dir")
+    p.add_argument("--keep", action="store_true", help="Keep the temp sandboxes")
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    _add_latency_args(p)
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("record", help="Run one live scan and save everything it fetched")
+    p.add_argument("fixtures")
+    p.add_argument("--ytdlp", help="Real yt-dlp binary (default: from PATH)")
+    p.add_argument("--days-back", type=int, default=7)
+    p.add_argument("--max-per-channel", type=int, default=3)
+    p.set_defaults(func=cmd_record)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
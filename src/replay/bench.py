@@ -0,0 +1,238 @@
+"""
+Offline scan benchmark.
+
+Each run gets a fresh sandbox project root (config, empty data and output)
+and a full `python -m src` scan pointed at a ReplayServer and the fake
+yt-dlp, so runs are independent and nothing touches the real library.
+The per-stage numbers come from the scan summary written by the child.
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .fixtures import load_manifest
+from .server import ReplayServer
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+FAKE_YTDLP = Path(__file__).resolve().parent / "fake_ytdlp.py"
+
+# Overrides for config/pipeline.yaml in every sandbox: no warm yt-dlp
+# service to start, every channel polled, the rate limiter and the LLM
+# cache out of the way.
+REPLAY_SETTINGS = {
+    "transcripts": {"warm_service": False},
+    "scheduler": {"enabled": False},
+    "llm": {"requests_per_minute": 100000, "input_tokens_per_minute": 1000000000,
+            "cache": False},
+}  # type: Dict[str, Dict[str, Any]]
+
+
+def parse_setting(text):
+    # type: (str) -> Tuple[str, str, Any]
+    """`section.key=value` with a YAML value, e.g. `analysis.workers=8`."""
+    name, _, value = text.partition("=")
+    section, _, key = name.partition(".")
+    if not section or not key or not _:
+        raise ValueError("expected section.key=value, got %r" % text)
+    return section, key, yaml.safe_load(value)
+
+
+def prepare_sandbox(root, manifest, overrides=None):
+    # type: (Path, Dict[str, Any], Optional[List[Tuple[str, str, Any]]]) -> Path
+    """A project root whose sources.yaml lists the fixture channels."""
+    root = Path(root)
+    config = root / "config"
+    shutil.copytree(str(REPO_ROOT / "config"), str(config), dirs_exist_ok=True)
+
+    with open(config / "sources.yaml", "r") as f:
+        sources = yaml.safe_load(f) or {}
+    sources["youtube_channels"] = [
+        {"name": c["name"], "channel_id": c["channel_id"], "priority": c.get("priority", "medium")}
+        for c in manifest.get("channels", [])
+    ]
+    with open(config / "sources.yaml", "w") as f:
+        yaml.safe_dump(sources, f, sort_keys=False)
+
+    with open(config / "pipeline.yaml", "r") as f:
+        settings = yaml.safe_load(f) or {}
+    for section, values in REPLAY_SETTINGS.items():
+        settings.setdefault(section, {}).update(values)
+    for section, key, value in overrides or []:
+        settings.setdefault(section, {})[key] = value
+    with open(config / "pipeline.yaml", "w") as f:
+        yaml.safe_dump(settings, f, sort_keys=False)
+
+    ytdlp = root / "bin" / "yt-dlp"
+    ytdlp.parent.mkdir(parents=True, exist_ok=True)
+    ytdlp.write_text('#!/bin/sh\nexec "%s" "%s" "$@"\n' % (sys.executable, FAKE_YTDLP))
+    ytdlp.chmod(0o755)
+    return root
+
+
+def scan_env(root, server, fixtures, ytdlp_latency=0.0, api_key="replay"):
+    # type: (Path, ReplayServer, Path, float, Optional[str]) -> Dict[str, str]
+    env = dict(os.environ)
+    env.update({
+        "AI_PROJECT_ROOT": str(root),
+        "AI_RSS_TEMPLATE": server.rss_template,
+        "AI_API_URL": server.api_url,
+        "AI_YTDLP_PATH": str(Path(root) / "bin" / "yt-dlp"),
+        "AI_REPLAY_FIXTURES": str(Path(fixtures).resolve()),
+        "AI_REPLAY_YTDLP_LATENCY": str(ytdlp_latency),
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")])),
+    })
+    if api_key:
+        env["ANTHROPIC_API_KEY"] = api_key
+    return env
+
+
+def scan_window(manifest):
+    # type: (Dict[str, Any]) -> Tuple[int, int]
+    """(days_back, max_per_channel) covering every fixture video today."""
+    scan = manifest.get("scan") or {}
+    days_back = int(scan.get("days_back", 7))
+    if scan.get("at"):
+        days_back += (datetime.utcnow() - datetime.fromisoformat(scan["at"])).days
+    return days_back, int(scan.get("max_per_channel", 3))
+
+
+def run_scan(root, env, days_back, max_per_channel, extra_args=None):
+    # type: (Path, Dict[str, str], int, int, Optional[List[str]]) -> Dict[str, Any]
+    """Run one scan in a child process; returns its summary plus wall_seconds."""
+    root = Path(root)
+    summary_path = root / "summary.json"
+    cmd = [
+        sys.executable, "-m", "src", "--all-channels", "--no-llm-cache",
+        "--days-back", str(days_back), "--max-per-channel", str(max_per_channel),
+        "--summary-json", str(summary_path),
+    ] + list(extra_args or [])
+    start = time.monotonic()
+    with open(root / "scan.log", "w") as log:
+        code = subprocess.call(cmd, cwd=str(REPO_ROOT), env=env, stdout=log,
+                               stderr=subprocess.STDOUT)
+    wall = time.monotonic() - start
+    if code != 0 or not summary_path.exists():
+        raise RuntimeError("scan exited with %d, see %s" % (code, root / "scan.log"))
+    with open(summary_path, "r") as f:
+        summary = json.load(f)
+    summary["wall_seconds"] = round(wall, 3)
+    return summary
+
+
+def stage_rows(summary):
+    # type: (Dict[str, Any]) -> List[Dict[str, Any]]
+    """Throughput (items out per wall second) and mean latency per stage."""
+    rows = []
+    for s in summary.get("stages") or []:
+        wall = s.get("wall_seconds") or 0.0
+        rows.append({
+            "stage": s["name"],
+            "workers": s["workers"],
+            "items_in": s["items_in"],
+            "items_out": s["items_out"],
+            "errors": s["errors"],
+            "wall_seconds": wall,
+            "throughput": round(s["items_out"] / wall, 2) if wall else 0.0,
+            "mean_latency_ms": (round(1000 * s["busy_seconds"] / s["items_in"], 1)
+                                if s["items_in"] else 0.0),
+        })
+    return rows
+
+
+def _median_rows(runs):
+    # type: (List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]
+    merged = []
+    for rows in zip(*runs):
+        row = dict(rows[0])
+        for key in ("wall_seconds", "throughput", "mean_latency_ms"):
+            row[key] = round(statistics.median(r[key] for r in rows), 3)
+        merged.append(row)
+    return merged
+
+
+def run_bench(fixtures, runs=1, overrides=None, batch=False, feed_latency=0.0,
+              llm_ttft=0.0, llm_tokens_per_second=0.0, ytdlp_latency=0.0,
+              workdir=None, keep=False):
+    # type: (Path, int, Optional[List[Tuple[str, str, Any]]], bool, float, float, float, float, Optional[Path], bool) -> Dict[str, Any]
+    """Replay `runs` full scans of `fixtures`; stage numbers are medians across runs.
+
+    "metrics" (per kind of work, see utils.scan_metrics) is from the last run.
+    """
+    fixtures = Path(fixtures)
+    manifest = load_manifest(fixtures)
+    days_back, max_per_channel = scan_window(manifest)
+    server = ReplayServer(fixtures, feed_latency=feed_latency, llm_ttft=llm_ttft,
+                          llm_tokens_per_second=llm_tokens_per_second).start()
+    base = Path(workdir) if workdir else Path(tempfile.mkdtemp(prefix="ai-replay-"))
+    summaries = []  # type: List[Dict[str, Any]]
+    try:
+        for n in range(runs):
+            root = base / ("run-%d" % (n + 1))
+            if root.exists():
+                shutil.rmtree(str(root))
+            prepare_sandbox(root, manifest, overrides)
+            env = scan_env(root, server, fixtures, ytdlp_latency)
+            summaries.append(run_scan(root, env, days_back, max_per_channel,
+                                      ["--batch"] if batch else None))
+    finally:
+        server.stop()
+        if not keep and not workdir:
+            shutil.rmtree(str(base), ignore_errors=True)
+
+    last = summaries[-1]
+    return {
+        "runs": runs,
+        "wall_seconds": round(statistics.median(s["wall_seconds"] for s in summaries), 3),
+        "stages": _median_rows([stage_rows(s) for s in summaries]),
+        "videos_checked": last.get("videos_checked"),
+        "relevant_found": last.get("relevant_found"),
+        "workflows_generated": last.get("workflows_generated"),
+        "llm_usage": last.get("llm_usage"),
+        "metrics": last.get("metrics") or [],
+        "server": server.stats.as_dict(),
+        "workdir": str(base) if keep or workdir else None,
+    }
+
+
+def format_report(report):
+    # type: (Dict[str, Any]) -> str
+    lines = [
+        "%d run(s), median wall %.2fs: %s videos checked, %s relevant, %s workflows"
+        % (report["runs"], report["wall_seconds"], report["videos_checked"],
+           report["relevant_found"], report["workflows_generated"]),
+        "",
+        "%-12s %7s %6s %6s %6s %9s %11s %12s"
+        % ("stage", "workers", "in", "out", "errors", "wall (s)", "items/s", "latency (ms)"),
+    ]
+    for row in report["stages"]:
+        lines.append("%-12s %7d %6d %6d %6d %9.2f %11.2f %12.1f" % (
+            row["stage"], row["workers"], row["items_in"], row["items_out"], row["errors"],
+            row["wall_seconds"], row["throughput"], row["mean_latency_ms"],
+        ))
+    if not report["stages"]:
+        lines.append("(no stage stats; the scan ran unstaged)")
+    if report["metrics"]:
+        lines += ["", "%-12s %6s %6s %9s %9s %12s %9s" % (
+            "work", "items", "errors", "wall (s)", "busy (s)", "bytes", "rss (MB)")]
+        for row in report["metrics"]:
+            lines.append("%-12s %6d %6d %9.2f %9.2f %12d %9.1f" % (
+                row["stage"], row["items"], row["errors"], row["wall_seconds"],
+                row["busy_seconds"], row["bytes"], row["peak_rss_bytes"] / 1048576.0,
+            ))
+    lines += ["", "%-12s %8s %12s %10s" % ("route", "requests", "bytes", "mean (ms)")]
+    for route, r in sorted(report["server"].items()):
+        lines.append("%-12s %8d %12d %10.2f" % (route, r["requests"], r["bytes"], r["mean_ms"]))
+    if report["workdir"]:
+        lines += ["", "Sandboxes kept in %s" % report["workdir"]]
+    return "\n".join(lines)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the yt-dlp CLI that hands out recorded json3 caption files.
+
+Understands the arguments _fetch_transcript_cli passes: writes
+captions/<video_id>.json3 from $AI_REPLAY_FIXTURES to "<-o>.en.json3", or
+nothing when the video has no captions. $AI_REPLAY_YTDLP_LATENCY adds a
+delay in seconds. With $AI_REPLAY_RECORD_YTDLP set to the real yt-dlp,
+missing captions are downloaded with it and saved into the fixtures.
+
+Standalone on purpose: it runs as a subprocess and imports nothing from src.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+
+def main(argv):
+    if "-o" not in argv:
+        sys.stderr.write("fake yt-dlp: missing -o\n")
+        return 2
+    output = argv[argv.index("-o") + 1]
+    video_id = argv[-1].rsplit("v=", 1)[-1]
+    fixtures = os.environ.get("AI_REPLAY_FIXTURES", ".")
+    captions = os.path.join(fixtures, "captions", "%s.json3" % video_id)
+
+    time.sleep(float(os.environ.get("AI_REPLAY_YTDLP_LATENCY") or 0))
+
+    real = os.environ.get("AI_REPLAY_RECORD_YTDLP")
+    if real and not os.path.exists(captions):
+        code = subprocess.call([real] + argv[1:])
+        if os.path.exists(output + ".en.json3"):
+            os.makedirs(os.path.dirname(captions), exist_ok=True)
+            shutil.copyfile(output + ".en.json3", captions)
+        return code
+
+    if not os.path.exists(captions):
+        sys.stderr.write("WARNING: There are no subtitles for the requested languages\n")
+        return 0
+    shutil.copyfile(captions, output + ".en.json3")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
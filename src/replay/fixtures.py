@@ -0,0 +1,251 @@
+"""
+Replay fixtures: channel feeds, json3 captions and LLM responses on disk.
+
+Layout of a fixtures directory:
+
+    manifest.json          channels, the scan window the fixtures cover and,
+                           for generated fixtures, per-video answers
+    feeds/<channel>.xml    Atom feed served for the channel
+    captions/<video>.json3 caption file the fake yt-dlp hands out
+    messages/<key>.json    recorded Messages API responses, keyed by
+                           message_key() of the request body
+
+Generated fixtures answer LLM requests from the manifest; recorded ones
+replay the exact responses captured by `record`.
+"""
+
+import hashlib
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+MANIFEST = "manifest.json"
+
+# Video kinds in generated fixtures
+KIND_WORKFLOW = "workflow"
+KIND_NEWS = "news"
+KIND_OFF_TOPIC = "off_topic"
+
+TOOLS = ["n8n", "Make.com", "Zapier", "OpenAI", "Claude", "Airtable", "Slack",
+         "Gmail", "Google Sheets", "Notion", "HubSpot", "Supabase"]
+USE_CASES = ["content-pipeline", "sales-automation", "data-ops", "customer-support",
+             "research-analysis", "personal-productivity"]
+SKILL_LEVELS = ["beginner", "intermediate", "advanced"]
+
+_FILLER = (
+    "so um today we are going to look at this and you know it is really cool "
+    "okay let me just show you how it works right here and then we will see"
+).split()
+_WORKFLOW_WORDS = (
+    "workflow trigger webhook node step connect api agent prompt schedule "
+    "pipeline integration automation output input map filter route"
+).split()
+_NEWS_WORDS = (
+    "announced release model benchmark opinion market funding launch "
+    "company update rumor week interview"
+).split()
+_OFF_TOPIC_WORDS = (
+    "recipe garden travel camera vlog coffee morning routine weekend "
+    "hike city market"
+).split()
+
+
+def message_key(body):
+    # type: (Dict[str, Any]) -> str
+    """Stable key of a Messages API request, ignoring whether it streams."""
+    stable = dict((k, v) for k, v in body.items() if k != "stream")
+    return hashlib.sha256(json.dumps(stable, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+def load_manifest(root):
+    # type: (Path) -> Dict[str, Any]
+    path = Path(root) / MANIFEST
+    if not path.exists():
+        return {"channels": []}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(root, manifest):
+    # type: (Path, Dict[str, Any]) -> None
+    with open(Path(root) / MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def feed_xml(channel, videos):
+    # type: (Dict[str, Any], List[Dict[str, Any]]) -> str
+    """An Atom feed shaped like YouTube's, newest entry first."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" '
+        'xmlns="http://www.w3.org/2005/Atom">\n'
+        " <title>%s</title>\n <yt:channelId>%s</yt:channelId>\n"
+        % (escape(channel["name"]), channel["channel_id"])
+    ]
+    for video in sorted(videos, key=lambda v: v["published"], reverse=True):
+        parts.append(
+            " <entry>\n  <id>yt:video:%s</id>\n  <yt:videoId>%s</yt:videoId>\n"
+            "  <title>%s</title>\n"
+            '  <link rel="alternate" href="https://www.youtube.com/watch?v=%s"/>\n'
+            "  <published>%s</published>\n </entry>\n"
+            % (video["video_id"], video["video_id"], escape(video["title"]),
+               video["video_id"], video["published"])
+        )
+    parts.append("</feed>\n")
+    return "".join(parts)
+
+
+def caption_json3(words, words_per_event=6, ms_per_word=400):
+    # type: (List[str], int, int) -> Dict[str, Any]
+    """A json3 document shaped like YouTube auto-captions for `words`."""
+    events = []  # type: List[Dict[str, Any]]
+    t = 0
+    for i in range(0, len(words), words_per_event):
+        chunk = words[i:i + words_per_event]
+        segs = [{"utf8": (" " if j else "") + w, "tOffsetMs": j * ms_per_word}
+                for j, w in enumerate(chunk)]
+        duration = len(chunk) * ms_per_word
+        events.append({"tStartMs": t, "dDurationMs": duration, "wWinId": 1, "segs": segs})
+        events.append({"tStartMs": t + duration, "dDurationMs": 20, "wWinId": 1,
+                       "aAppend": 1, "segs": [{"utf8": "\n"}]})
+        t += duration
+    return {"wireMagic": "pb3", "pens": [{}], "events": events}
+
+
+def _transcript_words(rng, kind, tools, count):
+    # type: (random.Random, str, List[str], int) -> List[str]
+    topical = {
+        KIND_WORKFLOW: _WORKFLOW_WORDS + [t.lower() for t in tools] * 2,
+        KIND_NEWS: _NEWS_WORDS + ["ai", "agent"],
+        KIND_OFF_TOPIC: _OFF_TOPIC_WORDS,
+    }[kind]
+    return [rng.choice(topical if rng.random() < 0.4 else _FILLER) for _ in range(count)]
+
+
+def _title(rng, kind, tools, n):
+    # type: (random.Random, str, List[str], int) -> str
+    if kind == KIND_WORKFLOW:
+        return "Build a %s + %s automation workflow #%d" % (tools[0], tools[1], n)
+    if kind == KIND_NEWS:
+        return "This week's AI agent news #%d" % n
+    return "My weekend %s vlog #%d" % (rng.choice(_OFF_TOPIC_WORDS), n)
+
+
+def _analysis(rng, tools):
+    # type: (random.Random, List[str]) -> Dict[str, Any]
+    return {
+        "has_workflow": True,
+        "use_case": rng.choice(USE_CASES),
+        "skill_level": rng.choice(SKILL_LEVELS),
+        "tools": tools,
+        "overview": "Connects %s to %s and runs on a schedule." % (tools[0], tools[-1]),
+        "workflow_steps": [
+            {"step": i + 1, "action": "Use %s" % tool, "tool": tool, "details": ""}
+            for i, tool in enumerate(tools)
+        ],
+        "cost_estimate": "$%d/month" % rng.randrange(0, 50),
+        "complexity": rng.choice(["Low", "Medium", "High"]),
+        "value_score": rng.randrange(3, 11),
+        "when_to_use": ["Recurring manual work"],
+        "when_not_to_use": ["One-off tasks"],
+        "alternatives": ["Do it by hand"],
+        "pattern_tags": ["no-code", "content-pipeline"],
+    }
+
+
+def generate_fixtures(root, channels=10, videos=10, seed=0, workflow_ratio=0.6,
+                      off_topic_ratio=0.15, duplicate_ratio=0.05, minutes=10):
+    # type: (Path, int, int, int, float, float, float, int) -> Dict[str, Any]
+    """Write fixtures for `channels` channels with `videos` recent videos each.
+
+    Each video is a workflow walkthrough, news (relevant, but no workflow)
+    or off-topic (filtered out on relevance); duplicate_ratio of them
+    reuse an earlier video's captions to exercise near-duplicate skipping.
+    """
+    root = Path(root)
+    rng = random.Random(seed)
+    for sub in ("feeds", "captions", "messages"):
+        (root / sub).mkdir(parents=True, exist_ok=True)
+
+    now = datetime.utcnow().replace(microsecond=0)
+    words_per_video = minutes * 150
+    manifest = {
+        "seed": seed,
+        # Scan window that covers every video, as of `at`.
+        "scan": {
+            "at": now.isoformat(),
+            "days_back": (channels + videos * 6) // 24 + 1,
+            "max_per_channel": videos,
+        },
+        "channels": [],
+    }  # type: Dict[str, Any]
+    captions = []  # type: List[Dict[str, Any]]
+    n = 0
+
+    for c in range(channels):
+        channel = {"name": "Replay Channel %d" % c, "channel_id": "UCreplay%014d" % c,
+                   "priority": "medium", "videos": []}
+        for v in range(videos):
+            n += 1
+            roll = rng.random()
+            if roll < workflow_ratio:
+                kind = KIND_WORKFLOW
+            elif roll < 1.0 - off_topic_ratio:
+                kind = KIND_NEWS
+            else:
+                kind = KIND_OFF_TOPIC
+            tools = rng.sample(TOOLS, 3)
+            video = {
+                "video_id": "rp%09d" % n,
+                "title": _title(rng, kind, tools, n),
+                "published": (now - timedelta(hours=c + v * 6)).isoformat() + "+00:00",
+                "kind": kind,
+                "analysis": _analysis(rng, tools) if kind == KIND_WORKFLOW else None,
+            }  # type: Dict[str, Any]
+
+            if captions and rng.random() < duplicate_ratio:
+                doc = rng.choice(captions)
+            else:
+                doc = caption_json3(_transcript_words(rng, kind, tools, words_per_video))
+                captions.append(doc)
+            with open(root / "captions" / ("%s.json3" % video["video_id"]), "w") as f:
+                json.dump(doc, f)
+            channel["videos"].append(video)
+
+        with open(root / "feeds" / ("%s.xml" % channel["channel_id"]), "w") as f:
+            f.write(feed_xml(channel, channel["videos"]))
+        manifest["channels"].append(channel)
+
+    save_manifest(root, manifest)
+    return manifest
+
+
+def video_index(manifest):
+    # type: (Dict[str, Any]) -> Dict[str, Dict[str, Any]]
+    """Generated videos by video_id and by title."""
+    index = {}  # type: Dict[str, Dict[str, Any]]
+    for channel in manifest.get("channels", []):
+        for video in channel.get("videos", []):
+            index[video["video_id"]] = video
+            index[video["title"]] = video
+    return index
+
+
+def recorded_message(root, key):
+    # type: (Path, str) -> Optional[Dict[str, Any]]
+    path = Path(root) / "messages" / ("%s.json" % key)
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_recorded_message(root, key, message):
+    # type: (Path, str, Dict[str, Any]) -> None
+    path = Path(root) / "messages" / ("%s.json" % key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(message, f)
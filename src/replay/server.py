@@ -0,0 +1,368 @@
+"""
+Local stand-in for the YouTube feed endpoint and the Anthropic Messages
+and Message Batches APIs, serving a fixtures directory.
+
+In record mode, requests the fixtures cannot answer are forwarded to the
+real upstream and the responses are saved, so the next run replays them.
+"""
+
+import hashlib
+import http.server
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .fixtures import (
+    load_manifest,
+    message_key,
+    recorded_message,
+    save_recorded_message,
+    video_index,
+)
+
+FEED_PATH = "/feeds/videos.xml"
+MESSAGES_PATH = "/v1/messages"
+BATCHES_PATH = "/v1/messages/batches"
+
+UPSTREAM_FEED = "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+UPSTREAM_API = "https://api.anthropic.com/v1/messages"
+# Request headers passed through to the real API when recording.
+_FORWARD_HEADERS = ("x-api-key", "anthropic-version", "anthropic-beta", "content-type")
+
+_WATCH_RE = re.compile(r"watch\?v=([\w-]{6,})")
+_TITLE_RE = re.compile(r"^Video title: (.*)$", re.MULTILINE)
+# Characters of response text per streamed delta.
+_DELTA_CHARS = 16
+
+
+class ReplayStats(object):
+    """Requests, bytes sent and time spent per route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}  # type: Dict[str, Dict[str, float]]
+
+    def add(self, route, sent, elapsed):
+        # type: (str, int, float) -> None
+        with self._lock:
+            r = self.routes.setdefault(route, {"requests": 0, "bytes": 0, "seconds": 0.0})
+            r["requests"] += 1
+            r["bytes"] += sent
+            r["seconds"] += elapsed
+
+    def as_dict(self):
+        # type: () -> Dict[str, Dict[str, float]]
+        with self._lock:
+            return dict(
+                (route, dict(r, mean_ms=round(1000 * r["seconds"] / r["requests"], 2)))
+                for route, r in self.routes.items()
+            )
+
+
+class ReplayServer(object):
+    def __init__(self, fixtures, port=0, feed_latency=0.0, llm_ttft=0.0,
+                 llm_tokens_per_second=0.0, record=False,
+                 upstream_feed=UPSTREAM_FEED, upstream_api=UPSTREAM_API):
+        # type: (Any, int, float, float, float, bool, str, str) -> None
+        self.fixtures = Path(fixtures)
+        self.feed_latency = feed_latency
+        self.llm_ttft = llm_ttft
+        self.llm_tokens_per_second = llm_tokens_per_second
+        self.record = record
+        self.upstream_feed = upstream_feed
+        self.upstream_api = upstream_api
+        self.videos = video_index(load_manifest(fixtures))
+        self.stats = ReplayStats()
+        self.batches = {}  # type: Dict[str, Dict[str, Any]]
+        self._lock = threading.Lock()
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None  # type: Optional[threading.Thread]
+
+    @property
+    def base_url(self):
+        # type: () -> str
+        return "http://127.0.0.1:%d" % self._httpd.server_address[1]
+
+    @property
+    def rss_template(self):
+        # type: () -> str
+        return self.base_url + FEED_PATH + "?channel_id={channel_id}"
+
+    @property
+    def api_url(self):
+        # type: () -> str
+        return self.base_url + MESSAGES_PATH
+
+    def start(self):
+        # type: () -> ReplayServer
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        # type: () -> None
+        self._httpd.serve_forever()
+
+    def stop(self):
+        # type: () -> None
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # ─── Feeds ───
+
+    def feed(self, channel_id):
+        # type: (str) -> Optional[bytes]
+        path = self.fixtures / "feeds" / ("%s.xml" % channel_id)
+        if path.exists():
+            return path.read_bytes()
+        if not self.record:
+            return None
+        url = self.upstream_feed.format(channel_id=channel_id)
+        with urllib.request.urlopen(url, timeout=30) as resp:
+            data = resp.read()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return data
+
+    # ─── Messages ───
+
+    def message(self, body, headers):
+        # type: (Dict[str, Any], Dict[str, str]) -> Optional[Dict[str, Any]]
+        """Response message for a request body, or None if nothing can answer it."""
+        key = message_key(body)
+        message = recorded_message(self.fixtures, key)
+        if message is not None:
+            return message
+        text = self._synthetic_text(body)
+        if text is not None:
+            return _message(body, text)
+        if not self.record:
+            return None
+        message = self._forward(body, headers)
+        save_recorded_message(self.fixtures, key, message)
+        return message
+
+    def _synthetic_text(self, body):
+        # type: (Dict[str, Any]) -> Optional[str]
+        prompt = body["messages"][0]["content"]
+        if not isinstance(prompt, str):
+            return None
+        match = _WATCH_RE.search(prompt) or _TITLE_RE.search(prompt)
+        video = self.videos.get(match.group(1)) if match else None
+        if video is None:
+            return None
+        analysis = video.get("analysis")
+        if "confidence" in json.dumps(body.get("system") or ""):
+            return json.dumps({"has_workflow": analysis is not None, "confidence": 0.9})
+        return json.dumps(analysis or {"has_workflow": False})
+
+    def _forward(self, body, headers):
+        # type: (Dict[str, Any], Dict[str, str]) -> Dict[str, Any]
+        upstream_body = dict(body)
+        upstream_body.pop("stream", None)
+        request = urllib.request.Request(
+            self.upstream_api,
+            data=json.dumps(upstream_body).encode("utf-8"),
+            headers=dict((k, v) for k, v in headers.items() if k.lower() in _FORWARD_HEADERS),
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=300) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    def create_batch(self, requests, headers):
+        # type: (list, Dict[str, str]) -> Dict[str, Any]
+        with self._lock:
+            batch_id = "msgbatch_replay_%d" % (len(self.batches) + 1)
+            self.batches[batch_id] = {"requests": requests, "headers": headers}
+        return self.batch_status(batch_id)
+
+    def batch_status(self, batch_id):
+        # type: (str) -> Dict[str, Any]
+        batch = self.batches[batch_id]
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended",
+            "request_counts": {"succeeded": len(batch["requests"])},
+            "results_url": "%s%s/%s/results" % (self.base_url, BATCHES_PATH, batch_id),
+        }
+
+    def batch_results(self, batch_id):
+        # type: (str) -> bytes
+        batch = self.batches[batch_id]
+        lines = []
+        for request in batch["requests"]:
+            message = self.message(request["params"], batch["headers"])
+            if message is None:
+                result = {"type": "errored", "error": {"type": "not_found_error"}}
+            else:
+                result = {"type": "succeeded", "message": message}
+            lines.append(json.dumps({"custom_id": request["custom_id"], "result": result}))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _message(body, text):
+    # type: (Dict[str, Any], str) -> Dict[str, Any]
+    prompt_chars = len(json.dumps(body.get("system") or "")) + len(json.dumps(body["messages"]))
+    return {
+        "id": "msg_replay_%s" % hashlib.sha1(text.encode("utf-8")).hexdigest()[:16],
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "usage": {"input_tokens": prompt_chars // 4 + 1, "output_tokens": len(text) // 4 + 1},
+    }
+
+
+def _make_handler(server):
+    # type: (ReplayServer) -> type
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, data, content_type="application/json", extra=None):
+            # type: (int, bytes, str, Optional[Dict[str, str]]) -> int
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (extra or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+            return len(data)
+
+        def _error(self, status, message):
+            # type: (int, str) -> int
+            return self._send(status, json.dumps(
+                {"type": "error", "error": {"type": "replay_error", "message": message}}
+            ).encode("utf-8"))
+
+        def _body(self):
+            # type: () -> Dict[str, Any]
+            return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+        def do_GET(self):
+            start = time.monotonic()
+            parts = urlparse(self.path)
+            if parts.path == FEED_PATH:
+                route, sent = "feed", self._feed(parse_qs(parts.query).get("channel_id", [""])[0])
+            elif parts.path.startswith(BATCHES_PATH + "/"):
+                route = "batches"
+                rest = parts.path[len(BATCHES_PATH) + 1:].split("/")
+                if rest[0] not in server.batches:
+                    sent = self._error(404, "unknown batch %s" % rest[0])
+                elif len(rest) > 1 and rest[1] == "results":
+                    sent = self._send(200, server.batch_results(rest[0]), "application/x-jsonl")
+                else:
+                    sent = self._send(200, json.dumps(server.batch_status(rest[0])).encode("utf-8"))
+            else:
+                route, sent = "other", self._error(404, "no route for %s" % parts.path)
+            server.stats.add(route, sent, time.monotonic() - start)
+
+        def do_POST(self):
+            start = time.monotonic()
+            path = urlparse(self.path).path
+            headers = dict(self.headers.items())
+            if path == MESSAGES_PATH:
+                route = "messages"
+                body = self._body()
+                try:
+                    message = server.message(body, headers)
+                except (urllib.error.URLError, OSError, ValueError) as e:
+                    sent = self._error(502, "upstream failed: %s" % e)
+                else:
+                    if message is None:
+                        sent = self._error(404, "no fixture for request %s" % message_key(body))
+                    elif body.get("stream"):
+                        sent = self._stream(message)
+                    else:
+                        time.sleep(server.llm_ttft + self._generation_time(message))
+                        sent = self._send(200, json.dumps(message).encode("utf-8"))
+            elif path == BATCHES_PATH:
+                route = "batches"
+                status = server.create_batch(self._body()["requests"], headers)
+                sent = self._send(200, json.dumps(status).encode("utf-8"))
+            else:
+                route, sent = "other", self._error(404, "no route for %s" % path)
+            server.stats.add(route, sent, time.monotonic() - start)
+
+        def _feed(self, channel_id):
+            # type: (str) -> int
+            time.sleep(server.feed_latency)
+            try:
+                data = server.feed(channel_id)
+            except (urllib.error.URLError, OSError) as e:
+                return self._error(502, "upstream feed failed: %s" % e)
+            if data is None:
+                return self._error(404, "no feed fixture for %s" % channel_id)
+            etag = '"%s"' % hashlib.sha1(data).hexdigest()[:16]
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return 0
+            return self._send(200, data, "application/atom+xml", {"ETag": etag})
+
+        def _generation_time(self, message):
+            # type: (Dict[str, Any]) -> float
+            if not server.llm_tokens_per_second:
+                return 0.0
+            tokens = message.get("usage", {}).get("output_tokens", 0)
+            return tokens / float(server.llm_tokens_per_second)
+
+        def _stream(self, message):
+            # type: (Dict[str, Any]) -> int
+            text = "".join(b.get("text", "") for b in message.get("content", []))
+            deltas = [text[i:i + _DELTA_CHARS] for i in range(0, len(text), _DELTA_CHARS)]
+            pause = self._generation_time(message) / max(1, len(deltas))
+            usage = message.get("usage", {})
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(server.llm_ttft)
+            sent = [0]
+
+            def event(name, data):
+                payload = ("event: %s\ndata: %s\n\n" % (name, json.dumps(data))).encode("utf-8")
+                self.wfile.write(b"%x\r\n" % len(payload) + payload + b"\r\n")
+                self.wfile.flush()
+                sent[0] += len(payload)
+
+            start_message = dict(message, content=[], usage={
+                "input_tokens": usage.get("input_tokens", 0), "output_tokens": 1,
+            })
+            try:
+                event("message_start", {"type": "message_start", "message": start_message})
+                event("content_block_start", {"type": "content_block_start", "index": 0,
+                                              "content_block": {"type": "text", "text": ""}})
+                for delta in deltas:
+                    event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                  "delta": {"type": "text_delta", "text": delta}})
+                    if pause:
+                        time.sleep(pause)
+                event("content_block_stop", {"type": "content_block_stop", "index": 0})
+                event("message_delta", {"type": "message_delta",
+                                        "delta": {"stop_reason": message.get("stop_reason")},
+                                        "usage": {"output_tokens": usage.get("output_tokens", 0)}})
+                event("message_stop", {"type": "message_stop"})
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading early (e.g. "has_workflow": false).
+                self.close_connection = True
+            return sent[0]
+
+    return Handler
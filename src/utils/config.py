@@ -1,9 +1,13 @@
 import os
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, List
 
-PROJECT_ROOT = Path(os.path.expanduser("~/automation-intelligence"))
+# AI_PROJECT_ROOT points a run at another tree, e.g. a replay sandbox.
+PROJECT_ROOT = Path(os.path.expanduser(
+    os.environ.get("AI_PROJECT_ROOT") or "~/automation-intelligence"
+))
 CONFIG_DIR = PROJECT_ROOT / "config"
 SRC_DIR = PROJECT_ROOT / "src"
 OUTPUT_DIR = PROJECT_ROOT / "output"
@@ -55,6 +59,38 @@ def get_filter_keywords():
     return sources.get("filter_keywords", [])
 
 
+def get_exclude_keywords():
+    # type: () -> List[str]
+    sources = load_sources()
+    return sources.get("exclude_title_keywords", []) or []
+
+
 def load_workflow_groups():
     # type: () -> Dict[str, Any]
     return load_yaml("workflow-groups.yaml")
+
+
+@lru_cache(maxsize=1)
+def _load_pipeline_config():
+    # type: () -> Dict[str, Any]
+    if not (CONFIG_DIR / "pipeline.yaml").exists():
+        return {}
+    return load_yaml("pipeline.yaml") or {}
+
+
+def load_pipeline_settings():
+    # type: () -> Dict[str, Any]
+    """config/pipeline.yaml, read once per process; see reload_pipeline_config()."""
+    return _load_pipeline_config()
+
+
+def reload_pipeline_config():
+    # type: () -> None
+    """Re-read config/pipeline.yaml on the next get_pipeline_setting() call."""
+    _load_pipeline_config.cache_clear()
+
+
+def get_pipeline_setting(section, key, default=None):
+    # type: (str, str, Any) -> Any
+    value = (_load_pipeline_config().get(section) or {}).get(key)
+    return default if value is None else value
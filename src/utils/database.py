@@ -3,10 +3,13 @@ SQLite database layer for automation-intelligence.
 Replaces JSON file reads/writes with relational queries.
 """
 
+import hashlib
+import json
 import re
 import sqlite3
+import zlib
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from .config import DATA_DIR
 from .logger import setup_logger
@@ -15,6 +18,9 @@ logger = setup_logger("database")
 
 DB_PATH = DATA_DIR / "automation_intelligence.db"
 
+# Max bound parameters per IN (...) query, under SQLite's older 999 limit.
+SQL_BATCH_SIZE = 500
+
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS workflows (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -37,6 +43,7 @@ CREATE INDEX IF NOT EXISTS idx_workflows_use_case ON workflows(use_case);
 CREATE INDEX IF NOT EXISTS idx_workflows_skill_level ON workflows(skill_level);
 CREATE INDEX IF NOT EXISTS idx_workflows_value_score ON workflows(value_score DESC);
 CREATE INDEX IF NOT EXISTS idx_workflows_published ON workflows(published DESC);
+CREATE INDEX IF NOT EXISTS idx_workflows_source_url ON workflows(source_url);
 
 CREATE TABLE IF NOT EXISTS tools (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -82,14 +89,138 @@ CREATE TABLE IF NOT EXISTS scan_metadata (
     key TEXT PRIMARY KEY,
     value TEXT NOT NULL
 );
+
+CREATE TABLE IF NOT EXISTS feed_cache (
+    channel_id TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    entries_json TEXT NOT NULL DEFAULT '[]',
+    -- Entries older than this were not parsed; NULL means the whole feed.
+    entries_cutoff TEXT,
+    fetched_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE TABLE IF NOT EXISTS transcript_blobs (
+    content_hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    raw_size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transcripts (
+    video_id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL REFERENCES transcript_blobs(content_hash),
+    stored_at TEXT DEFAULT (datetime('now')),
+    accessed_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_transcripts_accessed_at ON transcripts(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_transcripts_content_hash ON transcripts(content_hash);
+
+CREATE TABLE IF NOT EXISTS channel_schedule (
+    channel_id TEXT PRIMARY KEY,
+    last_polled_at TEXT,
+    last_new_video_at TEXT,
+    upload_interval_hours REAL,
+    next_due_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response_json TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at TEXT DEFAULT (datetime('now')),
+    accessed_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed_at ON llm_cache(accessed_at);
+
+CREATE TABLE IF NOT EXISTS analysis_batches (
+    batch_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'submitted',
+    request_count INTEGER NOT NULL DEFAULT 0,
+    submitted_at TEXT DEFAULT (datetime('now')),
+    completed_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS analysis_batch_items (
+    batch_id TEXT NOT NULL REFERENCES analysis_batches(batch_id) ON DELETE CASCADE,
+    custom_id TEXT NOT NULL,
+    video_json TEXT NOT NULL,
+    PRIMARY KEY (batch_id, custom_id)
+);
+
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scan_id TEXT,
+    video_id TEXT,
+    model TEXT NOT NULL,
+    prompt_kind TEXT,
+    input_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    cache_creation_input_tokens INTEGER DEFAULT 0,
+    cache_read_input_tokens INTEGER DEFAULT 0,
+    latency REAL,
+    ttft REAL,
+    status TEXT NOT NULL,
+    retries INTEGER DEFAULT 0,
+    cost_usd REAL,
+    created_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_calls_scan_id ON llm_calls(scan_id);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_created_at ON llm_calls(created_at);
+
+CREATE TABLE IF NOT EXISTS transcript_fingerprints (
+    video_id TEXT PRIMARY KEY,
+    signature BLOB NOT NULL,
+    workflow_id INTEGER REFERENCES workflows(id) ON DELETE SET NULL,
+    duplicate_of TEXT,
+    created_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE TABLE IF NOT EXISTS transcript_lsh (
+    band_key INTEGER NOT NULL,
+    video_id TEXT NOT NULL REFERENCES transcript_fingerprints(video_id) ON DELETE CASCADE,
+    PRIMARY KEY (band_key, video_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS work_items (
+    video_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    video_json TEXT NOT NULL,
+    payload BLOB,
+    workflow_id INTEGER REFERENCES workflows(id) ON DELETE SET NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    scan_id TEXT,
+    created_at TEXT DEFAULT (datetime('now')),
+    updated_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_work_items_state ON work_items(state);
+
+CREATE TABLE IF NOT EXISTS scan_stage_metrics (
+    scan_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    wall_seconds REAL,
+    busy_seconds REAL,
+    items INTEGER DEFAULT 0,
+    errors INTEGER DEFAULT 0,
+    bytes INTEGER DEFAULT 0,
+    peak_rss_bytes INTEGER,
+    PRIMARY KEY (scan_id, stage)
+);
 """
 
 
 # ─── Connection Management ────────────────────────────────────────
 
-def get_connection():
-    # type: () -> sqlite3.Connection
-    conn = sqlite3.connect(str(DB_PATH))
+def get_connection(check_same_thread=True):
+    # type: (bool) -> sqlite3.Connection
+    conn = sqlite3.connect(str(DB_PATH), check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
@@ -101,6 +232,9 @@ def init_db():
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     conn = get_connection()
     conn.executescript(SCHEMA_SQL)
+    columns = {r["name"] for r in conn.execute("PRAGMA table_info(feed_cache)")}
+    if "entries_cutoff" not in columns:
+        conn.execute("ALTER TABLE feed_cache ADD COLUMN entries_cutoff TEXT")
     conn.close()
     init_scan_history_table()
     logger.info("Database initialized at %s", DB_PATH)
@@ -447,6 +581,97 @@ def get_high_value_count(threshold=8):
         conn.close()
 
 
+# ─── Curriculum ──────────────────────────────────────────────────
+
+def get_curriculum_fingerprints():
+    # type: () -> List[Dict[str, Any]]
+    """Per (skill_level, use_case) count and digest used to spot library changes.
+
+    The digest is a sha256 over every workflow's id, value_score, title
+    and tools in id order, so any edit the curriculum would show changes it.
+    """
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT id, skill_level, use_case, value_score, source_title FROM workflows "
+            "ORDER BY skill_level, use_case, id"
+        ).fetchall()
+        tools = {}  # type: Dict[int, List[str]]
+        for r in conn.execute(
+            "SELECT wt.workflow_id, t.name FROM workflow_tools wt "
+            "JOIN tools t ON t.id = wt.tool_id ORDER BY wt.workflow_id, t.name"
+        ):
+            tools.setdefault(r["workflow_id"], []).append(r["name"])
+    finally:
+        conn.close()
+
+    groups = []  # type: List[Dict[str, Any]]
+    digest = None
+    for r in rows:
+        key = (r["skill_level"], r["use_case"])
+        if not groups or (groups[-1]["skill_level"], groups[-1]["use_case"]) != key:
+            if digest is not None:
+                groups[-1]["digest"] = digest.hexdigest()
+            groups.append({"skill_level": key[0], "use_case": key[1], "count": 0})
+            digest = hashlib.sha256()
+        groups[-1]["count"] += 1
+        digest.update(("%s|%s|%s|%s\n" % (
+            r["id"], r["value_score"], r["source_title"], ",".join(tools.get(r["id"], []))
+        )).encode("utf-8"))
+    if digest is not None:
+        groups[-1]["digest"] = digest.hexdigest()
+    return groups
+
+
+def get_curriculum_entries(skill_levels, use_cases):
+    # type: (Sequence[str], Sequence[str]) -> List[Dict[str, Any]]
+    """Index columns of workflows in any of skill_levels or use_cases.
+
+    Tools are only loaded for the skill_levels matches; learning paths do
+    not list them.
+    """
+    conditions = []
+    params = []  # type: list
+    if skill_levels:
+        conditions.append("skill_level IN (%s)" % ",".join("?" * len(skill_levels)))
+        params.extend(skill_levels)
+    if use_cases:
+        conditions.append("use_case IN (%s)" % ",".join("?" * len(use_cases)))
+        params.extend(use_cases)
+    if not conditions:
+        return []
+
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT id, source_title, skill_level, use_case, value_score FROM workflows "
+            "WHERE %s ORDER BY value_score DESC, id" % " OR ".join(conditions),
+            params,
+        ).fetchall()
+
+        tools_map = {}  # type: Dict[int, List[str]]
+        if skill_levels:
+            tool_rows = conn.execute(
+                "SELECT wt.workflow_id, t.name FROM workflows w "
+                "JOIN workflow_tools wt ON wt.workflow_id = w.id "
+                "JOIN tools t ON t.id = wt.tool_id "
+                "WHERE w.skill_level IN (%s) ORDER BY wt.workflow_id, wt.tool_id"
+                % ",".join("?" * len(skill_levels)),
+                list(skill_levels),
+            ).fetchall()
+            for r in tool_rows:
+                tools_map.setdefault(r["workflow_id"], []).append(r["name"])
+
+        entries = []
+        for r in rows:
+            entry = dict(r)
+            entry["tools"] = tools_map.get(entry["id"], [])
+            entries.append(entry)
+        return entries
+    finally:
+        conn.close()
+
+
 # ─── Workflow Write Operations ────────────────────────────────────
 
 def insert_workflow(workflow_dict):
@@ -572,6 +797,49 @@ def add_processed_video_id(video_id):
         conn.close()
 
 
+def filter_processed_video_ids(video_ids):
+    # type: (Iterable[str]) -> Set[str]
+    """Return the subset of video_ids already processed, queued as work items
+    or waiting in an analysis batch that has not been collected."""
+    ids = list(dict.fromkeys(video_ids))
+    if not ids:
+        return set()
+    conn = get_connection()
+    try:
+        found = set()  # type: Set[str]
+        for i in range(0, len(ids), SQL_BATCH_SIZE // 3):
+            chunk = ids[i:i + SQL_BATCH_SIZE // 3]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                "SELECT video_id FROM processed_videos WHERE video_id IN (%s) "
+                "UNION SELECT video_id FROM work_items WHERE video_id IN (%s) "
+                "UNION SELECT i.custom_id FROM analysis_batch_items i "
+                "JOIN analysis_batches b ON b.batch_id = i.batch_id "
+                "WHERE b.status != 'completed' AND i.custom_id IN (%s)"
+                % (placeholders, placeholders, placeholders),
+                chunk + chunk + chunk,
+            ).fetchall()
+            found.update(r["video_id"] for r in rows)
+        return found
+    finally:
+        conn.close()
+
+
+def add_processed_video_ids(video_ids):
+    # type: (Iterable[str]) -> None
+    rows = [(vid,) for vid in dict.fromkeys(video_ids)]
+    if not rows:
+        return
+    conn = get_connection()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO processed_videos(video_id) VALUES (?)", rows
+            )
+    finally:
+        conn.close()
+
+
 def get_processed_video_count():
     # type: () -> int
     conn = get_connection()
@@ -610,6 +878,597 @@ def set_last_scan_time(iso_timestamp):
         conn.close()
 
 
+# ─── Feed Cache ──────────────────────────────────────────────────
+
+def get_feed_cache(channel_id):
+    # type: (str) -> Optional[Dict[str, Any]]
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT etag, last_modified, content_hash, entries_json, entries_cutoff "
+            "FROM feed_cache WHERE channel_id = ?",
+            (channel_id,),
+        ).fetchone()
+        if not row:
+            return None
+        cached = dict(row)
+        cached["entries"] = json.loads(cached.pop("entries_json") or "[]")
+        return cached
+    finally:
+        conn.close()
+
+
+def save_feed_cache(channel_id, etag, last_modified, content_hash, entries,
+                    entries_cutoff=None):
+    # type: (str, Optional[str], Optional[str], str, List[Dict[str, str]], Optional[str]) -> None
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO feed_cache "
+                "(channel_id, etag, last_modified, content_hash, entries_json, "
+                "entries_cutoff, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, datetime('now'))",
+                (channel_id, etag, last_modified, content_hash, json.dumps(entries),
+                 entries_cutoff),
+            )
+    finally:
+        conn.close()
+
+
+def touch_feed_cache(channel_id, etag=None, last_modified=None):
+    # type: (str, Optional[str], Optional[str]) -> None
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE feed_cache SET fetched_at = datetime('now'), "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+                "WHERE channel_id = ?",
+                (etag, last_modified, channel_id),
+            )
+    finally:
+        conn.close()
+
+
+# ─── Transcript Store ────────────────────────────────────────────
+
+def get_cached_transcript(video_id):
+    # type: (str) -> Optional[str]
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT b.data FROM transcripts t "
+            "JOIN transcript_blobs b ON b.content_hash = t.content_hash "
+            "WHERE t.video_id = ?",
+            (video_id,),
+        ).fetchone()
+        if not row:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE transcripts SET accessed_at = datetime('now') WHERE video_id = ?",
+                (video_id,),
+            )
+        return zlib.decompress(row["data"]).decode("utf-8")
+    finally:
+        conn.close()
+
+
+def store_transcript(video_id, text):
+    # type: (str, str) -> None
+    raw = text.encode("utf-8")
+    content_hash = hashlib.sha256(raw).hexdigest()
+    conn = get_connection()
+    try:
+        with conn:
+            exists = conn.execute(
+                "SELECT 1 FROM transcript_blobs WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+            if not exists:
+                data = zlib.compress(raw, 6)
+                # Another worker may store the same text between the check and here.
+                conn.execute(
+                    "INSERT OR IGNORE INTO transcript_blobs "
+                    "(content_hash, data, raw_size, stored_size) "
+                    "VALUES (?, ?, ?, ?)",
+                    (content_hash, data, len(raw), len(data)),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (video_id, content_hash) VALUES (?, ?)",
+                (video_id, content_hash),
+            )
+    finally:
+        conn.close()
+
+
+def get_transcript_store_size():
+    # type: () -> int
+    conn = get_connection()
+    try:
+        return conn.execute(
+            "SELECT COALESCE(SUM(stored_size), 0) as s FROM transcript_blobs"
+        ).fetchone()["s"]
+    finally:
+        conn.close()
+
+
+def evict_transcripts(max_bytes):
+    # type: (int) -> int
+    """Drop least recently used transcripts until the store fits in max_bytes."""
+    conn = get_connection()
+    try:
+        total = conn.execute(
+            "SELECT COALESCE(SUM(stored_size), 0) as s FROM transcript_blobs"
+        ).fetchone()["s"]
+        if total <= max_bytes:
+            return 0
+
+        evicted = 0
+        rows = conn.execute(
+            "SELECT t.video_id, t.content_hash, b.stored_size FROM transcripts t "
+            "JOIN transcript_blobs b ON b.content_hash = t.content_hash "
+            "ORDER BY t.accessed_at ASC"
+        ).fetchall()
+        with conn:
+            for r in rows:
+                if total <= max_bytes:
+                    break
+                conn.execute("DELETE FROM transcripts WHERE video_id = ?", (r["video_id"],))
+                evicted += 1
+                still_used = conn.execute(
+                    "SELECT 1 FROM transcripts WHERE content_hash = ? LIMIT 1",
+                    (r["content_hash"],),
+                ).fetchone()
+                if not still_used:
+                    conn.execute(
+                        "DELETE FROM transcript_blobs WHERE content_hash = ?",
+                        (r["content_hash"],),
+                    )
+                    total -= r["stored_size"]
+
+        logger.info("Evicted %d transcripts (store now %d bytes)", evicted, total)
+        return evicted
+    finally:
+        conn.close()
+
+
+# ─── Channel Schedule ────────────────────────────────────────────
+
+def get_channel_schedules():
+    # type: () -> Dict[str, Dict[str, Any]]
+    conn = get_connection()
+    try:
+        rows = conn.execute("SELECT * FROM channel_schedule").fetchall()
+        return {r["channel_id"]: dict(r) for r in rows}
+    finally:
+        conn.close()
+
+
+def get_channel_schedule(channel_id):
+    # type: (str) -> Optional[Dict[str, Any]]
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT * FROM channel_schedule WHERE channel_id = ?", (channel_id,)
+        ).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def save_channel_schedule(channel_id, last_polled_at, last_new_video_at,
+                          upload_interval_hours, next_due_at):
+    # type: (str, str, Optional[str], float, str) -> None
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO channel_schedule "
+                "(channel_id, last_polled_at, last_new_video_at, upload_interval_hours, next_due_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (channel_id, last_polled_at, last_new_video_at,
+                 upload_interval_hours, next_due_at),
+            )
+    finally:
+        conn.close()
+
+
+# ─── LLM Response Cache ──────────────────────────────────────────
+
+def get_llm_cache(cache_key, ttl_seconds):
+    # type: (str, int) -> Optional[str]
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT response_json FROM llm_cache "
+            "WHERE cache_key = ? AND created_at >= datetime('now', ?)",
+            (cache_key, "-%d seconds" % ttl_seconds),
+        ).fetchone()
+        if not row:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE llm_cache SET accessed_at = datetime('now') WHERE cache_key = ?",
+                (cache_key,),
+            )
+        return row["response_json"]
+    finally:
+        conn.close()
+
+
+def put_llm_cache(cache_key, model, response_json):
+    # type: (str, str, str) -> None
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (cache_key, model, response_json, size) "
+                "VALUES (?, ?, ?, ?)",
+                (cache_key, model, response_json, len(response_json)),
+            )
+    finally:
+        conn.close()
+
+
+def evict_llm_cache(max_bytes, ttl_seconds):
+    # type: (int, int) -> int
+    """Drop expired entries, then least recently used ones until under max_bytes."""
+    conn = get_connection()
+    try:
+        with conn:
+            evicted = conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < datetime('now', ?)",
+                ("-%d seconds" % ttl_seconds,),
+            ).rowcount
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) as s FROM llm_cache"
+            ).fetchone()["s"]
+            if total > max_bytes:
+                rows = conn.execute(
+                    "SELECT cache_key, size FROM llm_cache ORDER BY accessed_at ASC"
+                ).fetchall()
+                for r in rows:
+                    if total <= max_bytes:
+                        break
+                    conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (r["cache_key"],))
+                    total -= r["size"]
+                    evicted += 1
+        if evicted:
+            logger.info("Evicted %d LLM cache entries (cache now %d bytes)", evicted, total)
+        return evicted
+    finally:
+        conn.close()
+
+
+# ─── Analysis Batches ────────────────────────────────────────────
+
+def save_analysis_batch(batch_id, items):
+    # type: (str, Dict[str, Dict[str, Any]]) -> None
+    """Record a submitted batch and the video behind each custom_id."""
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_batches (batch_id, status, request_count) "
+                "VALUES (?, 'submitted', ?)",
+                (batch_id, len(items)),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO analysis_batch_items (batch_id, custom_id, video_json) "
+                "VALUES (?, ?, ?)",
+                [(batch_id, cid, json.dumps(video)) for cid, video in items.items()],
+            )
+    finally:
+        conn.close()
+
+
+def get_pending_analysis_batches():
+    # type: () -> List[Dict[str, Any]]
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM analysis_batches WHERE status != 'completed' "
+            "ORDER BY submitted_at"
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def get_analysis_batch_items(batch_id):
+    # type: (str) -> Dict[str, Dict[str, Any]]
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT custom_id, video_json FROM analysis_batch_items WHERE batch_id = ?",
+            (batch_id,),
+        ).fetchall()
+        return {r["custom_id"]: json.loads(r["video_json"]) for r in rows}
+    finally:
+        conn.close()
+
+
+def get_pending_batch_video_ids():
+    # type: () -> Set[str]
+    """Videos submitted in a batch whose results have not been stored yet."""
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT i.custom_id FROM analysis_batch_items i "
+            "JOIN analysis_batches b ON b.batch_id = i.batch_id "
+            "WHERE b.status != 'completed'"
+        ).fetchall()
+        return set(r["custom_id"] for r in rows)
+    finally:
+        conn.close()
+
+
+def set_analysis_batch_status(batch_id, status):
+    # type: (str, str) -> None
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE analysis_batches SET status = ?, "
+                "completed_at = CASE WHEN ? = 'completed' THEN datetime('now') END "
+                "WHERE batch_id = ?",
+                (status, status, batch_id),
+            )
+    finally:
+        conn.close()
+
+
+# ─── LLM Call Telemetry ──────────────────────────────────────────
+
+def record_llm_call(call):
+    # type: (Dict[str, Any]) -> None
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO llm_calls (scan_id, video_id, model, prompt_kind, input_tokens, "
+                "output_tokens, cache_creation_input_tokens, cache_read_input_tokens, "
+                "latency, ttft, status, retries, cost_usd) "
+                "VALUES (:scan_id, :video_id, :model, :prompt_kind, :input_tokens, "
+                ":output_tokens, :cache_creation_input_tokens, :cache_read_input_tokens, "
+                ":latency, :ttft, :status, :retries, :cost_usd)",
+                call,
+            )
+    finally:
+        conn.close()
+
+
+_LLM_USAGE_COLUMNS = (
+    "COUNT(*) as calls, "
+    "SUM(CASE WHEN status = 'error' THEN 1 ELSE 0 END) as errors, "
+    "SUM(CASE WHEN status = 'cache_hit' THEN 1 ELSE 0 END) as cache_hits, "
+    "SUM(CASE WHEN status = 'aborted' THEN 1 ELSE 0 END) as aborted, "
+    "SUM(retries) as retries, "
+    "SUM(input_tokens) as input_tokens, "
+    "SUM(output_tokens) as output_tokens, "
+    "SUM(cache_creation_input_tokens) as cache_creation_input_tokens, "
+    "SUM(cache_read_input_tokens) as cache_read_input_tokens, "
+    "ROUND(AVG(CASE WHEN status != 'cache_hit' THEN latency END), 3) as avg_latency, "
+    "ROUND(MAX(latency), 3) as max_latency, "
+    "ROUND(AVG(ttft), 3) as avg_ttft, "
+    "ROUND(SUM(cost_usd), 4) as cost_usd"
+)
+
+
+def get_llm_usage_by_scan(limit=10):
+    # type: (int) -> List[Dict[str, Any]]
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT scan_id, MIN(created_at) as started_at, MAX(created_at) as ended_at, "
+            + _LLM_USAGE_COLUMNS +
+            " FROM llm_calls WHERE scan_id IS NOT NULL "
+            "GROUP BY scan_id ORDER BY started_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def get_prompt_cache_usage(scan_id, prompt_kind):
+    # type: (str, str) -> Dict[str, int]
+    """Calls of one kind in a scan that reached the API, and their prompt-cache tokens."""
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*) as calls, "
+            "COALESCE(SUM(cache_creation_input_tokens), 0) as cache_creation_input_tokens, "
+            "COALESCE(SUM(cache_read_input_tokens), 0) as cache_read_input_tokens "
+            "FROM llm_calls WHERE scan_id = ? AND prompt_kind = ? "
+            "AND status NOT IN ('cache_hit', 'error')",
+            (scan_id, prompt_kind),
+        ).fetchone()
+        return dict(row)
+    finally:
+        conn.close()
+
+
+def get_llm_usage_by_day(days=30):
+    # type: (int) -> List[Dict[str, Any]]
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT date(created_at) as day, model, "
+            + _LLM_USAGE_COLUMNS +
+            " FROM llm_calls WHERE created_at >= datetime('now', ?) "
+            "GROUP BY day, model ORDER BY day DESC, model",
+            ("-%d days" % days,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+# ─── Transcript Fingerprints ─────────────────────────────────────
+
+def get_fingerprint_candidates(band_keys, conn=None):
+    # type: (Sequence[int], Optional[sqlite3.Connection]) -> List[Dict[str, Any]]
+    """Stored fingerprints sharing at least one LSH band key.
+
+    A caller making many lookups can pass its own `conn`, which is left open.
+    """
+    if not band_keys:
+        return []
+    own = conn is None
+    if own:
+        conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT f.video_id, f.signature, f.workflow_id, f.duplicate_of "
+            "FROM transcript_fingerprints f WHERE f.video_id IN ("
+            "SELECT video_id FROM transcript_lsh WHERE band_key IN (%s))"
+            % ",".join("?" * len(band_keys)),
+            tuple(band_keys),
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        if own:
+            conn.close()
+
+
+def get_transcript_fingerprint(video_id, conn=None):
+    # type: (str, Optional[sqlite3.Connection]) -> Optional[Dict[str, Any]]
+    own = conn is None
+    if own:
+        conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT * FROM transcript_fingerprints WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        return dict(row) if row else None
+    finally:
+        if own:
+            conn.close()
+
+
+def save_transcript_fingerprints(rows):
+    # type: (Iterable[Tuple[str, bytes, Sequence[int], Optional[int], Optional[str]]]) -> None
+    """Store (video_id, signature, band_keys, workflow_id, duplicate_of) rows."""
+    rows = list(rows)
+    conn = get_connection()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO transcript_fingerprints "
+                "(video_id, signature, workflow_id, duplicate_of) VALUES (?, ?, ?, ?)",
+                [(r[0], r[1], r[3], r[4]) for r in rows],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO transcript_lsh (band_key, video_id) VALUES (?, ?)",
+                [(key, r[0]) for r in rows for key in r[2]],
+            )
+    finally:
+        conn.close()
+
+
+# ─── Work Items ──────────────────────────────────────────────────
+
+def _pack_payload(payload):
+    # type: (Optional[Dict[str, Any]]) -> Optional[bytes]
+    if payload is None:
+        return None
+    return zlib.compress(json.dumps(payload).encode("utf-8"), 6)
+
+
+def add_work_items(items, scan_id=None):
+    # type: (Dict[str, Dict[str, Any]], Optional[str]) -> None
+    """Queue newly discovered videos, keyed by video_id."""
+    if not items:
+        return
+    conn = get_connection()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO work_items (video_id, state, video_json, scan_id) "
+                "VALUES (?, 'discovered', ?, ?)",
+                [(vid, json.dumps(video), scan_id) for vid, video in items.items()],
+            )
+    finally:
+        conn.close()
+
+
+def update_work_item(video_id, state, payload=None):
+    # type: (str, str, Optional[Dict[str, Any]]) -> None
+    """Move an item to an intermediate state; payload replaces the stored one."""
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE work_items SET state = ?, payload = ?, last_error = NULL, "
+                "updated_at = datetime('now') WHERE video_id = ?",
+                (state, _pack_payload(payload), video_id),
+            )
+    finally:
+        conn.close()
+
+
+def record_work_item_error(video_id, error):
+    # type: (str, str) -> int
+    """Note a failed attempt at the item's next stage; returns the attempt count."""
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE work_items SET attempts = attempts + 1, last_error = ?, "
+                "updated_at = datetime('now') WHERE video_id = ?",
+                (error[:500], video_id),
+            )
+            row = conn.execute(
+                "SELECT attempts FROM work_items WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return row["attempts"] if row else 0
+    finally:
+        conn.close()
+
+
+def finish_work_item(video_id, state, workflow_id=None):
+    # type: (str, str, Optional[int]) -> None
+    """Move an item to a final state and only now mark its video processed."""
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE work_items SET state = ?, payload = NULL, workflow_id = ?, "
+                "updated_at = datetime('now') WHERE video_id = ?",
+                (state, workflow_id, video_id),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO processed_videos(video_id) VALUES (?)", (video_id,)
+            )
+    finally:
+        conn.close()
+
+
+def get_work_items(states):
+    # type: (Sequence[str]) -> List[Dict[str, Any]]
+    """Items in any of `states`, oldest first, with video and payload decoded."""
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM work_items WHERE state IN (%s) ORDER BY created_at"
+            % ",".join("?" * len(states)),
+            list(states),
+        ).fetchall()
+        items = []
+        for r in rows:
+            item = dict(r)
+            item["video"] = json.loads(item.pop("video_json"))
+            payload = item["payload"]
+            item["payload"] = json.loads(zlib.decompress(payload).decode("utf-8")) if payload else {}
+            items.append(item)
+        return items
+    finally:
+        conn.close()
+
+
 # ─── Channel Stats ────────────────────────────────────────────────
 
 def get_channel_stats():
@@ -676,19 +1535,23 @@ def init_scan_history_table():
                 "workflows_generated INTEGER DEFAULT 0, "
                 "completed_at TEXT DEFAULT (datetime('now')))"
             )
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(scan_history)")}
+            if "scan_id" not in columns:
+                conn.execute("ALTER TABLE scan_history ADD COLUMN scan_id TEXT")
     finally:
         conn.close()
 
 
-def record_scan_result(scan_date, videos_checked, relevant_found, workflows_generated):
-    # type: (str, int, int, int) -> None
+def record_scan_result(scan_date, videos_checked, relevant_found, workflows_generated,
+                       scan_id=None):
+    # type: (str, int, int, int, Optional[str]) -> None
     conn = get_connection()
     try:
         with conn:
             conn.execute(
-                "INSERT INTO scan_history (scan_date, videos_checked, relevant_found, workflows_generated) "
-                "VALUES (?, ?, ?, ?)",
-                (scan_date, videos_checked, relevant_found, workflows_generated),
+                "INSERT INTO scan_history (scan_date, videos_checked, relevant_found, "
+                "workflows_generated, scan_id) VALUES (?, ?, ?, ?, ?)",
+                (scan_date, videos_checked, relevant_found, workflows_generated, scan_id),
             )
     finally:
         conn.close()
@@ -705,3 +1568,49 @@ def get_scan_history(limit=10):
         return [dict(r) for r in rows]
     finally:
         conn.close()
+
+
+def get_last_scan():
+    # type: () -> Optional[Dict[str, Any]]
+    history = get_scan_history(limit=1)
+    return history[0] if history else None
+
+
+# ─── Scan Stage Metrics ──────────────────────────────────────────
+
+def record_scan_stage_metrics(scan_id, rows):
+    # type: (str, List[Dict[str, Any]]) -> None
+    conn = get_connection()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scan_stage_metrics (scan_id, stage, wall_seconds, "
+                "busy_seconds, items, errors, bytes, peak_rss_bytes) "
+                "VALUES (:scan_id, :stage, :wall_seconds, :busy_seconds, :items, :errors, "
+                ":bytes, :peak_rss_bytes)",
+                [dict(row, scan_id=scan_id) for row in rows],
+            )
+    finally:
+        conn.close()
+
+
+def get_scan_stage_metrics(scan_ids):
+    # type: (Iterable[str]) -> Dict[str, List[Dict[str, Any]]]
+    """Stage rows per scan_id, in the order they were recorded."""
+    ids = [i for i in scan_ids if i]
+    result = dict((i, []) for i in ids)  # type: Dict[str, List[Dict[str, Any]]]
+    if not ids:
+        return result
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM scan_stage_metrics WHERE scan_id IN (%s) ORDER BY rowid"
+            % ",".join("?" * len(ids)),
+            ids,
+        ).fetchall()
+        for r in rows:
+            row = dict(r)
+            result[row.pop("scan_id")].append(row)
+        return result
+    finally:
+        conn.close()
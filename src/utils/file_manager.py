@@ -59,6 +59,18 @@ def write_markdown(filepath, content):
     logger.info("Wrote %s", filepath)
 
 
+def write_markdown_if_changed(filepath, content):
+    # type: (Path, str) -> bool
+    """write_markdown, skipped when the file already holds `content`."""
+    if filepath.exists():
+        with open(filepath, "r") as f:
+            if f.read() == content:
+                logger.debug("Unchanged %s", filepath)
+                return False
+    write_markdown(filepath, content)
+    return True
+
+
 def append_discovery(date_str, entry):
     # type: (str, str) -> None
     filepath = DISCOVERIES_DIR / ("%s.md" % date_str)
@@ -0,0 +1,189 @@
+"""
+Shared HTTP layer with keep-alive connection pooling.
+
+Connections are pooled per (scheme, host, port) and handed back after a
+response has been read to the end; responses abandoned part-way close
+their connection instead, so a pooled connection is always clean.
+"""
+
+import http.client
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from .logger import setup_logger
+
+logger = setup_logger("http_client")
+
+DEFAULT_USER_AGENT = "Mozilla/5.0"
+CHUNK_SIZE = 16 * 1024
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+# Safe to resend when a reused connection dies before the response arrives.
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+_RETRYABLE = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+PoolKey = Tuple[str, str, int]
+
+
+class HttpError(Exception):
+    def __init__(self, status, reason, body=b"", headers=None):
+        # type: (int, str, bytes, Optional[Dict[str, str]]) -> None
+        Exception.__init__(self, "HTTP %d %s" % (status, reason))
+        self.status = status
+        self.reason = reason
+        self.body = body
+        self.headers = headers or {}
+
+
+class HttpResponse(object):
+    def __init__(self, pool, key, conn, resp):
+        # type: (ConnectionPool, PoolKey, http.client.HTTPConnection, http.client.HTTPResponse) -> None
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self._released = False
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+        self.bytes_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def read(self, amt=None):
+        # type: (Optional[int]) -> bytes
+        data = self._resp.read(amt) if amt is not None else self._resp.read()
+        self.bytes_read += len(data)
+        if amt is None or not data:
+            self.close()
+        return data
+
+    def iter_chunks(self, size=CHUNK_SIZE):
+        # type: (int) -> Iterator[bytes]
+        try:
+            while True:
+                data = self._resp.read1(size)
+                if not data:
+                    break
+                self.bytes_read += len(data)
+                yield data
+            # read1() stops at Content-Length without marking the response
+            # done; read() does, so close() can pool the connection.
+            self._resp.read()
+        finally:
+            self.close()
+
+    def close(self):
+        # type: () -> None
+        """Return the connection to the pool if the body was fully read, else drop it."""
+        if self._released:
+            return
+        self._released = True
+        if self._resp.isclosed() and not self._resp.will_close:
+            self._pool.put(self._key, self._conn)
+        else:
+            self._resp.close()
+            self._conn.close()
+
+
+class ConnectionPool(object):
+    def __init__(self, max_idle_per_host=8):
+        # type: (int) -> None
+        self._max_idle = max_idle_per_host
+        self._idle = {}  # type: Dict[PoolKey, List[http.client.HTTPConnection]]
+        self._lock = threading.Lock()
+
+    def get(self, key, timeout):
+        # type: (PoolKey, float) -> Tuple[http.client.HTTPConnection, bool]
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout), False
+
+    def put(self, key, conn):
+        # type: (PoolKey, http.client.HTTPConnection) -> None
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def clear(self):
+        # type: () -> None
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle = {}
+        for conn in conns:
+            conn.close()
+
+    def request(self, method, url, headers=None, body=None, timeout=15):
+        # type: (str, str, Optional[Dict[str, str]], Optional[bytes], float) -> HttpResponse
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        send_headers = {"User-Agent": DEFAULT_USER_AGENT}
+        send_headers.update(headers or {})
+
+        while True:
+            conn, reused = self.get(key, timeout)
+            sent = False
+            try:
+                conn.request(method, path, body=body, headers=send_headers)
+                sent = True
+                resp = conn.getresponse()
+            except _RETRYABLE:
+                conn.close()
+                # The server dropped an idle keep-alive connection. Retry on a
+                # fresh one unless it may already have acted on a sent request
+                # that is not safe to repeat; that is left to the caller.
+                if reused and (not sent or method.upper() in IDEMPOTENT_METHODS):
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            return HttpResponse(self, key, conn, resp)
+
+
+_default_pool = ConnectionPool()
+
+
+def request(method, url, headers=None, body=None, timeout=15):
+    # type: (str, str, Optional[Dict[str, str]], Optional[bytes], float) -> HttpResponse
+    return _default_pool.request(method, url, headers=headers, body=body, timeout=timeout)
+
+
+def get(url, headers=None, timeout=15, max_redirects=5):
+    # type: (str, Optional[Dict[str, str]], float, int) -> HttpResponse
+    for _ in range(max_redirects + 1):
+        resp = _default_pool.request("GET", url, headers=headers, timeout=timeout)
+        location = resp.headers.get("Location")
+        if resp.status not in REDIRECT_CODES or not location:
+            return resp
+        resp.read()
+        url = urljoin(url, location)
+    raise HttpError(resp.status, "too many redirects")
@@ -1,16 +1,90 @@
+import hashlib
+import http.client
 import json
 import os
-import urllib.request
-import urllib.error
-from .config import AUTH_PROFILES_PATH
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from .config import AUTH_PROFILES_PATH, get_pipeline_setting
+from .database import get_llm_cache, put_llm_cache, evict_llm_cache, record_llm_call
+from .http_client import ConnectionPool
 from .logger import setup_logger
+from .rate_limiter import RateLimiter
+from .scan_metrics import LLM, add_bytes, counted, track
 
 logger = setup_logger("llm_client")
 
-API_URL = "https://api.anthropic.com/v1/messages"
+API_URL = os.environ.get("AI_API_URL") or "https://api.anthropic.com/v1/messages"
 API_VERSION = "2023-06-01"
 DEFAULT_MODEL = "claude-sonnet-4-5-20250929"
 DEFAULT_MAX_TOKENS = 4096
+DEFAULT_CACHE_TTL = 30 * 24 * 3600
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# 429 rate limited, 529 overloaded, 5xx transient server errors
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504, 529)
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+CHARS_PER_TOKEN = 4
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+# USD per million tokens: input, output, cache write, cache read. Matched
+# by model-name prefix; llm.pricing in pipeline.yaml adds or overrides.
+MODEL_PRICING = {
+    "claude-opus-4": (15.00, 75.00, 18.75, 1.50),
+    "claude-sonnet-4": (3.00, 15.00, 3.75, 0.30),
+    "claude-haiku-4-5": (1.00, 5.00, 1.25, 0.10),
+    "claude-3-5-haiku": (0.80, 4.00, 1.00, 0.08),
+}
+BATCH_DISCOUNT = 0.5
+
+# A system prompt is a plain string or a list of content blocks, which may
+# carry "cache_control" markers for prompt caching.
+SystemPrompt = Union[str, List[Dict[str, Any]]]
+
+
+def _estimate_input_tokens(body):
+    # type: (Dict[str, Any]) -> int
+    chars = len(json.dumps(body.get("system") or "")) + sum(
+        len(json.dumps(m["content"])) for m in body["messages"]
+    )
+    return chars // CHARS_PER_TOKEN + 1
+
+
+def _parse_retry_after(value):
+    # type: (Optional[str]) -> Optional[float]
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _backoff_delay(attempt, retry_after=None):
+    # type: (int, Optional[float]) -> float
+    if retry_after is not None:
+        return min(retry_after, MAX_BACKOFF)
+    return min(MAX_BACKOFF, BASE_BACKOFF * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+
+def _cache_key(body):
+    # type: (Dict[str, Any]) -> str
+    fingerprint = json.dumps({
+        "model": body["model"],
+        "system": body.get("system"),
+        "messages": body["messages"],
+        "temperature": body["temperature"],
+        "max_tokens": body["max_tokens"],
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
 
 
 def _get_api_key():
@@ -42,46 +116,461 @@ def _get_api_key():
     )
 
 
-def call_claude(prompt, system=None, model=DEFAULT_MODEL,
-                max_tokens=DEFAULT_MAX_TOKENS, temperature=0.3):
-    api_key = _get_api_key()
+def estimate_cost(model, usage, discount=1.0):
+    # type: (str, Dict[str, Any], float) -> Optional[float]
+    pricing = dict(MODEL_PRICING)
+    pricing.update(get_pipeline_setting("llm", "pricing", {}) or {})
+    prefixes = [p for p in pricing if model.startswith(p)]
+    if not prefixes:
+        return None
+    rates = pricing[max(prefixes, key=len)]
+    tokens = [usage.get(name) or 0 for name in USAGE_FIELDS]
+    return sum(t * r for t, r in zip(tokens, rates)) / 1e6 * discount
 
+
+def build_message_body(prompt, system=None, model=DEFAULT_MODEL,
+                       max_tokens=DEFAULT_MAX_TOKENS, temperature=0.3):
+    # type: (str, Optional[SystemPrompt], str, int, float) -> Dict[str, Any]
     body = {
         "model": model,
         "max_tokens": max_tokens,
         "temperature": temperature,
         "messages": [{"role": "user", "content": prompt}],
-    }
+    }  # type: Dict[str, Any]
     if system:
         body["system"] = system
+    return body
+
 
-    data = json.dumps(body).encode("utf-8")
+def cached_system(text):
+    # type: (str) -> List[Dict[str, Any]]
+    """A system prompt marked as a cacheable prefix."""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
 
-    req = urllib.request.Request(
-        API_URL,
-        data=data,
-        headers={
+
+def message_text(message):
+    # type: (Dict[str, Any]) -> str
+    """Join the text blocks of a Messages API response."""
+    return "\n".join(
+        block["text"]
+        for block in message.get("content", [])
+        if block.get("type") == "text"
+    )
+
+
+def _iter_sse(chunks):
+    # type: (Iterable[bytes]) -> Iterator[Dict[str, Any]]
+    """Decode the JSON `data:` payloads of a server-sent event stream."""
+    buf = b""
+    for chunk in chunks:
+        buf += chunk
+        lines = buf.split(b"\n")
+        buf = lines.pop()
+        for line in lines:
+            if line.startswith(b"data:"):
+                yield json.loads(line[5:].decode("utf-8"))
+
+
+class AnthropicAPIError(RuntimeError):
+    def __init__(self, message, status=None, retry_after=None, partial=False):
+        # type: (str, Optional[int], Optional[float], bool) -> None
+        RuntimeError.__init__(self, message)
+        self.status = status
+        self.retry_after = retry_after
+        self.retries = 0
+        # Text had already been streamed to the caller when the error hit.
+        self.partial = partial
+
+    @property
+    def retryable(self):
+        # type: () -> bool
+        if self.partial:
+            return False
+        # status None means the request never got an HTTP response
+        return self.status is None or self.status in RETRYABLE_STATUSES
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    model: str = ""
+    stop_reason: str = ""
+    usage: Dict[str, int] = field(default_factory=dict)
+    latency: float = 0.0
+    cached: bool = False
+    retries: int = 0
+    # Streaming only: seconds from sending the request to the first text.
+    ttft: Optional[float] = None
+    aborted: bool = False
+
+
+class AnthropicClient(object):
+    """Messages API client over pooled keep-alive HTTPS connections."""
+
+    def __init__(self, api_key=None, api_url=API_URL, timeout=120, max_connections=8,
+                 cache_enabled=False, cache_ttl=DEFAULT_CACHE_TTL,
+                 cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, max_retries=4, limiter=None,
+                 telemetry=False):
+        # type: (Optional[str], str, float, int, bool, int, int, int, Optional[RateLimiter], bool) -> None
+        self._api_key = api_key
+        self._key_lock = threading.Lock()
+        self.api_url = api_url
+        self.timeout = timeout
+        self._pool = ConnectionPool(max_idle_per_host=max_connections)
+        self.cache_enabled = cache_enabled
+        self.cache_ttl = cache_ttl
+        self.cache_max_bytes = cache_max_bytes
+        self._stats_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.usage_totals = dict.fromkeys(USAGE_FIELDS, 0)
+        self.streamed = 0
+        self.aborted = 0
+        self.ttft_total = 0.0
+        self.max_retries = max_retries
+        self.limiter = limiter or RateLimiter()
+        self.telemetry = telemetry
+        # Set by the pipeline so calls can be grouped per scan.
+        self.scan_id = None  # type: Optional[str]
+
+    @property
+    def api_key(self):
+        # type: () -> str
+        if self._api_key is None:
+            with self._key_lock:
+                if self._api_key is None:
+                    self._api_key = _get_api_key()
+        return self._api_key
+
+    def _headers(self):
+        # type: () -> Dict[str, str]
+        return {
             "Content-Type": "application/json",
-            "x-api-key": api_key,
+            "x-api-key": self.api_key,
             "anthropic-version": API_VERSION,
-        },
-    )
+        }
 
-    try:
-        with urllib.request.urlopen(req, timeout=120) as resp:
-            result = json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode("utf-8", errors="replace")
-        raise RuntimeError(
-            "Anthropic API error %d: %s" % (e.code, error_body)
+    def create_message(self, prompt, system=None, model=DEFAULT_MODEL,
+                       max_tokens=DEFAULT_MAX_TOKENS, temperature=0.3, use_cache=None,
+                       stream=False, should_abort=None, kind=None, video_id=None,
+                       aborted_text=None):
+        # type: (str, Optional[SystemPrompt], str, int, float, Optional[bool], bool, Optional[Callable[[str], bool]], Optional[str], Optional[str], Optional[str]) -> LLMResponse
+        """Send one message.
+
+        With stream=True the response is read as server-sent events and
+        should_abort, if given, is called with each text delta; returning
+        True closes the stream and yields a partial response with
+        aborted=True. The partial text is never cached; when aborted_text
+        is given it is cached instead, as the verdict the abort stands for.
+        kind and video_id only label the call in the llm_calls telemetry
+        table.
+        """
+        body = build_message_body(prompt, system, model, max_tokens, temperature)
+
+        if use_cache is None:
+            use_cache = self.cache_enabled
+        key = _cache_key(body) if use_cache else None
+        if key is not None:
+            cached = self._cache_get(key)
+            if cached is not None:
+                self.record_call(model, kind, video_id, "cache_hit")
+                return cached
+
+        start = time.monotonic()
+        try:
+            response = self._send(body, stream, should_abort)
+        except AnthropicAPIError as e:
+            self.record_call(model, kind, video_id, "error",
+                             latency=time.monotonic() - start, retries=e.retries)
+            raise
+        self.record_call(
+            response.model, kind, video_id, "aborted" if response.aborted else "ok",
+            usage=response.usage, latency=response.latency, ttft=response.ttft,
+            retries=response.retries,
         )
-    except urllib.error.URLError as e:
-        raise RuntimeError("Network error calling Anthropic API: %s" % e)
+        if key is not None and not response.aborted:
+            self._cache_put(key, response)
+        elif key is not None and aborted_text is not None:
+            self._cache_put(key, replace(response, text=aborted_text, aborted=False))
+        return response
 
-    content_blocks = result.get("content", [])
-    text_parts = [
-        block["text"]
-        for block in content_blocks
-        if block.get("type") == "text"
-    ]
-    return "\n".join(text_parts)
+    def record_call(self, model, kind, video_id, status, usage=None, latency=None,
+                    ttft=None, retries=0, discount=1.0):
+        # type: (str, Optional[str], Optional[str], str, Optional[Dict[str, Any]], Optional[float], Optional[float], int, float) -> None
+        if not self.telemetry:
+            return
+        usage = usage or {}
+        call = dict((name, usage.get(name) or 0) for name in USAGE_FIELDS)
+        call.update(
+            scan_id=self.scan_id,
+            video_id=video_id,
+            model=model,
+            prompt_kind=kind,
+            latency=latency,
+            ttft=ttft,
+            status=status,
+            retries=retries,
+            cost_usd=estimate_cost(model, usage, discount),
+        )
+        try:
+            record_llm_call(call)
+        except sqlite3.Error as e:
+            logger.debug("LLM telemetry write failed: %s", e)
+
+    def _cache_get(self, key):
+        # type: (str) -> Optional[LLMResponse]
+        try:
+            raw = get_llm_cache(key, self.cache_ttl)
+        except sqlite3.Error as e:
+            logger.debug("LLM cache read failed: %s", e)
+            raw = None
+        with self._stats_lock:
+            if raw is None:
+                self.cache_misses += 1
+                return None
+            self.cache_hits += 1
+        response = LLMResponse(**json.loads(raw))
+        response.cached = True
+        response.latency = 0.0
+        return response
+
+    def _cache_put(self, key, response):
+        # type: (str, LLMResponse) -> None
+        try:
+            put_llm_cache(key, response.model, json.dumps(asdict(response)))
+        except sqlite3.Error as e:
+            logger.debug("LLM cache write failed: %s", e)
+
+    def cache_stats(self):
+        # type: () -> Dict[str, int]
+        with self._stats_lock:
+            return {"hits": self.cache_hits, "misses": self.cache_misses}
+
+    def usage_stats(self):
+        # type: () -> Dict[str, int]
+        """Token totals for API calls made by this client, including prompt-cache reads/writes."""
+        with self._stats_lock:
+            return dict(self.usage_totals)
+
+    def stream_stats(self):
+        # type: () -> Dict[str, float]
+        with self._stats_lock:
+            return {
+                "streamed": self.streamed,
+                "aborted": self.aborted,
+                "avg_ttft": round(self.ttft_total / self.streamed, 3) if self.streamed else 0.0,
+            }
+
+    def _record_stream(self, response):
+        # type: (LLMResponse) -> None
+        with self._stats_lock:
+            self.streamed += 1
+            self.aborted += int(response.aborted)
+            self.ttft_total += response.ttft or 0.0
+        logger.debug(
+            "Streamed response: ttft %.2fs, total %.2fs%s",
+            response.ttft or 0.0, response.latency, " (aborted)" if response.aborted else "",
+        )
+
+    def _record_usage(self, usage):
+        # type: (Dict[str, Any]) -> None
+        with self._stats_lock:
+            for name in USAGE_FIELDS:
+                self.usage_totals[name] += usage.get(name) or 0
+        if usage.get("cache_read_input_tokens") or usage.get("cache_creation_input_tokens"):
+            logger.debug(
+                "Prompt cache: %d tokens read, %d written",
+                usage.get("cache_read_input_tokens") or 0,
+                usage.get("cache_creation_input_tokens") or 0,
+            )
+
+    def prune_cache(self):
+        # type: () -> int
+        try:
+            return evict_llm_cache(self.cache_max_bytes, self.cache_ttl)
+        except sqlite3.Error as e:
+            logger.debug("LLM cache eviction failed: %s", e)
+            return 0
+
+    def _send(self, body, stream=False, should_abort=None):
+        # type: (Dict[str, Any], bool, Optional[Callable[[str], bool]]) -> LLMResponse
+        if stream:
+            body = dict(body, stream=True)
+        data = json.dumps(body).encode("utf-8")
+        estimate = _estimate_input_tokens(body)
+        start = time.monotonic()
+        attempt = 0
+
+        with track(LLM):
+            while True:
+                self.limiter.acquire(estimate)
+                try:
+                    if stream:
+                        result = self._stream(data, should_abort)
+                    else:
+                        result = self._post(data)
+                except AnthropicAPIError as e:
+                    self.limiter.settle(estimate, 0)
+                    if not e.retryable or attempt >= self.max_retries:
+                        e.retries = attempt
+                        raise
+                    delay = _backoff_delay(attempt, e.retry_after)
+                    if e.status == 429:
+                        self.limiter.penalize(delay)
+                    logger.warning(
+                        "Anthropic API %s, retrying in %.1fs (attempt %d/%d)",
+                        e.status or "network error", delay, attempt + 1, self.max_retries,
+                    )
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                break
+
+        usage = result.get("usage") or {}
+        self._record_usage(usage)
+        # Cache reads don't count toward the input-token rate limit; writes do.
+        if "input_tokens" in usage:
+            self.limiter.settle(
+                estimate,
+                usage["input_tokens"] + (usage.get("cache_creation_input_tokens") or 0),
+            )
+        response = LLMResponse(
+            text=message_text(result),
+            model=result.get("model") or body["model"],
+            stop_reason=result.get("stop_reason") or "",
+            usage=usage,
+            latency=time.monotonic() - start,
+            retries=attempt,
+            ttft=result.get("ttft"),
+            aborted=result.get("aborted", False),
+        )
+        if stream:
+            self._record_stream(response)
+        return response
+
+    def _post(self, data):
+        # type: (bytes) -> Dict[str, Any]
+        return json.loads(self.request("POST", self.api_url, data).decode("utf-8"))
+
+    def _stream(self, data, should_abort=None):
+        # type: (bytes, Optional[Callable[[str], bool]]) -> Dict[str, Any]
+        """POST a streaming request and rebuild the message from its events.
+
+        Returns a message dict shaped like the non-streaming response plus
+        "ttft" and "aborted". An aborted stream's connection is dropped
+        rather than returned to the pool.
+        """
+        sent = time.monotonic()
+        message = {"content": [], "usage": {}}  # type: Dict[str, Any]
+        blocks = {}  # type: Dict[int, List[str]]
+        try:
+            with self._pool.request("POST", self.api_url, headers=self._headers(),
+                                    body=data, timeout=self.timeout) as resp:
+                if resp.status >= 400:
+                    raise AnthropicAPIError(
+                        "Anthropic API error %d: %s" % (
+                            resp.status, resp.read().decode("utf-8", errors="replace")),
+                        status=resp.status,
+                        retry_after=_parse_retry_after(resp.headers.get("retry-after")),
+                    )
+                for event in _iter_sse(counted(LLM, resp.iter_chunks())):
+                    kind = event.get("type")
+                    if kind == "message_start":
+                        start = event.get("message") or {}
+                        message["model"] = start.get("model")
+                        message["usage"].update(start.get("usage") or {})
+                    elif kind == "content_block_delta":
+                        delta = event.get("delta") or {}
+                        if delta.get("type") != "text_delta":
+                            continue
+                        if "ttft" not in message:
+                            message["ttft"] = time.monotonic() - sent
+                        blocks.setdefault(event.get("index", 0), []).append(delta["text"])
+                        if should_abort is not None and should_abort(delta["text"]):
+                            message["aborted"] = True
+                            break
+                    elif kind == "message_delta":
+                        message["stop_reason"] = (event.get("delta") or {}).get("stop_reason")
+                        message["usage"].update(event.get("usage") or {})
+                    elif kind == "error":
+                        error = event.get("error") or {}
+                        raise AnthropicAPIError(
+                            "Anthropic API stream error: %s" % error.get("message", error),
+                            status=529 if error.get("type") == "overloaded_error" else 500,
+                            partial=bool(blocks),
+                        )
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise AnthropicAPIError(
+                "Network error reading Anthropic API stream: %s" % e, partial=bool(blocks)
+            )
+
+        message["content"] = [
+            {"type": "text", "text": "".join(blocks[i])} for i in sorted(blocks)
+        ]
+        return message
+
+    def request(self, method, url, data=None):
+        # type: (str, str, Optional[bytes]) -> bytes
+        """Authenticated API call returning the raw body; raises AnthropicAPIError."""
+        try:
+            with self._pool.request(method, url, headers=self._headers(),
+                                    body=data, timeout=self.timeout) as resp:
+                raw = resp.read()
+                add_bytes(LLM, len(raw))
+                status = resp.status
+                retry_after = resp.headers.get("retry-after")
+        except (OSError, http.client.HTTPException) as e:
+            raise AnthropicAPIError("Network error calling Anthropic API: %s" % e)
+
+        if status >= 400:
+            raise AnthropicAPIError(
+                "Anthropic API error %d: %s" % (status, raw.decode("utf-8", errors="replace")),
+                status=status,
+                retry_after=_parse_retry_after(retry_after),
+            )
+        return raw
+
+    def close(self):
+        # type: () -> None
+        self._pool.clear()
+
+
+_client = None  # type: Optional[AnthropicClient]
+_client_lock = threading.Lock()
+
+
+def get_client():
+    # type: () -> AnthropicClient
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AnthropicClient(
+                timeout=get_pipeline_setting("llm", "timeout", 120),
+                max_connections=get_pipeline_setting("llm", "max_connections", 8),
+                cache_enabled=(
+                    get_pipeline_setting("llm", "cache", True)
+                    and os.environ.get("AI_LLM_CACHE", "1") != "0"
+                ),
+                cache_ttl=int(get_pipeline_setting("llm", "cache_ttl_hours", 24 * 30) * 3600),
+                cache_max_bytes=int(get_pipeline_setting("llm", "cache_max_mb", 256)) * 1024 * 1024,
+                max_retries=int(get_pipeline_setting("llm", "max_retries", 4)),
+                limiter=RateLimiter(
+                    requests_per_minute=get_pipeline_setting("llm", "requests_per_minute", 50),
+                    tokens_per_minute=get_pipeline_setting("llm", "input_tokens_per_minute", 30000),
+                ),
+                telemetry=get_pipeline_setting("llm", "telemetry", True),
+            )
+        return _client
+
+
+def call_claude(prompt, system=None, model=DEFAULT_MODEL,
+                max_tokens=DEFAULT_MAX_TOKENS, temperature=0.3, use_cache=None,
+                stream=False, should_abort=None, kind=None, video_id=None,
+                aborted_text=None):
+    # type: (str, Optional[SystemPrompt], str, int, float, Optional[bool], bool, Optional[Callable[[str], bool]], Optional[str], Optional[str], Optional[str]) -> str
+    return get_client().create_message(
+        prompt, system=system, model=model,
+        max_tokens=max_tokens, temperature=temperature, use_cache=use_cache,
+        stream=stream, should_abort=should_abort, kind=kind, video_id=video_id,
+        aborted_text=aborted_text,
+    ).text
@@ -0,0 +1,80 @@
+"""
+Token-bucket limiter for API requests per minute and tokens per minute.
+
+Both buckets refill continuously. acquire() blocks until one request and
+the estimated token count fit; settle() corrects the token bucket once
+the real usage is known.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class _Bucket(object):
+    def __init__(self, per_minute):
+        # type: (float) -> None
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        # type: (float) -> None
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # type: (float) -> float
+        # Requests larger than the whole bucket wait for a full bucket only.
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+
+class RateLimiter(object):
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0):
+        # type: (float, float) -> None
+        """A limit of 0 disables that bucket."""
+        self._requests = _Bucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = _Bucket(tokens_per_minute) if tokens_per_minute else None
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens=0):
+        # type: (int) -> float
+        """Block until the request fits; returns seconds spent waiting."""
+        waited = 0.0
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                delay = 0.0
+                for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                    if bucket is not None:
+                        bucket.refill(now)
+                        delay = max(delay, bucket.wait_time(amount))
+                if delay <= 0:
+                    if self._requests is not None:
+                        self._requests.level -= 1
+                    if self._tokens is not None:
+                        self._tokens.level -= tokens
+                    return waited
+                self._cond.wait(delay)
+                waited += time.monotonic() - now
+
+    def settle(self, estimated, actual):
+        # type: (int, Optional[int]) -> None
+        if self._tokens is None or actual is None:
+            return
+        with self._cond:
+            self._tokens.level -= actual - estimated
+            self._cond.notify_all()
+
+    def penalize(self, seconds):
+        # type: (float) -> None
+        """Drain the request bucket so nobody sends for `seconds` (after a 429)."""
+        if self._requests is None:
+            return
+        with self._cond:
+            self._requests.refill(time.monotonic())
+            self._requests.level = min(self._requests.level, -seconds * self._requests.rate)
@@ -0,0 +1,242 @@
+"""
+Per-scan metrics for each kind of work a scan does.
+
+Call sites wrap one unit of work in `track(component)` and report bytes
+fetched or written with `add_bytes()`; both do nothing outside a
+`begin_scan()` / `end_scan()` pair, and only one scan per process
+collects at a time. A component's wall time runs from the start of its
+first unit to the end of its last, so with concurrent stages it shows
+when the work happened, and busy time shows how much of it there was.
+"""
+
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+FEEDS = "feeds"
+TRANSCRIPTS = "transcripts"
+LLM = "llm"
+DOCS = "docs"
+DB = "db"
+CURRICULUM = "curriculum"
+COMPONENTS = (FEEDS, TRANSCRIPTS, LLM, DOCS, DB, CURRICULUM)
+# Row for the scan as a whole
+TOTAL = "total"
+
+_METRIC_PREFIX = "ai_scan"
+
+
+def peak_rss_bytes():
+    # type: () -> int
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class ComponentMetrics:
+    stage: str
+    items: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    bytes: int = 0
+    # Process high-water mark when the component last finished a unit.
+    peak_rss_bytes: int = 0
+    first_start: Optional[float] = None
+    last_end: Optional[float] = None
+
+    @property
+    def wall_seconds(self):
+        # type: () -> float
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    def to_dict(self):
+        # type: () -> Dict[str, Any]
+        return {
+            "stage": self.stage,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items": self.items,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "peak_rss_bytes": self.peak_rss_bytes,
+        }
+
+
+class Operation(object):
+    """One tracked unit of work; set `failed` for errors that don't raise."""
+
+    def __init__(self):
+        self.failed = False
+
+
+class ScanMetrics(object):
+    def __init__(self):
+        self.started = time.monotonic()
+        self.components = dict((name, ComponentMetrics(name)) for name in COMPONENTS)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, component):
+        # type: (str) -> Iterator[Operation]
+        op = Operation()
+        start = time.monotonic()
+        try:
+            yield op
+        except BaseException:
+            op.failed = True
+            raise
+        finally:
+            end = time.monotonic()
+            rss = peak_rss_bytes()
+            with self._lock:
+                m = self.components[component]
+                m.items += 1
+                m.errors += int(op.failed)
+                m.busy_seconds += end - start
+                if m.first_start is None or start < m.first_start:
+                    m.first_start = start
+                if m.last_end is None or end > m.last_end:
+                    m.last_end = end
+                m.peak_rss_bytes = max(m.peak_rss_bytes, rss)
+
+    def add_bytes(self, component, count):
+        # type: (str, int) -> None
+        with self._lock:
+            self.components[component].bytes += count
+
+    def to_list(self):
+        # type: () -> List[Dict[str, Any]]
+        """One row per component plus the scan total, in COMPONENTS order."""
+        with self._lock:
+            rows = [self.components[name].to_dict() for name in COMPONENTS]
+        rows.append({
+            "stage": TOTAL,
+            "wall_seconds": round(time.monotonic() - self.started, 3),
+            "busy_seconds": round(sum(r["busy_seconds"] for r in rows), 3),
+            "items": 0,
+            "errors": sum(r["errors"] for r in rows),
+            "bytes": sum(r["bytes"] for r in rows),
+            "peak_rss_bytes": peak_rss_bytes(),
+        })
+        return rows
+
+
+_current = None  # type: Optional[ScanMetrics]
+_current_lock = threading.Lock()
+
+
+def begin_scan():
+    # type: () -> ScanMetrics
+    """Start collecting; raises RuntimeError while another scan is collecting."""
+    global _current
+    with _current_lock:
+        if _current is not None:
+            raise RuntimeError("a scan is already being measured; call end_scan() first")
+        _current = ScanMetrics()
+        return _current
+
+
+def end_scan():
+    # type: () -> None
+    global _current
+    with _current_lock:
+        _current = None
+
+
+def current_scan():
+    # type: () -> Optional[ScanMetrics]
+    return _current
+
+
+@contextmanager
+def track(component):
+    # type: (str) -> Iterator[Operation]
+    metrics = _current
+    if metrics is None:
+        yield Operation()
+        return
+    with metrics.track(component) as op:
+        yield op
+
+
+def add_bytes(component, count):
+    # type: (str, int) -> None
+    metrics = _current
+    if metrics is not None and count:
+        metrics.add_bytes(component, count)
+
+
+def counted(component, chunks):
+    # type: (str, Iterable[bytes]) -> Iterator[bytes]
+    """Pass chunks of a response body through, counting their bytes."""
+    for chunk in chunks:
+        add_bytes(component, len(chunk))
+        yield chunk
+
+
+# ─── Text Exposition ─────────────────────────────────────────────
+
+_STAGE_METRICS = (
+    ("wall_seconds", "Seconds from the stage's first unit of work to its last."),
+    ("busy_seconds", "Seconds spent in the stage, summed over threads."),
+    ("items", "Units of work the stage ran."),
+    ("errors", "Units of work that failed."),
+    ("bytes", "Bytes fetched (feeds, transcripts, llm) or written (docs)."),
+    ("peak_rss_bytes", "Peak resident set size of the scan process during the stage."),
+)
+
+_SCAN_METRICS = (
+    ("videos_checked", "New videos found by the last scan."),
+    ("relevant_found", "Relevant videos in the last scan."),
+    ("workflows_generated", "Workflows stored by the last scan."),
+    ("completed_timestamp_seconds", "Unix time the last scan finished."),
+)
+
+
+def _sample(value):
+    # type: (Any) -> str
+    if value is None:
+        return "NaN"
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(int(value))
+
+
+def render_exposition(scan, stages, gauges=None):
+    # type: (Optional[Dict[str, Any]], List[Dict[str, Any]], Optional[Dict[str, Any]]) -> str
+    """Prometheus text format for the last scan and its stage rows.
+
+    `gauges` maps extra metric names (already prefixed) to (help, value).
+    """
+    lines = []  # type: List[str]
+
+    def family(name, help_text, samples):
+        lines.append("# HELP %s %s" % (name, help_text))
+        lines.append("# TYPE %s gauge" % name)
+        lines.extend(samples)
+
+    if scan is not None:
+        name = "%s_info" % _METRIC_PREFIX
+        family(name, "The last scan; always 1.", [
+            '%s{scan_id="%s",scan_date="%s"} 1'
+            % (name, scan.get("scan_id") or "", scan.get("scan_date") or "")
+        ])
+        for key, help_text in _SCAN_METRICS:
+            name = "%s_%s" % (_METRIC_PREFIX, key)
+            family(name, help_text, ["%s %s" % (name, _sample(scan.get(key)))])
+    for key, help_text in _STAGE_METRICS:
+        name = "%s_stage_%s" % (_METRIC_PREFIX, key)
+        family(name, help_text, [
+            '%s{stage="%s"} %s' % (name, row["stage"], _sample(row.get(key))) for row in stages
+        ])
+    for name, (help_text, value) in sorted((gauges or {}).items()):
+        family(name, help_text, ["%s %s" % (name, _sample(value))])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,150 @@
+"""
+Concurrent stages joined by bounded queues.
+
+Each stage has its own worker threads and an input queue of limited
+size, so a slow stage blocks the stage feeding it instead of letting work
+pile up in memory. Items flow downstream as soon as they are emitted,
+which lets the first video reach analysis while feeds are still loading.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger("stages")
+
+DEFAULT_QUEUE_SIZE = 16
+
+_STOP = object()
+
+Emit = Callable[[Any], None]
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    # Seconds from the start of the run until this stage drained, summed over runs.
+    wall_seconds: float = 0.0
+    # Longest time a worker spent blocked handing an item downstream.
+    max_blocked_seconds: float = 0.0
+
+    def to_dict(self):
+        # type: () -> Dict[str, Any]
+        result = asdict(self)
+        result["busy_seconds"] = round(self.busy_seconds, 3)
+        result["wall_seconds"] = round(self.wall_seconds, 3)
+        result["max_blocked_seconds"] = round(self.max_blocked_seconds, 3)
+        return result
+
+
+class Stage(object):
+    def __init__(self, name, func, workers=1, queue_size=None):
+        # type: (str, Callable[[Any, Emit], None], int, Optional[int]) -> None
+        """func(item, emit) processes one item and calls emit() for each output."""
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.queue_size = queue_size
+        self.stats = StageStats(name=name, workers=self.workers)
+        self._lock = threading.Lock()
+
+
+def _run_worker(stage, inbox, outbox, on_exit):
+    # type: (Stage, queue.Queue, Optional[queue.Queue], Callable[[], None]) -> None
+    stats = stage.stats
+
+    def emit(item):
+        # type: (Any) -> None
+        if outbox is not None:
+            start = time.monotonic()
+            outbox.put(item)
+            blocked = time.monotonic() - start
+        else:
+            blocked = 0.0
+        with stage._lock:
+            stats.items_out += 1
+            stats.max_blocked_seconds = max(stats.max_blocked_seconds, blocked)
+
+    try:
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            start = time.monotonic()
+            try:
+                stage.func(item, emit)
+                failed = False
+            except Exception as e:
+                logger.error("Stage %s failed on %.120r: %s", stage.name, item, e)
+                failed = True
+            with stage._lock:
+                stats.items_in += 1
+                stats.errors += int(failed)
+                stats.busy_seconds += time.monotonic() - start
+    finally:
+        on_exit()
+
+
+def run_stages(stages, items, queue_size=DEFAULT_QUEUE_SIZE):
+    # type: (List[Stage], Iterable[Any], int) -> List[StageStats]
+    """Push `items` through `stages` in order and wait for every stage to drain.
+
+    Outputs of the last stage are only counted; collect results from
+    inside its function.
+    """
+    inboxes = [queue.Queue(maxsize=s.queue_size or queue_size) for s in stages]
+    threads = []  # type: List[threading.Thread]
+    start = time.monotonic()
+
+    for index, stage in enumerate(stages):
+        outbox = inboxes[index + 1] if index + 1 < len(stages) else None
+        downstream_workers = stages[index + 1].workers if outbox is not None else 0
+        remaining = [stage.workers]
+        lock = threading.Lock()
+
+        def on_exit(stage=stage, outbox=outbox, downstream_workers=downstream_workers,
+                    remaining=remaining, lock=lock):
+            # The last worker out tells every worker of the next stage to stop.
+            with lock:
+                remaining[0] -= 1
+                done = remaining[0] == 0
+            if done:
+                # Adds up when the same stage is run again for a second pass.
+                stage.stats.wall_seconds += time.monotonic() - start
+                for _ in range(downstream_workers):
+                    outbox.put(_STOP)
+
+        for n in range(stage.workers):
+            thread = threading.Thread(
+                target=_run_worker,
+                args=(stage, inboxes[index], outbox, on_exit),
+                name="%s-%d" % (stage.name, n),
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+
+    for item in items:
+        inboxes[0].put(item)
+    for _ in range(stages[0].workers):
+        inboxes[0].put(_STOP)
+
+    for thread in threads:
+        thread.join()
+
+    for stage in stages:
+        s = stage.stats
+        logger.info(
+            "Stage %-10s %4d in, %4d out, %3d errors, busy %.2fs, done at %.2fs (workers=%d)",
+            s.name, s.items_in, s.items_out, s.errors, s.busy_seconds, s.wall_seconds, s.workers,
+        )
+    return [stage.stats for stage in stages]
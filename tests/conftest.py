@@ -0,0 +1,53 @@
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Point PROJECT_ROOT at a scratch tree before anything under src is
+# imported, so tests never touch ~/automation-intelligence.
+_PROJECT_ROOT = Path(tempfile.mkdtemp(prefix="ai-tests-"))
+shutil.copytree(str(REPO_ROOT / "config"), str(_PROJECT_ROOT / "config"))
+os.environ["AI_PROJECT_ROOT"] = str(_PROJECT_ROOT)
+sys.path.insert(0, str(REPO_ROOT))
+
+
+@pytest.fixture
+def project_root():
+    return _PROJECT_ROOT
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh database for one test."""
+    from src.utils import database
+
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "test.db")
+    database.init_db()
+    return database
+
+
+@pytest.fixture
+def pipeline_settings(monkeypatch):
+    """Override config/pipeline.yaml values: pipeline_settings(section, key, value)."""
+    from src.utils import config
+
+    settings = {}  # type: dict
+    original = config._load_pipeline_config()
+
+    def fake():
+        merged = dict((k, dict(v) if isinstance(v, dict) else v) for k, v in original.items())
+        for (section, key), value in settings.items():
+            merged.setdefault(section, {})[key] = value
+        return merged
+
+    monkeypatch.setattr(config, "_load_pipeline_config", fake)
+
+    def set_value(section, key, value):
+        settings[(section, key)] = value
+
+    return set_value
@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+
+from src.processors import analysis_executor
+
+
+def test_failed_analyses_are_left_out(monkeypatch):
+    def fake_analyze(video):
+        if video.video_id == "bad":
+            raise RuntimeError("LLM call failed after 4 retries")
+        if video.video_id == "none":
+            return None
+        return {"has_workflow": True}
+
+    monkeypatch.setattr(analysis_executor, "analyze_video", fake_analyze)
+    videos = [SimpleNamespace(video_id=v, title=v) for v in ("ok", "bad", "none")]
+    results = analysis_executor.analyze_videos(videos, workers=2)
+    assert [(v.video_id, a) for v, a in results] == [
+        ("ok", {"has_workflow": True}),
+        ("none", None),
+    ]
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from src.monitors.youtube_monitor import VideoInfo
+from src.processors import batch_analyzer
+
+
+def succeeded(custom_id, has_workflow):
+    text = json.dumps({"has_workflow": has_workflow, "title": "Workflow"})
+    return {"custom_id": custom_id, "result": {"type": "succeeded", "message": {
+        "model": "claude-test", "content": [{"type": "text", "text": text}],
+        "usage": {"input_tokens": 10, "output_tokens": 5},
+    }}}
+
+
+class FakeTransport(batch_analyzer.BatchTransport):
+    def __init__(self, fail=False, entries=()):
+        self.fail = fail
+        self.entries = list(entries)
+        self.submitted = []
+
+    def submit(self, requests):
+        if self.fail:
+            raise ConnectionError("batches endpoint unreachable")
+        self.submitted.append(requests)
+        return "msgbatch_1"
+
+    def status(self, batch_id):
+        if self.entries:
+            return {"processing_status": batch_analyzer.BATCH_ENDED}
+        return {"processing_status": batch_analyzer.BATCH_IN_PROGRESS}
+
+    def results(self, batch_id):
+        return iter(self.entries)
+
+
+# v0 has a workflow, v1 has none, v2 errored and v3 is missing from the results.
+ENTRIES = [
+    succeeded("v0", True),
+    succeeded("v1", False),
+    {"custom_id": "v2", "result": {"type": "errored", "error": {"type": "overloaded_error"}}},
+]
+
+
+def videos(count=2):
+    return [
+        VideoInfo(video_id="v%d" % n, title="Video %d" % n, channel_name="Channel",
+                  channel_id="UC1", published="", url="https://youtu.be/v%d" % n,
+                  transcript="step one, then step two")
+        for n in range(count)
+    ]
+
+
+def test_transport_is_abstract():
+    with pytest.raises(TypeError):
+        batch_analyzer.BatchTransport()
+
+
+def test_pending_batch_videos_are_not_rediscovered(db):
+    transport = FakeTransport()
+    assert batch_analyzer.submit_analysis_batch(videos(), transport) == "msgbatch_1"
+    assert set(db.get_analysis_batch_items("msgbatch_1")) == {"v0", "v1"}
+    assert db.filter_processed_video_ids(["v0", "v1"]) == {"v0", "v1"}
+    # Nothing is marked processed until a result comes back.
+    db.set_analysis_batch_status("msgbatch_1", "completed")
+    assert db.filter_processed_video_ids(["v0", "v1"]) == set()
+
+
+def test_failed_submit_leaves_videos_unprocessed(db):
+    with pytest.raises(ConnectionError):
+        batch_analyzer.submit_analysis_batch(videos(), FakeTransport(fail=True))
+    assert db.filter_processed_video_ids(["v0", "v1"]) == set()
+
+
+def test_collect_returns_only_succeeded_requests(db):
+    transport = FakeTransport(entries=ENTRIES)
+    batch_analyzer.submit_analysis_batch(videos(4), transport)
+    results = batch_analyzer.collect_batch_results("msgbatch_1", transport)
+    assert [(video.video_id, bool(analysis)) for video, analysis in results] == [
+        ("v0", True), ("v1", False)]
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.monitors import channel_scheduler
+
+NOW = datetime(2026, 10, 1, 12, 0, 0)
+CHANNELS = [{"name": "A", "channel_id": "UCa"}, {"name": "B", "channel_id": "UCb"},
+            {"name": "C", "channel_id": "UCc"}]
+
+
+@pytest.fixture
+def limits(pipeline_settings):
+    pipeline_settings("scheduler", "polls_per_upload", 4)
+    pipeline_settings("scheduler", "min_interval_hours", 1)
+    pipeline_settings("scheduler", "max_interval_hours", 48)
+    pipeline_settings("scheduler", "priority_factors", {"high": 0.5, "medium": 1.0, "low": 2.0})
+    return pipeline_settings
+
+
+def entries(*hours_ago):
+    return [{"published": (NOW - timedelta(hours=h)).isoformat() + "Z"} for h in hours_ago]
+
+
+def test_upload_cadence_is_the_median_gap():
+    assert channel_scheduler.upload_cadence_hours(entries(0, 24, 72, 96)) == 24.0
+    assert channel_scheduler.upload_cadence_hours(entries(5)) is None
+
+
+@pytest.mark.parametrize("cadence, priority, expected", [
+    (24, "medium", 6.0),
+    (24, "high", 3.0),
+    (24, "low", 12.0),
+    (2, "high", 1.0),      # 0.25h clamped up to the minimum
+    (168, "low", 48.0),    # 84h clamped down to the maximum
+    (336, "high", 42.0),   # the factor applies before the maximum
+    (24, None, 6.0),
+])
+def test_poll_interval(limits, cadence, priority, expected):
+    assert channel_scheduler.poll_interval_hours(cadence, priority) == expected
+
+
+def test_only_due_channels_are_selected(db, limits):
+    channel_scheduler.record_channel_poll(CHANNELS[0], entries(0, 24, 48), True, now=NOW)
+    channel_scheduler.record_channel_poll(CHANNELS[1], entries(0, 4, 8), True, now=NOW)
+
+    # A is due 6h after the poll, B after 1h and C was never polled.
+    later = NOW + timedelta(hours=2)
+    due = channel_scheduler.select_due_channels(CHANNELS, now=later)
+    assert [c["channel_id"] for c in due] == ["UCb", "UCc"]
+    due = channel_scheduler.select_due_channels(CHANNELS, now=NOW + timedelta(hours=6))
+    assert len(due) == 3
+
+
+def test_poll_without_dates_keeps_the_previous_cadence(db, limits):
+    channel_scheduler.record_channel_poll(CHANNELS[0], entries(0, 8, 16), True, now=NOW)
+    next_due = channel_scheduler.record_channel_poll(CHANNELS[0], [], False, now=NOW)
+    assert next_due == NOW + timedelta(hours=2)
+    schedule = db.get_channel_schedule("UCa")
+    assert schedule["upload_interval_hours"] == 8.0
+    assert schedule["last_new_video_at"] == NOW.isoformat()
+
+
+def test_force_and_disabled_select_every_channel(db, limits):
+    for channel in CHANNELS:
+        channel_scheduler.record_channel_poll(channel, entries(0, 24), True, now=NOW)
+    assert channel_scheduler.select_due_channels(CHANNELS, now=NOW) == []
+    assert channel_scheduler.select_due_channels(CHANNELS, now=NOW, force=True) == CHANNELS
+    limits("scheduler", "enabled", False)
+    assert channel_scheduler.select_due_channels(CHANNELS, now=NOW) == CHANNELS
@@ -0,0 +1,21 @@
+from src.utils import config
+
+
+def test_pipeline_setting_read_once_until_reload(project_root):
+    path = project_root / "config" / "pipeline.yaml"
+    original = path.read_text()
+    config.reload_pipeline_config()
+    try:
+        assert config.get_pipeline_setting("monitor", "feed_timeout") == 15
+        path.write_text(original.replace("feed_timeout: 15", "feed_timeout: 99"))
+        assert config.get_pipeline_setting("monitor", "feed_timeout") == 15
+        config.reload_pipeline_config()
+        assert config.get_pipeline_setting("monitor", "feed_timeout") == 99
+    finally:
+        path.write_text(original)
+        config.reload_pipeline_config()
+
+
+def test_missing_setting_uses_default():
+    assert config.get_pipeline_setting("monitor", "no_such_key", 7) == 7
+    assert config.get_pipeline_setting("no_such_section", "key") is None
@@ -0,0 +1,70 @@
+from src.generators import curriculum_builder
+
+
+def add_workflow(db, title, tools=(), score=5, level="beginner", use_case="data-ops"):
+    return db.insert_workflow({
+        "source_url": "https://youtu.be/%s" % title, "source_title": title,
+        "skill_level": level, "use_case": use_case, "value_score": score, "tools": list(tools),
+    })
+
+
+def set_title(db, workflow_id, title):
+    conn = db.get_connection()
+    try:
+        with conn:
+            conn.execute("UPDATE workflows SET source_title = ? WHERE id = ?", (title, workflow_id))
+    finally:
+        conn.close()
+
+
+def digests(db):
+    return dict(((g["skill_level"], g["use_case"]), g["digest"])
+                for g in db.get_curriculum_fingerprints())
+
+
+def test_fingerprints_group_and_count(db):
+    add_workflow(db, "One")
+    add_workflow(db, "Two")
+    add_workflow(db, "Three", level="advanced")
+    groups = db.get_curriculum_fingerprints()
+    assert [(g["skill_level"], g["use_case"], g["count"]) for g in groups] == [
+        ("advanced", "data-ops", 1), ("beginner", "data-ops", 2),
+    ]
+
+
+def test_digest_sees_same_length_title_and_tool_changes(db):
+    wf = add_workflow(db, "Sheet to CRM", tools=["Zapier"])
+    add_workflow(db, "Other", score=7)
+    before = digests(db)
+
+    set_title(db, wf, "Sheet to ERP")
+    after_title = digests(db)
+    assert after_title != before
+
+    conn = db.get_connection()
+    try:
+        with conn:
+            conn.execute("INSERT INTO tools(name) VALUES ('Make')")
+            conn.execute("INSERT INTO workflow_tools(workflow_id, tool_id) "
+                         "SELECT ?, id FROM tools WHERE name = 'Make'", (wf,))
+    finally:
+        conn.close()
+    after_tools = digests(db)
+    assert after_tools != after_title
+
+    add_workflow(db, "Later", level="advanced")
+    assert digests(db)[("beginner", "data-ops")] == after_tools[("beginner", "data-ops")]
+
+
+def test_rebuild_picks_up_edited_title(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(curriculum_builder, "CURRICULUM_DIR", tmp_path / "curriculum")
+    monkeypatch.setattr(curriculum_builder, "STATE_FILE", tmp_path / "state.json")
+    wf = add_workflow(db, "Sheet to CRM", tools=["Zapier"])
+    curriculum_builder.rebuild_curriculum()
+    index = tmp_path / "curriculum" / "INDEX.md"
+    assert "Sheet to CRM" in index.read_text()
+
+    set_title(db, wf, "Sheet to ERP")
+    curriculum_builder.rebuild_curriculum()
+    assert "Sheet to ERP" in index.read_text()
+    assert "Sheet to CRM" not in index.read_text()
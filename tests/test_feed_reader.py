@@ -0,0 +1,139 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.monitors import feed_reader, youtube_monitor
+from src.utils import http_client
+
+NOW = datetime(2026, 10, 1, 12, 0, 0)
+
+
+def make_feed(days_ago):
+    """An Atom feed with one entry per age in `days_ago`, newest first."""
+    entries = []
+    for n, days in enumerate(days_ago):
+        entries.append(
+            "<entry><yt:videoId>vid%d</yt:videoId><title>Video %d</title>"
+            "<published>%s+00:00</published></entry>"
+            % (n, n, (NOW - timedelta(days=days)).isoformat())
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:yt="http://www.youtube.com/xml/schemas/2015">'
+        "<title>Channel</title>%s</feed>" % "".join(entries)
+    ).encode("utf-8")
+
+
+class FeedServer(object):
+    """Serves one feed body with an ETag and answers If-None-Match with 304."""
+
+    def __init__(self, body):
+        self.body = body
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                etag = '"%s"' % hashlib.sha256(server.body).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%d/feed" % self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        http_client._default_pool.clear()
+
+
+def chunks(body, size=64):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def test_read_feed_stops_at_cutoff():
+    body = make_feed([1, 2, 3, 10, 11, 12])
+    feed = feed_reader.read_feed(chunks(body), cutoff=NOW - timedelta(days=5))
+    # Parsing stops at the first entry older than the cutoff, which is kept.
+    assert [e["video_id"] for e in feed.entries] == ["vid0", "vid1", "vid2", "vid3"]
+    assert not feed.complete
+    assert feed.title == "Channel"
+
+
+def test_read_feed_min_entries_reads_past_cutoff():
+    body = make_feed([1, 10, 11, 12])
+    feed = feed_reader.read_feed(chunks(body), cutoff=NOW - timedelta(days=5), min_entries=3)
+    assert len(feed.entries) == 3
+
+
+def test_fetch_feed_hashes_whole_body_and_returns_connection():
+    body = make_feed([1] + [20] * 200)
+    with FeedServer(body) as server:
+        feed = feed_reader.fetch_feed(server.url, cutoff=NOW - timedelta(days=5))
+        assert len(feed.entries) == 2
+        assert feed.content_hash == hashlib.sha256(body).hexdigest()
+        # Stopping early did not leave unread bytes on the connection.
+        assert sum(len(c) for c in http_client._default_pool._idle.values()) == 1
+
+        same = feed_reader.fetch_feed(server.url, known_hash=feed.content_hash)
+        assert same.unchanged and same.entries == []
+        assert sum(len(c) for c in http_client._default_pool._idle.values()) == 1
+
+
+def test_fetch_feed_rejects_oversized_body():
+    with FeedServer(make_feed([1] * 50)) as server:
+        with pytest.raises(ValueError):
+            feed_reader.fetch_feed(server.url, max_bytes=1024)
+
+
+def test_download_feed_refetches_when_cutoff_widens(db, monkeypatch):
+    body = make_feed([1, 2, 10, 11, 12, 13, 30, 31])
+    with FeedServer(body) as server:
+        monkeypatch.setattr(youtube_monitor, "RSS_TEMPLATE", server.url + "?c={channel_id}")
+        monkeypatch.setattr(youtube_monitor, "FEED_MIN_ENTRIES", 0)
+
+        entries, status = youtube_monitor._download_feed("UC1", 5, cutoff=NOW - timedelta(days=5))
+        assert status == "miss" and len(entries) == 3
+        assert db.get_feed_cache("UC1")["entries_cutoff"] is not None
+
+        # Same window: conditional request, 304, cached entries.
+        entries, status = youtube_monitor._download_feed("UC1", 5, cutoff=NOW - timedelta(days=4))
+        assert status == "not-modified" and len(entries) == 3
+        assert "If-None-Match" in server.requests[-1]
+
+        # Wider window: the cached entries stop too early, so the 304 path is skipped.
+        entries, status = youtube_monitor._download_feed("UC1", 5, cutoff=NOW - timedelta(days=20))
+        assert status == "miss" and len(entries) == 7
+        assert "If-None-Match" not in server.requests[-1]
+
+        # No cutoff at all needs the complete feed.
+        entries, status = youtube_monitor._download_feed("UC1", 5)
+        assert status == "miss" and len(entries) == 8
+        assert db.get_feed_cache("UC1")["entries_cutoff"] is None
+
+        entries, status = youtube_monitor._download_feed("UC1", 5, cutoff=NOW - timedelta(days=20))
+        assert status == "not-modified" and len(entries) == 8
@@ -0,0 +1,113 @@
+import http.client
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.utils import http_client
+
+
+class DroppingServer(object):
+    """Answers the first request on each connection and drops the second unanswered,
+    like a server closing an idle keep-alive connection as a request arrives.
+    With drop=False every request is answered."""
+
+    def __init__(self, drop=True):
+        self.requests = []
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                BaseHTTPRequestHandler.setup(self)
+                self.handled = 0
+                server.connections += 1
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                server.requests.append(self.command)
+                self.handled += 1
+                if drop and self.handled > 1:
+                    self.close_connection = True
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%d/" % self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def fetch(pool, method, url):
+    with pool.request(method, url, body=b"{}" if method == "POST" else None) as resp:
+        return resp.read()
+
+
+def test_connections_are_reused():
+    pool = http_client.ConnectionPool()
+    with DroppingServer(drop=False) as server:
+        for method in ("GET", "POST", "GET"):
+            assert fetch(pool, method, server.url) == b"ok"
+        assert server.connections == 1
+        # A response abandoned part-way closes its connection instead.
+        pool.request("GET", server.url).close()
+        assert fetch(pool, "GET", server.url) == b"ok"
+        assert server.connections == 2
+    pool.clear()
+
+
+def test_get_is_resent_after_a_dropped_keep_alive_connection():
+    pool = http_client.ConnectionPool()
+    with DroppingServer() as server:
+        assert fetch(pool, "GET", server.url) == b"ok"
+        assert fetch(pool, "GET", server.url) == b"ok"
+        assert server.requests == ["GET", "GET", "GET"]
+    pool.clear()
+
+
+def test_post_is_not_resent_once_it_reached_the_server():
+    pool = http_client.ConnectionPool()
+    with DroppingServer() as server:
+        assert fetch(pool, "POST", server.url) == b"ok"
+        with pytest.raises((http.client.RemoteDisconnected, ConnectionResetError)):
+            fetch(pool, "POST", server.url)
+        assert server.requests == ["POST", "POST"]
+    pool.clear()
+
+
+class StaleConnection(object):
+    sock = None
+
+    def request(self, *args, **kwargs):
+        raise BrokenPipeError("connection closed by peer")
+
+    def close(self):
+        pass
+
+
+def test_post_is_resent_when_it_was_never_sent():
+    pool = http_client.ConnectionPool()
+    with DroppingServer() as server:
+        key = ("http", "127.0.0.1", server.httpd.server_address[1])
+        pool.put(key, StaleConnection())
+        assert fetch(pool, "POST", server.url) == b"ok"
+        assert server.requests == ["POST"]
+    pool.clear()
@@ -0,0 +1,61 @@
+import json
+import random
+import re
+
+import pytest
+
+from src.monitors.json3_parser import parse_json3_file, parse_json3_text
+
+
+def legacy_parse(doc):
+    """The json.load parser the streaming one replaced."""
+    segments = []
+    for event in doc.get("events", []):
+        for seg in event.get("segs", []):
+            text = seg.get("utf8", "").strip()
+            if text and text != "\n":
+                segments.append(text)
+    raw_text = " ".join(segments)
+    raw_text = re.sub(r"\[.*?\]", "", raw_text)
+    return re.sub(r"\s+", " ", raw_text).strip()
+
+
+def _random_doc(rng):
+    alphabet = ["a", "b", " ", "[", "]", "\n", "\t", "x y", "[Music]", "é", '"q"', "\\"]
+    events = []
+    for _ in range(rng.randint(0, 6)):
+        event = {"tStartMs": rng.randint(0, 10000)}
+        if rng.random() < 0.9:
+            event["segs"] = [
+                {"utf8": "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))}
+                for _ in range(rng.randint(0, 4))
+            ]
+        events.append(event)
+    return {"wireMagic": "pb3", "pens": [{}], "events": events}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_legacy_parser(seed):
+    rng = random.Random(seed)
+    for _ in range(25):
+        doc = _random_doc(rng)
+        assert parse_json3_text(json.dumps(doc)) == legacy_parse(doc), doc
+
+
+def test_annotation_split_across_segments():
+    doc = {"events": [{"segs": [{"utf8": "hello ["}, {"utf8": "Music"}]},
+                      {"segs": [{"utf8": "] world"}]}]}
+    assert parse_json3_text(json.dumps(doc)) == legacy_parse(doc) == "hello world"
+
+
+def test_file_larger_than_one_read_chunk(tmp_path):
+    words = ["word%d" % i for i in range(40000)]
+    doc = {"events": [{"segs": [{"utf8": " " + w}]} for w in words]}
+    path = tmp_path / "big.json3"
+    path.write_text(json.dumps(doc))
+    assert parse_json3_file(str(path)) == legacy_parse(doc) == " ".join(words)
+
+
+def test_events_missing_or_empty():
+    assert parse_json3_text(json.dumps({"wireMagic": "pb3"})) == ""
+    assert parse_json3_text(json.dumps({"events": []})) == ""
@@ -0,0 +1,89 @@
+import pytest
+
+from src.utils.llm_client import (
+    DEFAULT_MODEL,
+    AnthropicAPIError,
+    AnthropicClient,
+    LLMResponse,
+    estimate_cost,
+)
+
+
+def make_client(responses, telemetry=False):
+    client = AnthropicClient(api_key="test", cache_enabled=True, telemetry=telemetry)
+    sent = []
+
+    def fake_send(body, stream=False, should_abort=None):
+        sent.append(body)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    client._send = fake_send
+    return client, sent
+
+
+def test_aborted_stream_caches_its_verdict(db):
+    partial = LLMResponse(text='{"has_workflow": fal', model="m", aborted=True)
+    client, sent = make_client([partial])
+    first = client.create_message("prompt", stream=True, aborted_text='{"has_workflow": false}')
+    assert first.aborted and first.text == partial.text
+
+    again = client.create_message("prompt", aborted_text='{"has_workflow": false}')
+    assert again.cached and not again.aborted
+    assert again.text == '{"has_workflow": false}'
+    assert len(sent) == 1
+
+
+def test_aborted_stream_without_verdict_is_not_cached(db):
+    client, sent = make_client([
+        LLMResponse(text='{"has_wo', model="m", aborted=True),
+        LLMResponse(text='{"has_workflow": true}', model="m"),
+    ])
+    client.create_message("prompt", stream=True)
+    assert client.create_message("prompt").text == '{"has_workflow": true}'
+    assert len(sent) == 2
+
+
+USAGE = {"input_tokens": 1000, "output_tokens": 500,
+         "cache_creation_input_tokens": 0, "cache_read_input_tokens": 2000}
+
+
+def test_estimate_cost():
+    # Sonnet: $3 in, $15 out and $0.30 cache reads per million tokens.
+    assert estimate_cost(DEFAULT_MODEL, USAGE) == pytest.approx(0.0111)
+    assert estimate_cost(DEFAULT_MODEL, USAGE, discount=0.5) == pytest.approx(0.00555)
+    assert estimate_cost("gpt-4o", USAGE) is None
+
+
+def test_every_call_is_recorded(db):
+    error = AnthropicAPIError("overloaded", status=529)
+    error.retries = 2
+    client, _ = make_client([
+        LLMResponse(text="{}", model=DEFAULT_MODEL, usage=dict(USAGE), latency=1.5, retries=1),
+        error,
+    ], telemetry=True)
+    client.scan_id = "scan-1"
+
+    client.create_message("prompt", kind="analysis", video_id="v1")
+    client.create_message("prompt", kind="analysis", video_id="v1")
+    with pytest.raises(AnthropicAPIError):
+        client.create_message("other prompt", kind="triage", video_id="v2")
+
+    (scan,) = db.get_llm_usage_by_scan()
+    assert scan["scan_id"] == "scan-1"
+    assert (scan["calls"], scan["cache_hits"], scan["errors"], scan["retries"]) == (3, 1, 1, 3)
+    assert (scan["input_tokens"], scan["output_tokens"]) == (1000, 500)
+    assert scan["cache_read_input_tokens"] == 2000
+    assert scan["cost_usd"] == pytest.approx(0.0111)
+    assert scan["max_latency"] == 1.5
+
+    (day,) = db.get_llm_usage_by_day()
+    assert (day["model"], day["calls"]) == (DEFAULT_MODEL, 3)
+
+
+def test_telemetry_is_off_by_default(db):
+    client, _ = make_client([LLMResponse(text="{}", model=DEFAULT_MODEL, usage=dict(USAGE))])
+    client.create_message("prompt")
+    assert db.get_llm_usage_by_scan() == []
@@ -0,0 +1,114 @@
+import random
+
+from src.monitors.youtube_monitor import VideoInfo
+from src.processors import near_duplicates
+from src.processors.near_duplicates import (
+    BANDS,
+    NUM_PERM,
+    ROWS_PER_BAND,
+    DuplicateFilter,
+    band_keys,
+    find_near_duplicate,
+    minhash,
+    pack_signature,
+    similarity,
+    unpack_signature,
+)
+
+VOCAB = ["word%d" % n for n in range(2000)]
+
+
+def transcript(seed, words=300):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCAB) for _ in range(words))
+
+
+def edited(text, every=50):
+    """The same transcript with one word in `every` replaced."""
+    words = text.split()
+    for i in range(0, len(words), every):
+        words[i] = "changed%d" % i
+    return " ".join(words)
+
+
+def store(db, video_id, signature, workflow_id=None):
+    db.save_transcript_fingerprints(
+        [(video_id, pack_signature(signature), band_keys(signature), workflow_id, None)])
+
+
+def test_minhash_similarity():
+    text = transcript(1)
+    assert minhash(text) == minhash(text.upper())
+    assert similarity(minhash(text), minhash(text)) == 1.0
+    assert similarity(minhash(text), minhash(edited(text))) >= 0.8
+    assert similarity(minhash(text), minhash(transcript(2))) < 0.2
+
+
+def test_short_transcripts_get_no_signature():
+    assert minhash("only a few words here", min_words=100) is None
+    assert minhash("two words") is None
+
+
+def test_signature_round_trip():
+    signature = minhash(transcript(1))
+    assert len(signature) == NUM_PERM
+    data = pack_signature(signature)
+    assert len(data) == NUM_PERM * 8
+    assert unpack_signature(data) == signature
+
+
+def test_band_keys_change_only_with_their_band():
+    signature = list(minhash(transcript(1)))
+    keys = band_keys(signature)
+    assert len(set(keys)) == BANDS
+    assert all(-(1 << 63) <= k < (1 << 63) for k in keys)
+    signature[0] += 1
+    changed = band_keys(signature)
+    assert [a == b for a, b in zip(keys, changed)] == [False] + [True] * (BANDS - 1)
+
+
+def test_find_near_duplicate(db):
+    text = transcript(1)
+    store(db, "orig", minhash(text))
+
+    same = find_near_duplicate(minhash(text))
+    assert same["video_id"] == "orig" and same["similarity"] == 1.0
+    assert find_near_duplicate(minhash(edited(text)))["video_id"] == "orig"
+    assert find_near_duplicate(minhash(transcript(2))) is None
+
+
+def test_candidates_need_a_shared_band(db):
+    stored = minhash(transcript(1))
+    store(db, "orig", stored)
+
+    # Keep only the first band: a candidate, but far below the threshold.
+    one_band = stored[:ROWS_PER_BAND] + tuple(v + 1 for v in stored[ROWS_PER_BAND:])
+    assert similarity(stored, one_band) == float(ROWS_PER_BAND) / NUM_PERM
+    assert find_near_duplicate(one_band, 0.8) is None
+    assert find_near_duplicate(one_band, 0.05)["video_id"] == "orig"
+
+    # One differing value in every band: no shared key, so never compared.
+    no_band = tuple(v + 1 if i % ROWS_PER_BAND == 0 else v for i, v in enumerate(stored))
+    assert similarity(stored, no_band) == 0.75
+    assert find_near_duplicate(no_band, 0.0) is None
+
+
+def test_filter_reuses_one_connection(db, monkeypatch):
+    store(db, "orig", minhash(transcript(1)))
+    opened = []
+
+    def connect(**kwargs):
+        opened.append(kwargs)
+        return db.get_connection(**kwargs)
+
+    monkeypatch.setattr(near_duplicates, "get_connection", connect)
+    videos = [
+        VideoInfo(video_id="v%d" % n, title="Video %d" % n, channel_name="Channel",
+                  channel_id="UC1", published="", url="", transcript=text)
+        for n, text in enumerate([edited(transcript(1)), transcript(2), transcript(3)])
+    ]
+    dedupe = DuplicateFilter(min_similarity=0.8, min_words=10)
+    assert [v.video_id for v in dedupe.split(videos)] == ["v1", "v2"]
+    assert dedupe.original_of == {"v0": "orig"}
+    dedupe.close()
+    assert opened == [{"check_same_thread": False}]
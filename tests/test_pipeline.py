@@ -0,0 +1,266 @@
+import pytest
+
+from src import pipeline
+from src.monitors.youtube_monitor import VideoInfo
+from src.processors import work_items, workflow_analyzer
+from src.processors.near_duplicates import DuplicateFilter
+from src.utils import scan_metrics
+from src.utils.llm_client import get_client
+
+
+def test_start_scan_restores_llm_cache_setting(db):
+    llm = get_client()
+    llm.cache_enabled = True
+    with pytest.raises(RuntimeError):
+        with pipeline._start_scan(use_llm_cache=False) as (scan_id, client, _):
+            assert client is llm
+            assert not llm.cache_enabled
+            assert llm.scan_id == scan_id
+            raise RuntimeError("scan failed")
+    assert llm.cache_enabled
+    assert llm.scan_id is None
+
+
+def test_start_scan_resets_triage_stats(db):
+    workflow_analyzer._triage_stats.record(True, 0.9, 0.7)
+    workflow_analyzer._triage_stats.record_failure()
+    with pipeline._start_scan():
+        stats = workflow_analyzer.triage_stats()
+    assert (stats["positive"], stats["failed"]) == (0, 0)
+
+
+TRANSCRIPT = " ".join(
+    "step %d connect the webhook to the sheet and send a summary email" % n for n in range(40)
+)
+
+
+def video(video_id, transcript=TRANSCRIPT):
+    return VideoInfo(video_id=video_id, title="Automation %s" % video_id,
+                     channel_name="Channel", channel_id="UC1", published="",
+                     url="https://www.youtube.com/watch?v=%s" % video_id,
+                     transcript=transcript)
+
+
+def unique_transcript(seed):
+    return " ".join("word%s_%d" % (seed, n) for n in range(30))
+
+
+class AcceptAll(object):
+    def from_title(self, video):
+        return True
+
+    def from_transcript(self, video):
+        return True
+
+
+@pytest.fixture
+def fake_scan(db, monkeypatch, pipeline_settings):
+    """Stub out feeds, yt-dlp, the LLM and doc generation for _run_staged_scan."""
+    pipeline_settings("dedupe", "min_words", 10)
+    state = {"videos": [], "fail": set(), "analyzed": []}
+
+    monkeypatch.setattr(pipeline, "get_youtube_channels",
+                        lambda: [{"name": "Channel", "channel_id": "UC1"}])
+    monkeypatch.setattr(pipeline, "poll_channel",
+                        lambda channel, cutoff, limit: list(state["videos"]))
+    monkeypatch.setattr(pipeline, "fetch_transcript", lambda video_id, timeout: (
+        "ok", next(v.transcript for v in state["videos"] if v.video_id == video_id)))
+    monkeypatch.setattr(pipeline, "RelevanceFilter", AcceptAll)
+    monkeypatch.setattr(pipeline, "evict_transcript_store", lambda: None)
+    monkeypatch.setattr(pipeline, "append_discovery", lambda day, entry: None)
+    monkeypatch.setattr(pipeline, "_document_workflow", lambda wf: "doc.md")
+
+    def analyze(video):
+        state["analyzed"].append(video.video_id)
+        if video.video_id in state["fail"]:
+            raise RuntimeError("LLM call failed")
+        return {"has_workflow": True, "use_case": "data-ops", "value_score": 6}
+
+    monkeypatch.setattr(pipeline, "analyze_video", analyze)
+
+    def run(resume_items=None):
+        return pipeline._run_staged_scan(
+            "scan-1", DuplicateFilter(), all_channels=True, transcript_workers=1,
+            resume_items=resume_items,
+        )
+
+    state["run"] = run
+    return state
+
+
+def item_states(db):
+    rows = db.get_work_items(work_items.OPEN_STATES + (
+        work_items.STORED, work_items.SKIPPED, work_items.FAILED))
+    return dict((r["video_id"], r["state"]) for r in rows)
+
+
+def test_duplicate_of_stored_original_is_skipped(fake_scan, db):
+    fake_scan["videos"] = [video("orig"), video("copy")]
+    _, workflows, _ = fake_scan["run"]()
+    assert [wf["video_id"] for wf in workflows] == ["orig"]
+    assert fake_scan["analyzed"] == ["orig"]
+    assert item_states(db) == {"orig": work_items.STORED, "copy": work_items.SKIPPED}
+
+
+def test_duplicate_of_failed_original_is_analyzed(fake_scan, db):
+    fake_scan["videos"] = [video("orig"), video("copy")]
+    fake_scan["fail"].add("orig")
+    _, workflows, stages = fake_scan["run"]()
+    assert [wf["video_id"] for wf in workflows] == ["copy"]
+    assert fake_scan["analyzed"] == ["orig", "copy"]
+    # The original is left for the next scan; the copy was not lost.
+    assert item_states(db) == {"orig": work_items.TRANSCRIPT_FETCHED, "copy": work_items.STORED}
+    analysis = next(s for s in stages if s["name"] == "analysis")
+    assert analysis["items_in"] == 2
+
+
+def test_resume_continues_after_a_mid_stage_crash(fake_scan, db):
+    videos = [video("fetched"), video("analyzed", "x " * 20), video("documented", "y " * 20)]
+    fake_scan["videos"] = videos
+    items = work_items.discover(videos, "scan-0")
+    items[0].advance(work_items.TRANSCRIPT_FETCHED, transcript=TRANSCRIPT)
+    items[1].advance(work_items.ANALYZED, transcript="x", analysis={"value_score": 4})
+    items[2].advance(work_items.DOCUMENTED, analysis={"value_score": 9}, doc_path="d.md")
+
+    _, workflows, _ = fake_scan["run"](resume_items=work_items.load_unfinished())
+    assert fake_scan["analyzed"] == ["fetched"]
+    assert sorted(wf["video_id"] for wf in workflows) == ["analyzed", "documented", "fetched"]
+    assert set(item_states(db).values()) == {work_items.STORED}
+    assert db.get_processed_video_ids() == {"fetched", "analyzed", "documented"}
+
+
+def test_resume_after_crash_between_insert_and_checkpoint(fake_scan, db):
+    (item,) = work_items.discover([video("v")])
+    item.advance(work_items.DOCUMENTED, analysis={"value_score": 5}, doc_path="d.md")
+    db.insert_workflow({"source_url": item.video.url, "source_title": item.video.title})
+
+    _, workflows, _ = fake_scan["run"](resume_items=work_items.load_unfinished())
+    assert workflows == []
+    assert item_states(db) == {"v": work_items.STORED}
+
+
+def test_resume_recovers_a_held_duplicate(fake_scan, db):
+    # The scan died while "copy" waited open for its original.
+    (copy,) = work_items.discover([video("copy")])
+    copy.advance(work_items.TRANSCRIPT_FETCHED, transcript=TRANSCRIPT)
+
+    _, workflows, _ = fake_scan["run"](resume_items=work_items.load_unfinished())
+    assert [wf["video_id"] for wf in workflows] == ["copy"]
+    assert item_states(db) == {"copy": work_items.STORED}
+
+
+def test_scan_without_relevant_videos_is_recorded(fake_scan, db, monkeypatch):
+    monkeypatch.setattr(pipeline, "rebuild_curriculum", lambda: None)
+    summary = pipeline.run_daily_scan(all_channels=True)
+    assert (summary["videos_checked"], summary["relevant_found"]) == (0, 0)
+    assert summary["workflows_generated"] == 0
+    assert "metrics" in summary
+
+    last = db.get_last_scan()
+    assert last["scan_id"] and last["videos_checked"] == 0
+    assert db.get_scan_stage_metrics([last["scan_id"]])[last["scan_id"]]
+    assert scan_metrics.current_scan() is None
+
+
+def test_failed_scan_stops_collecting_metrics(fake_scan, monkeypatch):
+    def crash(*args, **kwargs):
+        raise RuntimeError("feeds down")
+
+    monkeypatch.setattr(pipeline, "_run_staged_scan", crash)
+    with pytest.raises(RuntimeError):
+        pipeline.run_daily_scan(all_channels=True)
+    assert scan_metrics.current_scan() is None
+
+
+def test_resume_analysis_batches_records_a_scan(fake_scan, db, monkeypatch):
+    from test_batch_analyzer import ENTRIES, FakeTransport
+    from src.processors import batch_analyzer
+
+    transport = FakeTransport(entries=ENTRIES)
+    monkeypatch.setattr(batch_analyzer, "AnthropicBatchTransport", lambda: transport)
+    monkeypatch.setattr(pipeline, "rebuild_curriculum", lambda: None)
+    batch_analyzer.submit_analysis_batch(
+        [video("v%d" % n) for n in range(4)], transport)
+
+    summary = pipeline.resume_analysis_batches(wait=False)
+    assert (summary["batches_completed"], summary["workflows_generated"]) == (1, 1)
+    assert get_client().scan_id is None
+    assert db.get_last_scan()["scan_id"]
+    # Errored and missing requests are left for the next scan to pick up.
+    assert db.filter_processed_video_ids(["v0", "v1", "v2", "v3"]) == {"v0", "v1"}
+
+
+def test_daily_scan_resumes_unfinished_items_first(fake_scan, db, monkeypatch):
+    monkeypatch.setattr(pipeline, "rebuild_curriculum", lambda: None)
+    fake_scan["videos"] = [video("v")]
+    fake_scan["fail"].add("v")
+    fake_scan["run"]()
+    assert item_states(db) == {"v": work_items.TRANSCRIPT_FETCHED}
+
+    fake_scan["fail"].clear()
+    fake_scan["videos"] = []
+    summary = pipeline.run_daily_scan(all_channels=True)
+    assert summary["resumed"] == {work_items.TRANSCRIPT_FETCHED: 1}
+    assert summary["workflows_generated"] == 1
+    assert item_states(db) == {"v": work_items.STORED}
+
+
+@pytest.fixture
+def unstaged_scan(fake_scan, monkeypatch, pipeline_settings):
+    """run_daily_scan through check_for_new_videos instead of the staged pipeline."""
+    pipeline_settings("pipeline", "staged", False)
+    monkeypatch.setattr(pipeline, "rebuild_curriculum", lambda: None)
+
+    def check(**kwargs):
+        for v in fake_scan["videos"]:
+            v.is_relevant = True
+        return list(fake_scan["videos"])
+
+    def analyze_all(videos, workers=None):
+        results = []
+        for v in videos:
+            try:
+                results.append((v, pipeline.analyze_video(v)))
+            except RuntimeError:
+                pass
+        return results
+
+    monkeypatch.setattr(pipeline, "check_for_new_videos", check)
+    monkeypatch.setattr(pipeline, "analyze_videos", analyze_all)
+    return fake_scan
+
+
+def test_unstaged_scan_checkpoints_work_items(unstaged_scan, db):
+    unstaged_scan["videos"] = [video("ok"), video("bad", unique_transcript("bad")),
+                               video("copy")]
+    unstaged_scan["fail"].add("bad")
+    summary = pipeline.run_daily_scan()
+    assert summary["workflows_generated"] == 1
+    assert item_states(db) == {"ok": work_items.STORED, "bad": work_items.TRANSCRIPT_FETCHED,
+                               "copy": work_items.SKIPPED}
+    assert db.get_processed_video_ids() == {"ok", "copy"}
+
+
+def test_batch_scan_checkpoints_work_items(unstaged_scan, db, monkeypatch, pipeline_settings):
+    from test_batch_analyzer import ENTRIES, FakeTransport
+    from src.processors import batch_analyzer
+
+    pipeline_settings("analysis", "batch_max_wait_hours", 0)
+    # The batch is still running: its videos stay open but are not resumed.
+    transport = FakeTransport()
+    monkeypatch.setattr(batch_analyzer, "AnthropicBatchTransport", lambda: transport)
+    unstaged_scan["videos"] = [video("v%d" % n, unique_transcript(n)) for n in range(4)]
+    pipeline.run_daily_scan(batch=True)
+    assert set(item_states(db).values()) == {work_items.TRANSCRIPT_FETCHED}
+    assert work_items.load_unfinished() == []
+
+    transport.entries = ENTRIES
+    unstaged_scan["videos"] = []
+    summary = pipeline.run_daily_scan(batch=True)
+    assert summary["workflows_generated"] == 1
+    assert item_states(db) == {
+        "v0": work_items.STORED, "v1": work_items.SKIPPED,
+        "v2": work_items.TRANSCRIPT_FETCHED, "v3": work_items.TRANSCRIPT_FETCHED,
+    }
+    # The failed requests are retried by the next scan.
+    assert [item.video.video_id for item in work_items.load_unfinished()] == ["v2", "v3"]
@@ -0,0 +1,84 @@
+import pytest
+
+from src.utils import rate_limiter
+from src.utils.rate_limiter import RateLimiter
+
+
+class FakeClock(object):
+    """Stands in for both time.monotonic and the limiter's Condition."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.waits = []
+
+    def monotonic(self):
+        return self.now
+
+    def wait(self, delay):
+        self.waits.append(delay)
+        self.now += delay
+
+    def notify_all(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def make_limiter(clock, **limits):
+    limiter = RateLimiter(**limits)
+    limiter._cond = clock
+    return limiter
+
+
+def test_requests_burst_to_capacity_then_wait(clock):
+    limiter = make_limiter(clock, requests_per_minute=60)
+    assert all(limiter.acquire() == 0 for _ in range(60))
+    assert limiter.acquire() == pytest.approx(1.0)
+    clock.now += 0.5
+    assert limiter.acquire() == pytest.approx(0.5)
+
+
+def test_token_bucket_waits_for_refill(clock):
+    limiter = make_limiter(clock, tokens_per_minute=600)
+    assert limiter.acquire(tokens=500) == 0
+    # 100 left, 10 tokens per second
+    assert limiter.acquire(tokens=200) == pytest.approx(10.0)
+
+
+def test_oversized_request_waits_for_a_full_bucket_only(clock):
+    limiter = make_limiter(clock, tokens_per_minute=600)
+    assert limiter.acquire(tokens=5000) == 0
+    assert limiter.acquire(tokens=5000) == pytest.approx(500.0)
+
+
+def test_settle_charges_the_difference(clock):
+    limiter = make_limiter(clock, tokens_per_minute=600)
+    limiter.acquire(tokens=100)
+    limiter.settle(100, 600)
+    assert limiter.acquire(tokens=10) == pytest.approx(1.0)
+    limiter.settle(10, None)
+    assert limiter.acquire(tokens=0) == 0
+
+
+def test_penalize_blocks_requests(clock):
+    limiter = make_limiter(clock, requests_per_minute=60)
+    limiter.penalize(5)
+    assert limiter.acquire() == pytest.approx(6.0)
+
+
+def test_zero_limits_never_wait(clock):
+    limiter = make_limiter(clock)
+    limiter.penalize(30)
+    assert all(limiter.acquire(tokens=10 ** 9) == 0 for _ in range(100))
+    assert clock.waits == []
@@ -0,0 +1,52 @@
+from src.monitors.youtube_monitor import (
+    RELEVANCE_TITLE_FIRST,
+    RELEVANCE_TITLE_ONLY,
+    RELEVANCE_TRANSCRIPT,
+    KeywordMatcher,
+    classify_title,
+    is_relevant,
+)
+
+
+def test_keywords_are_literal_and_case_insensitive():
+    matcher = KeywordMatcher(["make.com", "C++", "n8n"])
+    assert matcher.matches("Building with MAKE.COM today")
+    assert not matcher.matches("makexcom is not make dot com")
+    assert matcher.matches("a c++ walkthrough")
+    assert matcher.matches("N8N basics")
+
+
+def test_overlapping_keywords_still_match():
+    matcher = KeywordMatcher(["ai", "ai agent", "agent"])
+    assert matcher.matches("My AI Agent")
+    assert matcher.matches("agentic")
+
+
+def test_empty_matcher_is_falsy_and_never_matches():
+    matcher = KeywordMatcher([""])
+    assert not matcher
+    assert not matcher.matches("anything")
+    assert not KeywordMatcher([]).matches("")
+
+
+def test_search_expects_lowercased_text():
+    matcher = KeywordMatcher(["Zapier"])
+    assert matcher.search("zapier flow")
+    assert not matcher.search("ZAPIER FLOW")
+
+
+def test_is_relevant_only_reads_transcript_prefix():
+    matcher = KeywordMatcher(["workflow"])
+    assert is_relevant("Vlog", "x " * 100 + "workflow", matcher)
+    assert not is_relevant("Vlog", "x" * 600 + " workflow", matcher)
+    assert is_relevant("A Workflow", "", ["workflow"])
+
+
+def test_classify_title_modes():
+    matcher = KeywordMatcher(["automation"])
+    exclude = KeywordMatcher(["podcast"])
+    assert classify_title("Automation 101", matcher, exclude, RELEVANCE_TRANSCRIPT) is None
+    assert classify_title("Automation 101", matcher, exclude, RELEVANCE_TITLE_FIRST) is True
+    assert classify_title("Automation podcast", matcher, exclude, RELEVANCE_TITLE_FIRST) is False
+    assert classify_title("Weekend vlog", matcher, exclude, RELEVANCE_TITLE_FIRST) is None
+    assert classify_title("Weekend vlog", matcher, exclude, RELEVANCE_TITLE_ONLY) is False
@@ -0,0 +1,31 @@
+import pytest
+
+from src.utils import scan_metrics
+
+
+@pytest.fixture(autouse=True)
+def no_scan():
+    scan_metrics.end_scan()
+    yield
+    scan_metrics.end_scan()
+
+
+def test_nested_begin_scan_is_rejected():
+    first = scan_metrics.begin_scan()
+    with pytest.raises(RuntimeError):
+        scan_metrics.begin_scan()
+    assert scan_metrics.current_scan() is first
+    scan_metrics.end_scan()
+    assert scan_metrics.begin_scan() is not first
+
+
+def test_tracking_outside_a_scan_is_a_no_op():
+    metrics = scan_metrics.begin_scan()
+    with scan_metrics.track(scan_metrics.FEEDS):
+        scan_metrics.add_bytes(scan_metrics.FEEDS, 100)
+    scan_metrics.end_scan()
+    with scan_metrics.track(scan_metrics.FEEDS):
+        scan_metrics.add_bytes(scan_metrics.FEEDS, 100)
+    feeds = metrics.components[scan_metrics.FEEDS]
+    assert (feeds.items, feeds.bytes) == (1, 100)
+    assert scan_metrics.current_scan() is None
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from src.utils.stages import Stage, run_stages
+
+
+def stage_threads():
+    return [t for t in threading.enumerate() if t.name.split("-")[0] in ("split", "square", "sink")]
+
+
+def test_items_flow_through_every_stage():
+    out = []
+    lock = threading.Lock()
+
+    def split(n, emit):
+        emit(n)
+        emit(n + 100)
+
+    def square(n, emit):
+        emit(n * n)
+
+    def sink(n, emit):
+        with lock:
+            out.append(n)
+
+    stats = run_stages(
+        [Stage("split", split, 3), Stage("square", square, 2), Stage("sink", sink, 1)],
+        range(5), queue_size=2,
+    )
+    assert sorted(out) == sorted([n * n for n in range(5)] + [(n + 100) ** 2 for n in range(5)])
+    assert [(s.items_in, s.items_out) for s in stats] == [(5, 10), (10, 10), (10, 0)]
+    assert all(s.errors == 0 for s in stats)
+
+
+def test_errors_are_counted_and_do_not_stop_the_run():
+    out = []
+
+    def parse(n, emit):
+        if n % 3 == 0:
+            raise ValueError("bad item %d" % n)
+        emit(n)
+
+    stats = run_stages([Stage("parse", parse, 2), Stage("sink", lambda n, emit: out.append(n))],
+                       range(9))
+    assert sorted(out) == [1, 2, 4, 5, 7, 8]
+    assert (stats[0].items_in, stats[0].errors, stats[0].items_out) == (9, 3, 6)
+    assert stats[1].errors == 0
+
+
+def test_all_workers_shut_down():
+    # More workers than items in every stage, and an empty run.
+    for items in (range(2), []):
+        stats = run_stages(
+            [Stage("split", lambda n, emit: emit(n), 8), Stage("square", lambda n, emit: emit(n), 5),
+             Stage("sink", lambda n, emit: None, 3)],
+            items,
+        )
+        assert [s.items_in for s in stats] == [len(items)] * 3
+        assert stage_threads() == []
+        assert all(s.wall_seconds >= 0 for s in stats)
+
+
+def test_slow_stage_blocks_the_one_feeding_it():
+    def slow(n, emit):
+        time.sleep(0.02)
+
+    stats = run_stages([Stage("split", lambda n, emit: emit(n), 1), Stage("sink", slow, 1)],
+                       range(6), queue_size=1)
+    assert stats[0].max_blocked_seconds > 0.005
+    # The feeding stage could only finish once the sink had nearly caught up.
+    assert stats[0].wall_seconds >= 0.05
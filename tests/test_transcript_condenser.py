@@ -0,0 +1,61 @@
+from src.processors.transcript_condenser import CHUNK_WORDS, GAP_MARKER, condense_transcript
+
+TOOLS = ["Zapier", "Make.com", "OpenAI API"]
+
+
+def chunk(word, n=CHUNK_WORDS):
+    return " ".join("%s%d" % (word, i) for i in range(n))
+
+
+def test_short_transcript_keeps_sponsor_and_repeated_chunks():
+    sponsor = "this video is sponsored by a VPN, use my code to save"
+    text = condense_transcript(sponsor, 1000, TOOLS)
+    assert text == sponsor
+
+    body = chunk("same")
+    assert condense_transcript(body + " " + body, 10 * len(body), TOOLS) == body + " " + body
+
+
+def test_over_budget_drops_sponsor_chunks_first():
+    sponsor = "today's sponsor " + chunk("ad", CHUNK_WORDS - 2)
+    body = [chunk("intro"), sponsor, chunk("steps")]
+    full = " ".join(body)
+    text = condense_transcript(full, len(full) - 10, TOOLS)
+    assert "sponsor" not in text
+    assert text == body[0] + " " + body[2]
+
+
+def test_over_budget_keeps_tool_heavy_chunks():
+    intro = chunk("intro")
+    filler = chunk("chat")
+    tools = "connect zapier to the openai api webhook trigger " + chunk("x", CHUNK_WORDS - 8)
+    full = " ".join([intro, filler, tools])
+    text = condense_transcript(full, len(intro) + len(tools) + 2 * len(GAP_MARKER), TOOLS)
+    assert text == intro + GAP_MARKER + tools
+
+
+def test_never_empty():
+    assert condense_transcript("um uh, hmm", 100, TOOLS) == "um uh, hmm"
+    sponsor_only = " ".join("sponsor %d" % i for i in range(200))
+    text = condense_transcript(sponsor_only, 50, TOOLS)
+    assert text and len(text) <= 50
+    assert condense_transcript("", 100, TOOLS) == ""
+
+
+def test_known_tool_names_are_loaded_once(monkeypatch):
+    from src.processors import transcript_condenser
+
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {"tools": [{"name": "Zapier"}, {"name": "Make.com"}]}
+
+    monkeypatch.setattr(transcript_condenser, "load_tools_database", load)
+    transcript_condenser._known_tool_names.cache_clear()
+    try:
+        assert transcript_condenser._known_tool_names() == ("Zapier", "Make.com")
+        transcript_condenser._known_tool_names()
+        assert len(loads) == 1
+    finally:
+        transcript_condenser._known_tool_names.cache_clear()
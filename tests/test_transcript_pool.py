@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from src.monitors import transcript_pool
+from src.monitors.transcript_pool import TranscriptPool
+
+
+def test_workers_cap_concurrent_fetches():
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def fetch(video_id, timeout, on_process):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+        return transcript_pool.STATUS_OK, "text of %s" % video_id
+
+    with TranscriptPool(fetch, workers=3) as pool:
+        jobs = [pool.submit("v%d" % n) for n in range(12)]
+    assert state["peak"] == 3
+    assert all(job.done and job.transcript == "text of %s" % job.video_id for job in jobs)
+
+
+def test_summary_counts_each_outcome():
+    outcomes = {
+        "ok": (transcript_pool.STATUS_OK, "text"),
+        "none": (transcript_pool.STATUS_NO_SUBS, None),
+        "slow": (transcript_pool.STATUS_TIMEOUT, None),
+    }
+
+    def fetch(video_id, timeout, on_process):
+        if video_id == "boom":
+            raise OSError("yt-dlp not found")
+        return outcomes[video_id]
+
+    with TranscriptPool(fetch, workers=2, timeout=5) as pool:
+        jobs = dict((v, pool.submit(v)) for v in ["ok", "none", "slow", "boom"])
+    assert pool.summary() == {
+        "total": 4, "ok": 1, "no_subs": 1, "timeout": 1, "error": 1, "cancelled": 0,
+    }
+    assert jobs["boom"].error == "yt-dlp not found"
+
+
+class FakeProcess(object):
+    def __init__(self):
+        self.killed = threading.Event()
+
+    def kill(self):
+        self.killed.set()
+
+
+def test_cancel_kills_running_and_drops_queued_jobs():
+    started = threading.Event()
+    procs = []
+
+    def fetch(video_id, timeout, on_process):
+        proc = FakeProcess()
+        procs.append(proc)
+        on_process(proc)
+        started.set()
+        proc.killed.wait(5)
+        return transcript_pool.STATUS_ERROR, None
+
+    pool = TranscriptPool(fetch, workers=1)
+    pool.start()
+    running = pool.submit("running")
+    queued = pool.submit("queued")
+    assert started.wait(5)
+    pool.cancel()
+    late = pool.submit("late")
+    pool.join()
+
+    assert procs[0].killed.is_set() and len(procs) == 1
+    assert [running.status, queued.status, late.status] == [transcript_pool.STATUS_CANCELLED] * 3
+
+
+def test_error_inside_the_block_cancels_the_pool():
+    def fetch(video_id, timeout, on_process):
+        time.sleep(0.05)
+        return transcript_pool.STATUS_OK, "text"
+
+    with pytest.raises(RuntimeError):
+        with TranscriptPool(fetch, workers=1) as pool:
+            jobs = [pool.submit("v%d" % n) for n in range(5)]
+            raise RuntimeError("monitor failed")
+    assert jobs[-1].status == transcript_pool.STATUS_CANCELLED
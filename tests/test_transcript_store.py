@@ -0,0 +1,22 @@
+import threading
+
+
+def test_identical_transcripts_stored_concurrently(db):
+    text = "the same re-uploaded transcript " * 200
+    errors = []
+    start = threading.Barrier(8)
+
+    def store(n):
+        start.wait()
+        try:
+            db.store_transcript("v%d" % n, text)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert all(db.get_cached_transcript("v%d" % n) == text for n in range(8))
@@ -0,0 +1,56 @@
+from src.monitors.youtube_monitor import VideoInfo
+from src.processors import work_items
+
+
+def video(video_id):
+    return VideoInfo(video_id=video_id, title="Video %s" % video_id, channel_name="Channel",
+                     channel_id="UC1", published="", url="https://youtu.be/%s" % video_id)
+
+
+def test_unfinished_items_resume_from_their_checkpoint(db):
+    items = work_items.discover([video("a"), video("b"), video("c"), video("d")], "scan-1")
+    a, b, c, d = items
+    b.advance(work_items.TRANSCRIPT_FETCHED, transcript="the transcript")
+    c.advance(work_items.ANALYZED, transcript="the transcript", analysis={"value_score": 7})
+    d.advance(work_items.DOCUMENTED, analysis={"value_score": 7}, doc_path="docs/d.md")
+    # The process dies here; only the checkpoints survive.
+
+    resumed = dict((i.video.video_id, i) for i in work_items.load_unfinished())
+    assert sorted(resumed) == ["a", "b", "c", "d"]
+    assert resumed["a"].state == work_items.DISCOVERED
+    assert resumed["b"].state == work_items.TRANSCRIPT_FETCHED
+    assert resumed["b"].video.transcript == "the transcript"
+    assert resumed["c"].analysis == {"value_score": 7}
+    assert resumed["d"].doc_path == "docs/d.md"
+    assert resumed["d"].video.url == "https://youtu.be/d"
+    # Open items are not processed yet, but are not rediscovered either.
+    assert db.get_processed_video_ids() == set()
+    assert db.filter_processed_video_ids("abcd") == set("abcd")
+
+
+def test_finished_items_are_not_resumed(db):
+    a, b = work_items.discover([video("a"), video("b")])
+    a.finish(work_items.STORED, workflow_id=db.insert_workflow({"source_url": a.video.url}))
+    b.finish(work_items.SKIPPED)
+    assert work_items.load_unfinished() == []
+    assert "a" in db.get_processed_video_ids()
+
+
+def test_failed_attempts_give_up_after_max_attempts(db, pipeline_settings):
+    pipeline_settings("pipeline", "max_attempts", 2)
+    (item,) = work_items.discover([video("a")])
+    item.fail("timeout")
+    assert [i.video.video_id for i in work_items.load_unfinished()] == ["a"]
+    item.fail("timeout")
+    assert item.state == work_items.FAILED
+    assert work_items.load_unfinished() == []
+
+
+def test_workflow_lookup_by_source_url_uses_index(db):
+    conn = db.get_connection()
+    try:
+        plan = " ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM workflows WHERE source_url = ?", ("x",)))
+    finally:
+        conn.close()
+    assert "idx_workflows_source_url" in plan
@@ -0,0 +1,57 @@
+import pytest
+
+from src.processors import workflow_analyzer
+
+
+def test_static_instructions_are_in_the_cached_system_prompt():
+    request = workflow_analyzer.build_analysis_request(
+        title="Build a lead pipeline", channel="Channel", url="https://youtu.be/x",
+        transcript="first we connect the form to the sheet",
+    )
+    (block,) = request["system"]
+    assert block["cache_control"] == {"type": "ephemeral"}
+    assert '"has_workflow": true/false' in block["text"]
+    assert "Build a lead pipeline" not in block["text"]
+    # The per-video message carries no static instructions.
+    assert "value_score" not in request["prompt"]
+    assert "first we connect the form to the sheet" in request["prompt"]
+
+
+def test_prompt_cache_usage_counts_api_calls_only(db):
+    def call(status, read):
+        return {
+            "scan_id": "s1", "video_id": "v", "model": "m", "prompt_kind": "analysis",
+            "input_tokens": 10, "output_tokens": 5, "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": read, "latency": 1.0, "ttft": None,
+            "status": status, "retries": 0, "cost_usd": 0.0,
+        }
+
+    db.record_llm_call(call("ok", 0))
+    db.record_llm_call(call("ok", 1500))
+    db.record_llm_call(call("cache_hit", 0))
+    db.record_llm_call(call("error", 0))
+    assert db.get_prompt_cache_usage("s1", "analysis") == {
+        "calls": 2, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 1500,
+    }
+
+
+def test_failed_extraction_is_left_out_of_triage_precision(monkeypatch):
+    workflow_analyzer.reset_triage_stats()
+    monkeypatch.setattr(workflow_analyzer, "triage_transcript", lambda *args: (True, 0.9))
+    outcomes = iter([{"has_workflow": True}, None, RuntimeError("overloaded")])
+
+    def extract(*args):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(workflow_analyzer, "_extract_workflow", extract)
+    workflow_analyzer.analyze_transcript("a", "c", "u", "t")
+    workflow_analyzer.analyze_transcript("b", "c", "u", "t")
+    with pytest.raises(RuntimeError):
+        workflow_analyzer.analyze_transcript("c", "c", "u", "t")
+
+    stats = workflow_analyzer.triage_stats()
+    assert (stats["positive"], stats["confirmed"], stats["extraction_failed"]) == (3, 1, 1)
+    assert stats["precision"] == 0.5
@@ -0,0 +1,79 @@
+import textwrap
+
+import pytest
+
+from src.monitors import transcript_pool, ytdlp_service
+
+FAKE_YT_DLP = '''
+import io
+import time
+
+JSON3 = '{"events": [{"segs": [{"utf8": "hello"}]}]}'
+
+
+class version(object):
+    __version__ = "fake"
+
+
+class YoutubeDL(object):
+    def __init__(self, options):
+        self.options = options
+
+    def extract_info(self, url, download=True):
+        video_id = url.rsplit("=", 1)[1]
+        if video_id == "boom":
+            raise ValueError("video unavailable")
+        if video_id == "hang":
+            time.sleep(30)
+        if video_id == "nosubs":
+            return {"automatic_captions": {}}
+        return {"automatic_captions": {"en": [
+            {"ext": "vtt", "url": "https://captions/vtt"},
+            {"ext": "json3", "url": "https://captions/json3"},
+        ]}}
+
+    def urlopen(self, url):
+        return io.BytesIO(JSON3.encode("utf-8"))
+'''
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """A YtdlpService whose workers import a stand-in yt_dlp."""
+    (tmp_path / "yt_dlp").mkdir()
+    (tmp_path / "yt_dlp" / "__init__.py").write_text(textwrap.dedent(FAKE_YT_DLP))
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    svc = ytdlp_service.YtdlpService()
+    yield svc
+    svc.shutdown()
+
+
+def test_one_warm_worker_serves_every_video(service):
+    processes = []
+    status, json3 = service.fetch("ok", timeout=30, on_process=processes.append)
+    assert status == transcript_pool.STATUS_OK and '"hello"' in json3
+    assert service.fetch("nosubs", timeout=30, on_process=processes.append) == (
+        transcript_pool.STATUS_NO_SUBS, None)
+    assert service.fetch("boom", timeout=30, on_process=processes.append) == (
+        transcript_pool.STATUS_ERROR, None)
+    assert len(set(p.pid for p in processes)) == 1
+
+
+def test_timed_out_worker_is_replaced(service):
+    processes = []
+    assert service.fetch("hang", timeout=0.5, on_process=processes.append) == (
+        transcript_pool.STATUS_TIMEOUT, None)
+    assert processes[0].poll() is not None
+    assert service.fetch("ok", timeout=30, on_process=processes.append)[0] == (
+        transcript_pool.STATUS_OK)
+    assert processes[1].pid != processes[0].pid
+
+
+def test_missing_yt_dlp_marks_the_service_unavailable(tmp_path, monkeypatch):
+    (tmp_path / "yt_dlp").mkdir()
+    (tmp_path / "yt_dlp" / "__init__.py").write_text("raise ImportError('no yt_dlp')\n")
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    svc = ytdlp_service.YtdlpService()
+    with pytest.raises(RuntimeError, match="no yt_dlp"):
+        svc.fetch("ok")
+    assert not svc.available